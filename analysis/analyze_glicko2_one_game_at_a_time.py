@@ -1,110 +1,115 @@
 #!/usr/bin/env -S PYTHONDONTWRITEBYTECODE=1 PYTHONPATH=..:. pypy3
 
 from analysis.util import (
-    Glicko2Analytics,
+    DenseStorage,
+    Glicko2OneGameAtATime,
+    Glicko2TableStorage,
     InMemoryStorage,
+    JournalingStorage,
+    SQLiteStorage,
     GameData,
+    HistoryPolicy,
     TallyGameAnalytics,
+    build_mapped_storage,
     cli,
     config,
-    get_handicap_adjustment,
-    rating_to_rank,
-    rank_to_rating,
 )
-from goratings.interfaces import GameRecord, RatingSystem, Storage
-from goratings.math.glicko2 import Glicko2Entry, glicko2_update
-
-
-class OneGameAtATime(RatingSystem):
-    _storage: Storage
-
-    def __init__(self, storage: Storage) -> None:
-        self._storage = storage
-
-    def process_game(self, game: GameRecord) -> Glicko2Analytics:
-        if game.black_manual_rank_update is not None:
-            self._storage.set(game.black_id, Glicko2Entry(rank_to_rating(game.black_manual_rank_update)))
-
-        if game.white_manual_rank_update is not None:
-            self._storage.set(game.white_id, Glicko2Entry(rank_to_rating(game.white_manual_rank_update)))
-
-        ## Only count the first timeout in correspondence games as a ranked loss
-        if game.timeout and game.speed == 3: # correspondence timeout
-            player_that_timed_out = game.black_id if game.black_id != game.winner_id else game.white_id
-            other_player = game.black_id if game.black_id == game.winner_id else game.white_id
-            skip = self._storage.get_timeout_flag(game.black_id) or self._storage.get_timeout_flag(game.white_id)
-            self._storage.set_timeout_flag(player_that_timed_out, True)
-            self._storage.set_timeout_flag(other_player, False)
-            if skip:
-                return Glicko2Analytics(skipped=True, game=game)
-        elif game.speed == 3: # correspondence non timeout, clear flags for both
-            self._storage.set_timeout_flag(game.black_id, False)
-            self._storage.set_timeout_flag(game.white_id, False)
-
-        #if game.speed == 3: # clear corr. timeout flags
-        #    self._storage.set_timeout_flag(game.black_id, True)
-        #    self._storage.set_timeout_flag(game.white_id, True)
-
-
-        black = self._storage.get(game.black_id)
-        white = self._storage.get(game.white_id)
-
-
-        updated_black = glicko2_update(
-            black,
-            [
-                (
-                    white.copy(-get_handicap_adjustment(white.rating, game.handicap)),
-                    game.winner_id == game.black_id,
-                )
-            ],
-        )
-
-        updated_white = glicko2_update(
-            white,
-            [
-                (
-                    black.copy(get_handicap_adjustment(black.rating, game.handicap)),
-                    game.winner_id == game.white_id,
-                )
-            ],
-        )
-
-        self._storage.set(game.black_id, updated_black)
-        self._storage.set(game.white_id, updated_white)
-        #self._storage.add_rating_history(game.black_id, game.ended, updated_black)
-        #self._storage.add_rating_history(game.white_id, game.ended, updated_white)
-
-        return Glicko2Analytics(
-            skipped=False,
-            game=game,
-            expected_win_rate=black.expected_win_probability(
-                white, get_handicap_adjustment(black.rating, game.handicap), ignore_g=True
-            ),
-            black_rating=black.rating,
-            white_rating=white.rating,
-            black_deviation=black.deviation,
-            white_deviation=white.deviation,
-            black_rank=rating_to_rank(black.rating),
-            white_rank=rating_to_rank(white.rating),
-            black_updated_rating=updated_black.rating,
-            white_updated_rating=updated_white.rating,
-        )
+from goratings.math.glicko2 import Glicko2Entry
 
+import numpy as np
 
+cli.add_argument(
+    "--waves", dest="waves", const=1, default=False, action="store_const", help="Rate consecutive games that share no player as one vectorized wave",
+)
+cli.add_argument(
+    "--storage-file", dest="storage_file", default=None, help="Keep the rating state in this SQLite database",
+)
+cli.add_argument(
+    "--float32", dest="float32", const=1, default=False, action="store_const", help="Keep the player state in a compact float32 table",
+)
+cli.add_argument(
+    "--dense", dest="dense", const=1, default=False, action="store_const", help="Keep the player state in arrays indexed by dense player numbers (combines with --float32)",
+)
+cli.add_argument(
+    "--history", dest="history", default="inspected", help='Whose rating history to record: "all", "none", "inspected" (players_to_inspect.ini), a sample rate like "0.01", or a combination like "inspected+0.01"',
+)
+cli.add_argument(
+    "--compact-history", dest="compact_history", const=1, default=False, action="store_const", help="Keep each player's rating history in delta encoded arrays instead of a list of entries",
+)
+cli.add_argument(
+    "--checkpoint", dest="checkpoint", default=None, help="Checkpoint and journal the rating state to this file, continuing from it if it exists (the tally only covers the new games)",
+)
+cli.add_argument(
+    "--checkpoint-every", dest="checkpoint_every", type=int, default=1000000, help="Games between checkpoints",
+)
+cli.add_argument(
+    "--save-ratings", dest="save_ratings", default=None, help="Write the final ratings to this file, to be shared read-only through MappedStorage",
+)
 
 # Run
 config(cli.parse_args(), "glicko2-one-game-at-a-time")
 game_data = GameData()
-storage = InMemoryStorage(Glicko2Entry)
-engine = OneGameAtATime(storage)
+if config.args.checkpoint:
+    storage = JournalingStorage(config.args.checkpoint, Glicko2Entry, compact_history=config.args.compact_history)
+elif config.args.storage_file:
+    storage = SQLiteStorage(config.args.storage_file, Glicko2Entry)
+elif config.args.dense:
+    storage = DenseStorage(Glicko2Entry, np.float32 if config.args.float32 else np.float64)
+elif config.args.float32:
+    storage = Glicko2TableStorage(np.float32)
+else:
+    storage = InMemoryStorage(Glicko2Entry)
+storage.history_policy = HistoryPolicy.from_spec(config.args.history)
+storage.compact_history = config.args.compact_history
+engine = Glicko2OneGameAtATime(storage, record_history=config.args.history != "none")
 tally = TallyGameAnalytics(storage)
 
-for game in game_data:
-    analytics = engine.process_game(game)
-    tally.add_glicko2_analytics(analytics)
+# both keep the last rated game, so a run on an existing file picks up after it
+resumable = config.args.checkpoint or config.args.storage_file
+games_since_checkpoint = 0
+if config.args.waves:
+    for batch in storage.unprocessed_batches(game_data) if resumable else game_data.batches():
+        for analytics in engine.process_batch(batch).analytics:
+            tally.add_glicko2_analytics(analytics)
+        if resumable:
+            storage.game_done(batch[-1])
+        if config.args.checkpoint:
+            games_since_checkpoint += len(batch)
+            if games_since_checkpoint >= config.args.checkpoint_every:
+                storage.checkpoint()
+                games_since_checkpoint = 0
+else:
+    for game in storage.unprocessed(game_data) if resumable else game_data:
+        analytics = engine.process_game(game)
+        tally.add_glicko2_analytics(analytics)
+        if resumable:
+            storage.game_done(game)
+        if config.args.checkpoint:
+            games_since_checkpoint += 1
+            if games_since_checkpoint >= config.args.checkpoint_every:
+                storage.checkpoint()
+                games_since_checkpoint = 0
 
 tally.print()
+if config.args.history != "none":
+    memory = storage.history_memory()
+    print(
+        "Rating history (%s): %d entries for %d players, ~%.1f MB   skipped: %d entries, ~%.1f MB"
+        % (
+            config.args.history,
+            memory["rating_entries"],
+            memory["rating_players"],
+            memory["rating_bytes"] / 1e6,
+            memory["skipped_rating_entries"],
+            memory["skipped_rating_bytes"] / 1e6,
+        )
+    )
+if config.args.save_ratings:
+    build_mapped_storage(storage, config.args.save_ratings)
+if config.args.checkpoint:
+    storage.checkpoint()
+if config.args.storage_file or config.args.checkpoint:
+    storage.close()
 
 self_reported_ratings = tally.get_self_reported_rating()
 if self_reported_ratings:
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from goratings.interfaces import AsyncStorage
+
+__all__ = ["AsyncInMemoryStorage"]
+
+
+class AsyncInMemoryStorage(AsyncStorage):
+    """
+    In-process `AsyncStorage` for tests and experiments. Every call counts as
+    one round trip and, if `latency` (in seconds) is given, sleeps that long
+    to mimic a database.
+    """
+
+    _data: Dict[int, Any]
+    _timeout_flags: Dict[int, bool]
+    latency: float
+    round_trips: int
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self._data = {}
+        self._timeout_flags = {}
+        self.latency = latency
+        self.round_trips = 0
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get_many(self, player_ids: Sequence[int]) -> List[Optional[Any]]:
+        await self._round_trip()
+        return [self._data.get(player_id) for player_id in player_ids]
+
+    async def set_many(self, player_ids: Sequence[int], entries: Sequence[Any]) -> None:
+        await self._round_trip()
+        self._data.update(zip(player_ids, entries))
+
+    async def get_timeout_flags(self, player_ids: Sequence[int]) -> List[bool]:
+        await self._round_trip()
+        return [self._timeout_flags.get(player_id, False) for player_id in player_ids]
+
+    async def set_timeout_flags(self, player_ids: Sequence[int], flags: Sequence[bool]) -> None:
+        await self._round_trip()
+        self._timeout_flags.update(zip(player_ids, flags))
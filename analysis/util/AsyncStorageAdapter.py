@@ -0,0 +1,132 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, AsyncIterator, DefaultDict, Dict, Iterable, List, Set
+
+from goratings.interfaces import AsyncStorage, BatchAnalytics, GameRecord, RatingSystem, Storage
+
+__all__ = ["AsyncStorageAdapter"]
+
+
+class AsyncStorageAdapter(Storage):
+    """
+    Lets the synchronous rating engines run against an `AsyncStorage`.
+
+    Before a batch of games is processed, `prefetch` loads the entries and
+    timeout flags of all players in it with two concurrent bulk reads. The
+    engine then works on this local copy through the normal `Storage` calls,
+    and `flush` writes everything it changed back with two concurrent bulk
+    writes. Loaded players stay cached until `retain` or `clear` drops them,
+    so only players that are not cached are fetched; this assumes a single
+    writer per player, i.e. one ingestion worker per shard.
+    `process_batches` keeps just the players of the next batch, so the cache
+    never holds more than two batches worth of players.
+
+    `peek` and `all_players` only see cached players, and set counts are
+    kept locally and not persisted.
+    """
+
+    _backend: AsyncStorage
+    _entries: Dict[int, Any]
+    _timeout_flags: Dict[int, bool]
+    _dirty_entries: Set[int]
+    _dirty_timeout_flags: Set[int]
+    _set_count: DefaultDict[int, int]
+    entry_type: Any
+
+    def __init__(self, backend: AsyncStorage, entry_type: type) -> None:
+        self._backend = backend
+        self._entries = {}
+        self._timeout_flags = {}
+        self._dirty_entries = set()
+        self._dirty_timeout_flags = set()
+        self._set_count = defaultdict(lambda: 0)
+        self.entry_type = entry_type
+
+    async def prefetch(self, player_ids: Iterable[int]) -> None:
+        missing = list({player_id for player_id in player_ids if player_id not in self._entries})
+        if not missing:
+            return
+        entries, flags = await asyncio.gather(self._backend.get_many(missing), self._backend.get_timeout_flags(missing))
+        for player_id, entry, flag in zip(missing, entries, flags):
+            self._entries[player_id] = self.entry_type() if entry is None else entry
+            self._timeout_flags[player_id] = flag
+
+    async def prefetch_games(self, games: Iterable[GameRecord]) -> None:
+        await self.prefetch(player_id for game in games for player_id in (game.black_id, game.white_id))
+
+    async def flush(self) -> None:
+        entry_ids = list(self._dirty_entries)
+        flag_ids = list(self._dirty_timeout_flags)
+        self._dirty_entries = set()
+        self._dirty_timeout_flags = set()
+        writes = []
+        if entry_ids:
+            writes.append(self._backend.set_many(entry_ids, [self._entries[player_id] for player_id in entry_ids]))
+        if flag_ids:
+            writes.append(
+                self._backend.set_timeout_flags(flag_ids, [self._timeout_flags[player_id] for player_id in flag_ids])
+            )
+        await asyncio.gather(*writes)
+
+    def clear(self) -> None:
+        """ Drops the cached players, call after `flush` """
+        self.retain([])
+
+    def retain(self, player_ids: Iterable[int]) -> None:
+        """ Drops the cached players other than `player_ids`, call after `flush` """
+        assert not self._dirty_entries and not self._dirty_timeout_flags
+        keep = set(player_ids)
+        self._entries = {player_id: entry for player_id, entry in self._entries.items() if player_id in keep}
+        self._timeout_flags = {player_id: tf for player_id, tf in self._timeout_flags.items() if player_id in keep}
+
+    async def process_batches(
+        self, engine: RatingSystem, batches: Iterable[List[GameRecord]]
+    ) -> AsyncIterator[BatchAnalytics]:
+        """
+        Runs `engine.process_batch` over the batches, writing back the
+        results of each batch while the players of the next one are loaded.
+        Afterwards only the players of the next batch stay cached.
+        """
+        batches = iter(batches)
+        current = next(batches, None)
+        if current is None:
+            return
+        await self.prefetch_games(current)
+        while current is not None:
+            analytics = engine.process_batch(current)
+            upcoming = next(batches, None)
+            # players of the upcoming batch touched by this one are already cached,
+            # so loading the others can overlap with writing this batch back
+            await asyncio.gather(self.flush(), self.prefetch_games(upcoming or []))
+            self.retain(player_id for game in upcoming or [] for player_id in (game.black_id, game.white_id))
+            yield analytics
+            current = upcoming
+
+    def get(self, player_id: int) -> Any:
+        if player_id not in self._entries:
+            raise KeyError("Player %d was not prefetched" % player_id)
+        return self._entries[player_id]
+
+    def set(self, player_id: int, entry: Any) -> None:
+        self._entries[player_id] = entry
+        self._dirty_entries.add(player_id)
+        self._set_count[player_id] += 1
+
+    def peek(self, player_id: int) -> Any:
+        return self._entries.get(player_id)
+
+    def get_set_count(self, player_id: int) -> int:
+        return self._set_count[player_id]
+
+    def clear_set_count(self, player_id: int) -> None:
+        self._set_count[player_id] = 0
+
+    def all_players(self) -> Dict[int, Any]:
+        return self._entries
+
+    def get_timeout_flag(self, player_id: int) -> bool:
+        return self._timeout_flags.get(player_id, False)
+
+    def set_timeout_flag(self, player_id: int, tf: bool) -> None:
+        self._timeout_flags[player_id] = tf
+        self._dirty_timeout_flags.add(player_id)
@@ -0,0 +1,134 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from goratings.interfaces import GameBatch
+
+from .EntryCodec import EntryCodec
+from .InMemoryStorage import InMemoryStorage
+
+__all__ = ["save_checkpoint", "load_checkpoint", "restore_checkpoint"]
+
+_GAME_COLUMNS = (
+    "game_id",
+    "size",
+    "handicap",
+    "komi",
+    "black_id",
+    "white_id",
+    "time_per_move",
+    "timeout",
+    "winner_id",
+    "ended",
+    "black_manual_rank_update",
+    "white_manual_rank_update",
+)
+
+
+def save_checkpoint(storage: InMemoryStorage, filename: str, last_game_id: int = 0, last_ended: int = 0) -> None:
+    """
+    Writes the complete state of an `InMemoryStorage` to `filename` as NumPy
+    arrays (an uncompressed .npz file): entries, timeout flags, set counts,
+    rating and match histories, the lazy inflation state and the id and end
+    time of the last processed game. Match history items must be
+    `(GameRecord, entry)` pairs, as the windowed engines store them.
+
+    The file is written next to the target and renamed into place, so a crash
+    while saving leaves the previous checkpoint intact.
+    """
+    codec = EntryCodec(storage.entry_type)
+    arrays: Dict[str, Any] = {}
+
+    arrays["entry_ids"], arrays["entry_values"] = _encode_entries(codec, storage._data.items())
+    arrays["timeout_ids"] = np.array([k for k, v in storage._timeout_flags.items() if v], dtype=np.int64)
+    arrays["set_count_ids"] = np.array(list(storage._set_count.keys()), dtype=np.int64)
+    arrays["set_counts"] = np.array(list(storage._set_count.values()), dtype=np.int64)
+    arrays["last_active_ids"] = np.array(list(storage._last_active_period.keys()), dtype=np.int64)
+    arrays["last_active_periods"] = np.array(list(storage._last_active_period.values()), dtype=np.int64)
+    arrays["state"] = np.array(
+        [storage._current_period, storage.inflation_period, last_game_id, last_ended], dtype=np.int64
+    )
+
+    rating_history = [(p, t, e) for p, items in storage._rating_history.items() for t, e in items]
+    arrays["rating_history_ids"] = np.array([p for p, _t, _e in rating_history], dtype=np.int64)
+    arrays["rating_history_timestamps"] = np.array([t for _p, t, _e in rating_history], dtype=np.int64)
+    arrays["rating_history_values"] = _encode_values(codec, [e for _p, _t, e in rating_history])
+
+    match_history = [(p, t, m) for p, items in storage._match_history.items() for t, m in items]
+    arrays["match_history_ids"] = np.array([p for p, _t, _m in match_history], dtype=np.int64)
+    arrays["match_history_timestamps"] = np.array([t for _p, t, _m in match_history], dtype=np.int64)
+    arrays["match_history_values"] = _encode_values(codec, [m[1] for _p, _t, m in match_history])
+    games = GameBatch.from_records([m[0] for _p, _t, m in match_history])
+    for column in _GAME_COLUMNS:
+        arrays["match_history_" + column] = getattr(games, column)
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def load_checkpoint(filename: str, entry_type: type) -> Tuple[InMemoryStorage, int, int]:
+    """ Reads a checkpoint, returns `(storage, last_game_id, last_ended)` """
+    with np.load(filename) as arrays:
+        storage = InMemoryStorage(entry_type, inflation_period=int(arrays["state"][1]))
+        last_game_id, last_ended = _restore(storage, filename, arrays)
+    return storage, last_game_id, last_ended
+
+
+def restore_checkpoint(storage: InMemoryStorage, filename: str) -> Tuple[int, int]:
+    """
+    Reads a checkpoint into `storage`, which must be empty and use the
+    inflation period the checkpoint was written with. The storage keeps its
+    own settings, e.g. `compact_history`. Returns `(last_game_id, last_ended)`.
+    """
+    with np.load(filename) as arrays:
+        return _restore(storage, filename, arrays)
+
+
+def _restore(storage: InMemoryStorage, filename: str, arrays: Any) -> Tuple[int, int]:
+    # InMemoryStorage methods are called directly, so subclasses such as
+    # JournalingStorage don't record the restored state again
+    codec = EntryCodec(storage.entry_type)
+    current_period, inflation_period, last_game_id, last_ended = arrays["state"].tolist()
+    if inflation_period != storage.inflation_period:
+        raise ValueError("Checkpoint %s was written with inflation_period=%d" % (filename, inflation_period))
+    storage._current_period = current_period
+
+    for player_id, values in zip(arrays["entry_ids"].tolist(), arrays["entry_values"].tolist()):
+        storage._data[player_id] = codec.decode(values)
+    for player_id in arrays["timeout_ids"].tolist():
+        storage._timeout_flags[player_id] = True
+    storage._set_count.update(zip(arrays["set_count_ids"].tolist(), arrays["set_counts"].tolist()))
+    storage._last_active_period.update(zip(arrays["last_active_ids"].tolist(), arrays["last_active_periods"].tolist()))
+
+    for player_id, timestamp, values in zip(
+        arrays["rating_history_ids"].tolist(),
+        arrays["rating_history_timestamps"].tolist(),
+        arrays["rating_history_values"].tolist(),
+    ):
+        InMemoryStorage.add_rating_history(storage, player_id, timestamp, codec.decode(values))
+
+    games = GameBatch(*(arrays["match_history_" + column] for column in _GAME_COLUMNS))
+    for i, (player_id, timestamp, values) in enumerate(
+        zip(
+            arrays["match_history_ids"].tolist(),
+            arrays["match_history_timestamps"].tolist(),
+            arrays["match_history_values"].tolist(),
+        )
+    ):
+        InMemoryStorage.add_match_history(storage, player_id, timestamp, (games.record(i), codec.decode(values)))
+
+    return last_game_id, last_ended
+
+
+def _encode_values(codec: EntryCodec, entries: List[Any]) -> np.ndarray:
+    return np.array([codec.encode(e) for e in entries], dtype=np.float64).reshape(-1, len(codec.fields))
+
+
+def _encode_entries(codec: EntryCodec, items: Any) -> Tuple[np.ndarray, np.ndarray]:
+    items = list(items)
+    return np.array([k for k, _v in items], dtype=np.int64), _encode_values(codec, [v for _k, v in items])
@@ -2,7 +2,7 @@ import os
 import sqlite3
 import sys
 from time import time
-from typing import Iterator
+from typing import Any, Iterator, List
 
 from goratings.interfaces import GameRecord
 
@@ -81,6 +81,92 @@ class EGFGameData:
             sys.stdout.flush()
         c.close()
 
+    def tournaments(self, by_round: bool = False) -> Iterator[List[GameRecord]]:
+        """
+        Yields the games grouped by tournament (or by tournament round if
+        `by_round` is set), in the order the tournaments ended, for rating
+        with `gor_tournament_update`. Databases built before the tournament
+        columns were added to make_egf_db.py are grouped by game date instead.
+        """
+        c = self._conn.cursor()
+        limit = config.args.num_games or 99999999999
+        columns = [row[1] for row in c.execute("PRAGMA table_info(game_records)")]
+
+        if "tournament_code" in columns:
+            query = """
+                SELECT
+                    g.id,
+                    19,
+                    g.handicap,
+                    0,
+                    g.black_id,
+                    g.white_id,
+                    60,
+                    FALSE,
+                    g.winner_id,
+                    g.ended,
+                    g.black_manual_rank_update,
+                    g.white_manual_rank_update,
+                    g.tournament_code,
+                    g.round
+                FROM
+                    game_records AS g
+                    INNER JOIN (
+                        SELECT tournament_code, MAX(ended) AS tournament_ended
+                        FROM game_records
+                        GROUP BY tournament_code
+                    ) AS t ON t.tournament_code = g.tournament_code
+                ORDER BY t.tournament_ended, g.tournament_code, g.round, g.id
+                LIMIT
+                    ?
+            """
+        else:
+            query = """
+                SELECT
+                    id,
+                    19,
+                    handicap,
+                    0,
+                    black_id,
+                    white_id,
+                    60,
+                    FALSE,
+                    winner_id,
+                    ended,
+                    black_manual_rank_update,
+                    white_manual_rank_update,
+                    ended,
+                    0
+                FROM
+                    game_records ORDER BY ended, id
+                LIMIT
+                    ?
+            """
+
+        batch: List[GameRecord] = []
+        last_key: Any = None
+        ct = 0
+        started = time()
+        for row in c.execute(query, [limit]):
+            key = (row[12], row[13]) if by_round else row[12]
+            if batch and key != last_key:
+                yield batch
+                batch = []
+            last_key = key
+            ct += 1
+            batch.append(
+                GameRecord(
+                    row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9], row[10], row[11],
+                )
+            )
+        if batch:
+            yield batch
+
+        if not self.quiet:
+            time_elapsed = time() - started
+            sys.stdout.write(f"\n{ct:n} games processed in {time_elapsed:.1f} seconds\n")
+            sys.stdout.flush()
+        c.close()
 
     def last_game_played(self, player_id: int) -> float:
         c = self._conn.cursor()
@@ -0,0 +1,27 @@
+from inspect import signature
+from typing import Any, Sequence, Tuple
+
+__all__ = ["EntryCodec"]
+
+
+class EntryCodec:
+    """
+    Converts rating entries to and from flat tuples of numbers for the
+    persistent storages. The fields are the constructor arguments of the
+    entry type, e.g. (rating, deviation, volatility) for `Glicko2Entry` and
+    (rating, handicap) for `GorEntry`, which are also attributes of the
+    entries.
+    """
+
+    entry_type: Any
+    fields: Tuple[str, ...]
+
+    def __init__(self, entry_type: type) -> None:
+        self.entry_type = entry_type
+        self.fields = tuple(signature(entry_type).parameters)
+
+    def encode(self, entry: Any) -> Tuple[float, ...]:
+        return tuple(getattr(entry, field) for field in self.fields)
+
+    def decode(self, values: Sequence[float]) -> Any:
+        return self.entry_type(*values)
@@ -1,5 +1,6 @@
 import sys
-from typing import Dict, Iterator
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
 
 from goratings.interfaces import GameRecord
 
@@ -9,7 +10,7 @@ from .EGFGameData import EGFGameData
 from .AGAGameData import AGAGameData
 from .OGSGameData import OGSGameData
 
-__all__ = ["GameData", "datasets_used"]
+__all__ = ["GameData", "batched", "datasets_used", "games_after"]
 
 cli.add_argument(
     "--egf", dest="use_egf_data", const=1, default=False, action="store_const", help="Use EGF dataset",
@@ -78,6 +79,63 @@ class GameData:
             for entry in self.agadata:
                 yield entry
 
+    def tournaments(self, by_round: bool = False) -> Iterator[List[GameRecord]]:
+        """
+        Yields the games of the configured datasets like iterating does, but
+        the EGF games grouped by tournament (see `EGFGameData.tournaments`).
+        The other datasets have no tournaments, their games are yielded one
+        at a time.
+        """
+        data_to_use = datasets_used()
+
+        if data_to_use["ogs"]:
+            if not self.quiet:
+                sys.stdout.write("\nProcessing OGS data\n")
+            for entry in self.ogsdata:
+                yield [entry]
+
+        if data_to_use["egf"]:
+            if not self.quiet:
+                sys.stdout.write("\nProcessing EGF data\n")
+            yield from self.egfdata.tournaments(by_round=by_round)
+
+        if data_to_use["aga"]:
+            if not self.quiet:
+                sys.stdout.write("\nProcessing AGA data\n")
+            for entry in self.agadata:
+                yield [entry]
+
+    def batches(self, batch_size: int = 4096) -> Iterator[List[GameRecord]]:
+        """ Yields the games in order, in lists of up to `batch_size` games, for `RatingSystem.process_batch` """
+        return batched(self, batch_size)
+
+
+def batched(games: Iterable[GameRecord], batch_size: int = 4096) -> Iterator[List[GameRecord]]:
+    """ Yields `games` in order, in lists of up to `batch_size` games """
+    games = iter(games)
+    while True:
+        batch = list(islice(games, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def games_after(games: Iterable[GameRecord], last_game_id: int, last_ended: int) -> Iterator[GameRecord]:
+    """
+    Skips the games up to and including the game `last_game_id`, which ended
+    at `last_ended`, so a resumed run picks up where the last one stopped.
+    `games` must be ordered by end time.
+    """
+    games = iter(games)
+    if last_game_id:
+        for game in games:
+            if game.ended > last_ended:
+                yield game
+                break
+            if game.game_id == last_game_id:
+                break
+    yield from games
+
 
 def datasets_used() -> Dict[str, bool]:
     ret = {
@@ -0,0 +1,127 @@
+from typing import Any, Optional
+
+from goratings.interfaces import GameRecord, RatingSystem
+from goratings.math.glicko2 import Glicko2Entry, glicko2_update, glicko2_update_from_sums
+
+from .Glicko2Analytics import Glicko2Analytics
+from .Glicko2WindowSums import Glicko2WindowSums
+from .InMemoryStorage import InMemoryStorage
+from .RatingMath import get_handicap_adjustment, rank_to_rating, rating_to_rank
+
+__all__ = ["Glicko2DailyWindows"]
+
+
+class Glicko2DailyWindows(RatingSystem):
+    """
+    Glicko-2 with daily rating periods: each game rerates both players from
+    their last rating before the day against all their games of the day, see
+    analyze_glicko2_daily_windows.py. The storage must keep match and rating
+    histories (an InMemoryStorage). With `full_recompute` the games of the
+    day are read back from the match history for every game, the reference
+    the running `Glicko2WindowSums` are checked against.
+    """
+
+    WINDOW = 86400
+
+    _storage: InMemoryStorage
+    _sums: Optional[Glicko2WindowSums]
+
+    def __init__(self, storage: InMemoryStorage, full_recompute: bool = False) -> None:
+        self._storage = storage
+        self._sums = None if full_recompute else Glicko2WindowSums()
+
+    def _add_match(self, player_id: int, window: int, base: Glicko2Entry, past_game: GameRecord, opponent: Any) -> None:
+        assert self._sums is not None
+        self._sums.add(
+            player_id,
+            window,
+            base,
+            opponent.copy(
+                (1 if past_game.black_id != player_id else -1)
+                * get_handicap_adjustment(opponent.rating, past_game.handicap)
+            ),
+            past_game.winner_id == player_id,
+        )
+
+    def process_game(self, game: GameRecord) -> Glicko2Analytics:
+        if game.black_manual_rank_update is not None:
+            self._storage.set(game.black_id, Glicko2Entry(rank_to_rating(game.black_manual_rank_update)))
+
+        if game.white_manual_rank_update is not None:
+            self._storage.set(game.white_id, Glicko2Entry(rank_to_rating(game.white_manual_rank_update)))
+
+        # Only count the first timeout in correspondence games as a ranked loss
+        if game.timeout and game.speed == 3:  # correspondence timeout
+            player_that_timed_out = game.black_id if game.black_id != game.winner_id else game.white_id
+            skip = self._storage.get_timeout_flag(game.black_id) or self._storage.get_timeout_flag(game.white_id)
+            self._storage.set_timeout_flag(player_that_timed_out, True)
+            if skip:
+                return Glicko2Analytics(skipped=True, game=game)
+        if game.speed == 3:  # clear corr. timeout flags
+            self._storage.set_timeout_flag(game.black_id, True)
+            self._storage.set_timeout_flag(game.white_id, True)
+
+        window = (int(game.ended) // self.WINDOW) * self.WINDOW
+        black_base = self._storage.get_first_rating_older_than(game.black_id, window)
+        white_base = self._storage.get_first_rating_older_than(game.white_id, window)
+        black_cur = self._storage.get(game.black_id)
+        white_cur = self._storage.get(game.white_id)
+
+        self._storage.add_match_history(game.black_id, game.ended, (game, white_cur))
+        self._storage.add_match_history(game.white_id, game.ended, (game, black_cur))
+
+        if self._sums is None:
+            updated_black = glicko2_update(
+                black_base,
+                [
+                    (
+                        opponent.copy(
+                            (1 if past_game.black_id != game.black_id else -1)
+                            * get_handicap_adjustment(opponent.rating, past_game.handicap)
+                        ),
+                        past_game.winner_id == game.black_id,
+                    )
+                    for past_game, opponent in self._storage.get_matches_newer_or_equal_to(game.black_id, window)
+                ],
+            )
+
+            updated_white = glicko2_update(
+                white_base,
+                [
+                    (
+                        opponent.copy(
+                            (1 if past_game.black_id != game.white_id else -1)
+                            * get_handicap_adjustment(opponent.rating, past_game.handicap)
+                        ),
+                        past_game.winner_id == game.white_id,
+                    )
+                    for past_game, opponent in self._storage.get_matches_newer_or_equal_to(game.white_id, window)
+                ],
+            )
+        else:
+            # same terms, in the same order, as the match history lists above
+            self._add_match(game.black_id, window, black_base, game, white_cur)
+            self._add_match(game.white_id, window, white_base, game, black_cur)
+            updated_black = glicko2_update_from_sums(black_base, *self._sums.get(game.black_id))
+            updated_white = glicko2_update_from_sums(white_base, *self._sums.get(game.white_id))
+
+        self._storage.set(game.black_id, updated_black)
+        self._storage.set(game.white_id, updated_white)
+        self._storage.add_rating_history(game.black_id, game.ended, updated_black)
+        self._storage.add_rating_history(game.white_id, game.ended, updated_white)
+
+        return Glicko2Analytics(
+            skipped=False,
+            game=game,
+            expected_win_rate=black_cur.expected_win_probability(
+                white_cur, get_handicap_adjustment(black_cur.rating, game.handicap), ignore_g=True
+            ),
+            black_rating=black_cur.rating,
+            white_rating=white_cur.rating,
+            black_deviation=black_cur.deviation,
+            white_deviation=white_cur.deviation,
+            black_rank=rating_to_rank(black_cur.rating),
+            white_rank=rating_to_rank(white_cur.rating),
+            black_updated_rating=updated_black.rating,
+            white_updated_rating=updated_white.rating,
+        )
@@ -0,0 +1,179 @@
+from typing import Any, Optional, Tuple
+
+from goratings.interfaces import GameRecord, RatingSystem
+from goratings.math.glicko2 import Glicko2Entry, glicko2_update, glicko2_update_from_sums
+
+from .Glicko2Analytics import Glicko2Analytics
+from .Glicko2WindowSums import Glicko2WindowSums
+from .InMemoryStorage import InMemoryStorage
+from .RatingMath import get_handicap_adjustment, rating_to_rank
+
+__all__ = ["Glicko2GlickmanWeeklyWindow"]
+
+
+class Glicko2GlickmanWeeklyWindow(RatingSystem):
+    """
+    Glicko-2 with weekly rating periods as Glickman describes them: each game
+    rerates both players from their last rating before the week, with the
+    deviation expanded for the weeks since that rating, against all their
+    games of the week, see analyze_glicko2_glickman_weekly_window.py.
+
+    With `full_recompute` the games of the week are read back from the match
+    history for every game, the reference the running `Glicko2WindowSums`
+    are checked against. With `lazy_inflation` the storage must be an
+    InMemoryStorage with an `inflation_period` of `WINDOW`, it then expands
+    the base ratings for the whole weeks a player sat out and the engine for
+    the rest of the weeks since the base rating (at most one), so the
+    ratings come out the same as without it. Only the current entries the
+    storage hands out are inflated as well.
+
+    Subclasses adjust the result with `_current` and `_limit`.
+    """
+
+    WINDOW = 7 * 24 * 60 * 60
+    NO_GAMES_WINDOW = WINDOW
+
+    _storage: InMemoryStorage
+    _sums: Optional[Glicko2WindowSums]
+    _lazy_inflation: bool
+
+    def __init__(self, storage: InMemoryStorage, full_recompute: bool = False, lazy_inflation: bool = False) -> None:
+        self._storage = storage
+        self._sums = None if full_recompute else Glicko2WindowSums()
+        self._lazy_inflation = lazy_inflation
+
+    def _add_match(self, player_id: int, window: int, base: Glicko2Entry, past_game: GameRecord, opponent: Any) -> None:
+        # The full recomputation counts a game of the window as won if the
+        # color the player has in the *current* game won it, so sums for both
+        # colors are kept.
+        assert self._sums is not None
+        opponent = opponent.copy(
+            (1 if past_game.black_id != player_id else -1)
+            * get_handicap_adjustment(opponent.rating, past_game.handicap)
+        )
+        self._sums.add((player_id, "black"), window, base, opponent, past_game.winner_id == past_game.black_id)
+        self._sums.add((player_id, "white"), window, base, opponent, past_game.winner_id == past_game.white_id)
+
+    def _periods_to_expand(self, game: GameRecord, window: int, base_time: int) -> int:
+        periods = int((game.ended - base_time) / self.NO_GAMES_WINDOW)
+        if self._lazy_inflation:
+            # the storage has already expanded the base rating for the whole windows between the base rating's
+            # window and the current one
+            periods -= max(0, window // self.WINDOW - int(base_time) // self.WINDOW - 1)
+        return periods
+
+    def _current(
+        self, game: GameRecord, black_base: Glicko2Entry, white_base: Glicko2Entry
+    ) -> Tuple[Glicko2Entry, Glicko2Entry]:
+        """ The ratings the analytics report as the players' ratings before the game """
+        return black_base.copy(), white_base.copy()
+
+    def _limit(
+        self,
+        game: GameRecord,
+        window: int,
+        black_base: Glicko2Entry,
+        white_base: Glicko2Entry,
+        black_cur: Glicko2Entry,
+        white_cur: Glicko2Entry,
+        updated_black: Glicko2Entry,
+        updated_white: Glicko2Entry,
+    ) -> Tuple[Glicko2Entry, Glicko2Entry]:
+        """ Adjusts the updated ratings before they are stored """
+        return updated_black, updated_white
+
+    def process_game(self, game: GameRecord) -> Glicko2Analytics:
+        # Only count the first timeout in correspondence games as a ranked loss
+        if game.timeout and game.speed == 3:  # correspondence timeout
+            player_that_timed_out = game.black_id if game.black_id != game.winner_id else game.white_id
+            skip = self._storage.get_timeout_flag(game.black_id) or self._storage.get_timeout_flag(game.white_id)
+            self._storage.set_timeout_flag(player_that_timed_out, True)
+            if skip:
+                return Glicko2Analytics(skipped=True, game=game)
+        if game.speed == 3:  # clear corr. timeout flags
+            self._storage.set_timeout_flag(game.black_id, True)
+            self._storage.set_timeout_flag(game.white_id, True)
+
+        # read base rating (last rating before the current rating period)
+        window = (int(game.ended) // self.WINDOW) * self.WINDOW
+        if self._lazy_inflation:
+            self._storage.set_time(game.ended)
+        black_base = self._storage.get_first_rating_older_than(game.black_id, window).copy()
+        white_base = self._storage.get_first_rating_older_than(game.white_id, window).copy()
+
+        # since we do not update deviation in periods without games, we have to do update it now if there are empty
+        # periods since the base rating was calculated
+        black_base_time = self._storage.get_first_timestamp_older_than(game.black_id, window)
+        white_base_time = self._storage.get_first_timestamp_older_than(game.white_id, window)
+
+        if black_base_time is not None:
+            black_base.expand_deviation_because_no_games_played(self._periods_to_expand(game, window, black_base_time))
+        if white_base_time is not None:
+            white_base.expand_deviation_because_no_games_played(self._periods_to_expand(game, window, white_base_time))
+
+        black_cur, white_cur = self._current(game, black_base, white_base)
+
+        # store games in the match history
+        self._storage.add_match_history(game.black_id, game.ended, (game, white_base))
+        self._storage.add_match_history(game.white_id, game.ended, (game, black_base))
+
+        # update ratings
+        if self._sums is None:
+            updated_black = glicko2_update(
+                black_base,
+                [
+                    (
+                        opponent.copy(
+                            (1 if past_game.black_id != game.black_id else -1)
+                            * get_handicap_adjustment(opponent.rating, past_game.handicap)
+                        ),
+                        past_game.winner_id == past_game.black_id,
+                    )
+                    for past_game, opponent in self._storage.get_matches_newer_or_equal_to(game.black_id, window)
+                ],
+            )
+
+            updated_white = glicko2_update(
+                white_base,
+                [
+                    (
+                        opponent.copy(
+                            (1 if past_game.black_id != game.white_id else -1)
+                            * get_handicap_adjustment(opponent.rating, past_game.handicap)
+                        ),
+                        past_game.winner_id == past_game.white_id,
+                    )
+                    for past_game, opponent in self._storage.get_matches_newer_or_equal_to(game.white_id, window)
+                ],
+            )
+        else:
+            # same terms, in the same order, as the match history lists above
+            self._add_match(game.black_id, window, black_base, game, white_base)
+            self._add_match(game.white_id, window, white_base, game, black_base)
+            updated_black = glicko2_update_from_sums(black_base, *self._sums.get((game.black_id, "black")))
+            updated_white = glicko2_update_from_sums(white_base, *self._sums.get((game.white_id, "white")))
+
+        updated_black, updated_white = self._limit(
+            game, window, black_base, white_base, black_cur, white_cur, updated_black, updated_white
+        )
+
+        self._storage.set(game.black_id, updated_black)
+        self._storage.set(game.white_id, updated_white)
+        self._storage.add_rating_history(game.black_id, game.ended, updated_black)
+        self._storage.add_rating_history(game.white_id, game.ended, updated_white)
+
+        return Glicko2Analytics(
+            skipped=False,
+            game=game,
+            expected_win_rate=black_cur.expected_win_probability(
+                white_cur, get_handicap_adjustment(black_cur.rating, game.handicap), ignore_g=True
+            ),
+            black_rating=black_cur.rating,
+            white_rating=white_cur.rating,
+            black_deviation=black_cur.deviation,
+            white_deviation=white_cur.deviation,
+            black_rank=rating_to_rank(black_cur.rating),
+            white_rank=rating_to_rank(white_cur.rating),
+            black_updated_rating=updated_black.rating,
+            white_updated_rating=updated_white.rating,
+        )
@@ -0,0 +1,190 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from goratings.interfaces import BatchAnalytics, GameRecord, RatingSystem, Storage
+from goratings.math.glicko2 import (
+    GLICKO2_SCALE,
+    Glicko2Config,
+    Glicko2Entry,
+    glicko2_update_batch,
+    glicko2_update_pair,
+)
+
+from .Glicko2Analytics import Glicko2Analytics
+from .InMemoryStorage import InMemoryStorage
+from .RatingMath import get_handicap_adjustment, rank_to_rating, rating_to_rank
+from .WaveScheduler import game_waves
+
+__all__ = ["Glicko2OneGameAtATime"]
+
+
+class Glicko2OneGameAtATime(RatingSystem):
+    """ Glicko-2 with every game as its own rating period, see analyze_glicko2_one_game_at_a_time.py """
+
+    _storage: Storage
+    _glicko2_config: Optional[Glicko2Config]
+    _record_history: bool
+
+    def __init__(
+        self, storage: Storage, glicko2_config: Optional[Glicko2Config] = None, record_history: bool = False
+    ) -> None:
+        """ With `record_history` the storage must be an InMemoryStorage, see its `history_policy` """
+        self._storage = storage
+        self._glicko2_config = glicko2_config
+        self._record_history = record_history
+
+    def process_game(self, game: GameRecord) -> Glicko2Analytics:
+        if self._prepare_game(game):
+            return Glicko2Analytics(skipped=True, game=game)
+
+        return self._rate(game, self._storage.get(game.black_id), self._storage.get(game.white_id))
+
+    def process_wave(self, games: List[GameRecord]) -> List[Glicko2Analytics]:
+        """
+        Rates a wave of games that share no player (see `game_waves`) with a
+        single call to `glicko2_update_batch`. The entries of all players in
+        the wave are read with one `get_many` call. NumPy's exp and log can
+        differ from the math module's in the last bit, which can also make the
+        volatility iteration stop a step apart, so the ratings, deviations and
+        volatilities agree with `process_game` to a relative tolerance of 1e-7
+        (typically 1e-11 to 1e-9), not bit for bit.
+        """
+        skipped = [self._prepare_game(game) for game in games]
+        rated = [game for game, skip in zip(games, skipped) if not skip]
+        entries = self._storage.get_many([game.black_id for game in rated] + [game.white_id for game in rated])
+        n = len(rated)
+        blacks = entries[:n]
+        whites = [white.copy() if white is black else white for black, white in zip(blacks, entries[n:])]
+        analytics = [self._analytics(game, black, white) for game, black, white in zip(rated, blacks, whites)]
+
+        # lane i rates black of the i-th game against white, lane n + i white against black
+        black_handicap = [get_handicap_adjustment(black.rating, game.handicap) for game, black in zip(rated, blacks)]
+        white_handicap = [get_handicap_adjustment(white.rating, game.handicap) for game, white in zip(rated, whites)]
+        players = blacks + whites
+        mu, phi, volatility = glicko2_update_batch(
+            np.array([entry.mu for entry in players], dtype=np.float64),
+            np.array([entry.phi for entry in players], dtype=np.float64),
+            np.array([entry.volatility for entry in players], dtype=np.float64),
+            np.arange(2 * n + 1),
+            np.array(
+                [
+                    (white.rating - adjustment - 1500) / GLICKO2_SCALE
+                    for white, adjustment in zip(whites, white_handicap)
+                ]
+                + [
+                    (black.rating + adjustment - 1500) / GLICKO2_SCALE
+                    for black, adjustment in zip(blacks, black_handicap)
+                ],
+                dtype=np.float64,
+            ),
+            np.array([white.phi for white in whites] + [black.phi for black in blacks], dtype=np.float64),
+            np.array(
+                [game.winner_id == game.black_id for game in rated]
+                + [game.winner_id == game.white_id for game in rated],
+                dtype=np.float64,
+            ),
+            config=self._glicko2_config,
+        )
+
+        # the entries are updated in place, like glicko2_update_pair does in process_game
+        for entry, entry_mu, entry_phi, entry_volatility in zip(
+            players, mu.tolist(), phi.tolist(), volatility.tolist()
+        ):
+            entry.rating = GLICKO2_SCALE * entry_mu + 1500
+            entry.deviation = GLICKO2_SCALE * entry_phi
+            entry.volatility = entry_volatility
+            entry.mu = entry_mu
+            entry.phi = entry_phi
+
+        ret: List[Glicko2Analytics] = []
+        wave = iter(zip(rated, blacks, whites, analytics))
+        for game, skip in zip(games, skipped):
+            if skip:
+                ret.append(Glicko2Analytics(skipped=True, game=game))
+            else:
+                _game, black, white, game_analytics = next(wave)
+                self._store(game, black, white, game_analytics)
+                ret.append(game_analytics)
+        return ret
+
+    def process_batch(self, games: Iterable[GameRecord]) -> BatchAnalytics:
+        """ Rates the games wave by wave, see `process_wave` """
+        analytics: List[Glicko2Analytics] = []
+        for wave in game_waves(games):
+            analytics.extend(self.process_wave(wave))
+        return BatchAnalytics.from_analytics(analytics)
+
+    def _prepare_game(self, game: GameRecord) -> bool:
+        """ Applies manual rank updates and timeout flags, returns True if the game should be skipped """
+        if game.black_manual_rank_update is not None:
+            self._storage.set(game.black_id, Glicko2Entry(rank_to_rating(game.black_manual_rank_update)))
+
+        if game.white_manual_rank_update is not None:
+            self._storage.set(game.white_id, Glicko2Entry(rank_to_rating(game.white_manual_rank_update)))
+
+        # Only count the first timeout in correspondence games as a ranked loss
+        if game.timeout and game.speed == 3:  # correspondence timeout
+            player_that_timed_out = game.black_id if game.black_id != game.winner_id else game.white_id
+            other_player = game.black_id if game.black_id == game.winner_id else game.white_id
+            skip = self._storage.get_timeout_flag(game.black_id) or self._storage.get_timeout_flag(game.white_id)
+            self._storage.set_timeout_flag(player_that_timed_out, True)
+            self._storage.set_timeout_flag(other_player, False)
+            if skip:
+                return True
+        elif game.speed == 3:  # correspondence non timeout, clear flags for both
+            self._storage.set_timeout_flag(game.black_id, False)
+            self._storage.set_timeout_flag(game.white_id, False)
+
+        return False
+
+    def _rate(self, game: GameRecord, black: Glicko2Entry, white: Glicko2Entry) -> Glicko2Analytics:
+        if white is black:
+            white = black.copy()
+        analytics = self._analytics(game, black, white)
+
+        # black and white are updated in place, they are the entries held by the storage
+        glicko2_update_pair(
+            black,
+            white,
+            get_handicap_adjustment(black.rating, game.handicap),
+            get_handicap_adjustment(white.rating, game.handicap),
+            game.winner_id == game.black_id,
+            game.winner_id == game.white_id,
+            self._glicko2_config,
+        )
+
+        self._store(game, black, white, analytics)
+        return analytics
+
+    def _analytics(self, game: GameRecord, black: Glicko2Entry, white: Glicko2Entry) -> Glicko2Analytics:
+        return Glicko2Analytics(
+            skipped=False,
+            game=game,
+            expected_win_rate=black.expected_win_probability(
+                white, get_handicap_adjustment(black.rating, game.handicap), ignore_g=True
+            ),
+            black_rating=black.rating,
+            white_rating=white.rating,
+            black_deviation=black.deviation,
+            white_deviation=white.deviation,
+            black_rank=rating_to_rank(black.rating),
+            white_rank=rating_to_rank(white.rating),
+        )
+
+    def _store(
+        self, game: GameRecord, updated_black: Glicko2Entry, updated_white: Glicko2Entry, analytics: Glicko2Analytics
+    ) -> None:
+        self._storage.set(game.black_id, updated_black)
+        self._storage.set(game.white_id, updated_white)
+        if self._record_history:
+            assert isinstance(self._storage, InMemoryStorage)
+            # copies, the stored entries are updated in place by later games. Entries
+            # the history policy skips are only counted, so they needn't be copied.
+            for player_id, entry in ((game.black_id, updated_black), (game.white_id, updated_white)):
+                if self._storage.records_history(player_id):
+                    entry = entry.copy()
+                self._storage.add_rating_history(player_id, game.ended, entry)
+
+        analytics.black_updated_rating = updated_black.rating
+        analytics.white_updated_rating = updated_white.rating
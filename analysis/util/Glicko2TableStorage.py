@@ -0,0 +1,49 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from goratings.interfaces import Storage
+from goratings.math.glicko2 import Glicko2Entry
+
+from .Glicko2Table import Glicko2Table
+from .InMemoryStorage import InMemoryStorage
+
+__all__ = ["Glicko2TableStorage"]
+
+
+class Glicko2TableStorage(InMemoryStorage):
+    """
+    InMemoryStorage that keeps the Glicko-2 state of every player in a
+    `Glicko2Table` instead of one `Glicko2Entry` object per player. `get`
+    returns a fresh entry, so changes only take effect once they are `set`.
+    Pass `dtype=np.float32` for the compact mode, see `Glicko2Table` for the
+    precision this gives up.
+    """
+
+    table: Glicko2Table
+
+    def __init__(self, dtype: Any = np.float64) -> None:
+        super().__init__(Glicko2Entry)
+        self.table = Glicko2Table(dtype=dtype)
+
+    def get(self, player_id: int) -> Glicko2Entry:
+        return self.table.get(player_id)
+
+    def set(self, player_id: int, entry: Glicko2Entry) -> None:
+        self.table.set(player_id, entry)
+        self._set_count[player_id] += 1
+
+    # InMemoryStorage's bulk versions work on its entry dict, use the per-player ones instead
+    def get_many(self, player_ids: Iterable[int]) -> List[Any]:
+        return Storage.get_many(self, player_ids)
+
+    def set_many(self, player_ids: Iterable[int], entries: Iterable[Any]) -> None:
+        Storage.set_many(self, player_ids, entries)
+
+    def peek(self, player_id: int) -> Optional[Glicko2Entry]:
+        if player_id not in self.table:
+            return None
+        return self.table.get(player_id)
+
+    def all_players(self) -> Dict[int, Any]:
+        return {int(player_id): self.table.get(int(player_id)) for player_id in self.table.ids}
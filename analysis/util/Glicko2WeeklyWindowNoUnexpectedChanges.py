@@ -0,0 +1,52 @@
+from typing import Tuple
+
+from goratings.interfaces import GameRecord
+from goratings.math.glicko2 import Glicko2Entry
+
+from .Glicko2GlickmanWeeklyWindow import Glicko2GlickmanWeeklyWindow
+
+__all__ = ["Glicko2WeeklyWindowNoUnexpectedChanges"]
+
+
+class Glicko2WeeklyWindowNoUnexpectedChanges(Glicko2GlickmanWeeklyWindow):
+    """
+    The Glickman weekly window, but a player's rating never drops after a win
+    or rises after a loss, see
+    analyze_glicko2_weekly_window_no_unxepected_changes.py.
+    """
+
+    def _current(
+        self, game: GameRecord, black_base: Glicko2Entry, white_base: Glicko2Entry
+    ) -> Tuple[Glicko2Entry, Glicko2Entry]:
+        return self._storage.get(game.black_id).copy(), self._storage.get(game.white_id).copy()
+
+    def _limit(
+        self,
+        game: GameRecord,
+        window: int,
+        black_base: Glicko2Entry,
+        white_base: Glicko2Entry,
+        black_cur: Glicko2Entry,
+        white_cur: Glicko2Entry,
+        updated_black: Glicko2Entry,
+        updated_white: Glicko2Entry,
+    ) -> Tuple[Glicko2Entry, Glicko2Entry]:
+        # do not decrease rating if player won or increase if she lost
+        # users complain when their rating drops after they won a game, even if it is only by a few points. This
+        # happens regular since the deviation becomes lower with each game played in a period.
+        # Here we accept the rating system to be slightly less accurate for the sake of user experience. Since we use
+        # the base rating of both players when updating the ratings, this only affects future rating updates if this
+        # game happens to be the last game in the rating period of the affected player.
+        if (game.winner_id == game.black_id and updated_black.rating - black_cur.rating < 0) or (
+            game.winner_id != game.black_id and updated_black.rating - black_cur.rating > 0
+        ):
+            updated_black = Glicko2Entry(
+                rating=black_cur.rating, deviation=updated_black.deviation, volatility=updated_black.volatility
+            )
+        if (game.winner_id == game.white_id and updated_white.rating - white_cur.rating < 0) or (
+            game.winner_id != game.white_id and updated_white.rating - white_cur.rating > 0
+        ):
+            updated_white = Glicko2Entry(
+                rating=white_cur.rating, deviation=updated_white.deviation, volatility=updated_white.volatility
+            )
+        return updated_black, updated_white
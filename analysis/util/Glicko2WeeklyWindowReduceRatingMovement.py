@@ -0,0 +1,60 @@
+from typing import Tuple
+
+from goratings.interfaces import GameRecord
+from goratings.math.glicko2 import Glicko2Entry
+
+from .Glicko2GlickmanWeeklyWindow import Glicko2GlickmanWeeklyWindow
+
+__all__ = ["Glicko2WeeklyWindowReduceRatingMovement"]
+
+
+class Glicko2WeeklyWindowReduceRatingMovement(Glicko2GlickmanWeeklyWindow):
+    """
+    The Glickman weekly window, but early in a week a player's rating moves
+    at most `RATING_CHANGE_LIMIT` base deviations per game played in the
+    week, see analyze_glicko2_weekly_window_reduce_rating_movement.py.
+    """
+
+    RATING_CHANGE_LIMIT = 1.0
+
+    def _games_in_window(self, player_id: int, color: str, window: int) -> int:
+        if self._sums is None:
+            return len(self._storage.get_matches_newer_or_equal_to(player_id, window))
+        return self._sums.games((player_id, color))
+
+    def _limit(
+        self,
+        game: GameRecord,
+        window: int,
+        black_base: Glicko2Entry,
+        white_base: Glicko2Entry,
+        black_cur: Glicko2Entry,
+        white_cur: Glicko2Entry,
+        updated_black: Glicko2Entry,
+        updated_white: Glicko2Entry,
+    ) -> Tuple[Glicko2Entry, Glicko2Entry]:
+        # limit rating changes by base RD * num games
+        # glicko2 is desinged to update ratings based on full rating periods. There is a natural lower bound of the RD
+        # depending on the number of games in the period. If there are fewer games in a period the RD is higher which
+        # results in bigger changes per game.
+        # We calculate imemdiate ratings each time a game ends. So after a new rating period started the game pool is
+        # empty and we get a RD which can be much higher than the RD at the end of the last period, making the first
+        # rating update in a period way stronger than it should be. This will be corrected by later rating updates, but
+        # as we show this rating in UI and use it for match making, we see the over adjusted rating.
+        # Here we limit the change of the rating early in a period by the deviation of the base rating multiplied by the
+        # number of games played in the current periode. (This would be the maximum rating change if the updated
+        # deviation would be the base rating. With the player playing more games, this limit will affect the rating
+        # update less.)
+        black_limit = (
+            self.RATING_CHANGE_LIMIT * black_base.deviation * self._games_in_window(game.black_id, "black", window)
+        )
+        white_limit = (
+            self.RATING_CHANGE_LIMIT * white_base.deviation * self._games_in_window(game.white_id, "white", window)
+        )
+        updated_black.rating = min(
+            black_base.rating + black_limit, max(black_base.rating - black_limit, updated_black.rating)
+        )
+        updated_white.rating = min(
+            white_base.rating + white_limit, max(white_base.rating - white_limit, updated_white.rating)
+        )
+        return updated_black, updated_white
@@ -0,0 +1,46 @@
+from typing import Dict, Hashable, List, Tuple
+
+from goratings.math.glicko2 import Glicko2Entry, glicko2_match_terms
+
+__all__ = ["Glicko2WindowSums"]
+
+
+class Glicko2WindowSums:
+    """
+    Running Glicko-2 step 3 / 4 sums (see `glicko2_match_terms`) of every
+    player's games in their current rating window. The windowed engines used
+    to rebuild the full opponent list of the window for each new game, which
+    is O(k^2) for a player with k games in a window; with these sums each game
+    is O(1) and only steps 5 - 8 are redone (`glicko2_update_from_sums`).
+
+    Terms are added in the same order as the match history, so the sums are
+    bit for bit the ones `glicko2_update` computes from that history.
+    """
+
+    _sums: Dict[Hashable, List[float]]
+
+    def __init__(self) -> None:
+        self._sums = {}
+
+    def add(self, key: Hashable, window: int, player: Glicko2Entry, opponent: Glicko2Entry, outcome: float) -> None:
+        """
+        Adds a match of `player` (the base rating of the window) against
+        `opponent`. Sums from an earlier window are discarded first.
+        """
+        v_term, delta_term = glicko2_match_terms(player, opponent, outcome)
+        sums = self._sums.get(key)
+        if sums is None or sums[0] != window:
+            self._sums[key] = [window, v_term, delta_term, 1]
+        else:
+            sums[1] += v_term
+            sums[2] += delta_term
+            sums[3] += 1
+
+    def get(self, key: Hashable) -> Tuple[float, float]:
+        """ Returns `(v_sum, delta_sum)` of the current window """
+        sums = self._sums[key]
+        return sums[1], sums[2]
+
+    def games(self, key: Hashable) -> int:
+        """ Number of games in the current window """
+        return int(self._sums[key][3])
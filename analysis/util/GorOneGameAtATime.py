@@ -0,0 +1,176 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from goratings.interfaces import BatchAnalytics, GameRecord, RatingSystem, Storage
+from goratings.math.gor import GorEntry, gor_tournament_update, gor_update, gor_update_batch
+
+from .GorAnalytics import GorAnalytics
+from .RatingMath import get_handicap_adjustment, rank_to_rating, rating_to_rank
+from .WaveScheduler import game_waves
+
+__all__ = ["GorOneGameAtATime"]
+
+
+class GorOneGameAtATime(RatingSystem):
+    """ The EGF rating system (GoR), one game at a time, see analyze_gor.py """
+
+    _storage: Storage
+
+    def __init__(self, storage: Storage) -> None:
+        self._storage = storage
+
+    def process_game(self, game: GameRecord) -> GorAnalytics:
+        if self._prepare_game(game):
+            return GorAnalytics(skipped=True, game=game)
+
+        black = self._storage.get(game.black_id)
+        white = self._storage.get(game.white_id)
+
+        updated_black = gor_update(
+            black.with_handicap(get_handicap_adjustment(black.rating, game.handicap)),
+            white,
+            1 if game.winner_id == game.black_id else 0,
+        )
+
+        updated_white = gor_update(
+            white,
+            black.with_handicap(get_handicap_adjustment(black.rating, game.handicap)),
+            1 if game.winner_id == game.white_id else 0,
+        )
+
+        return self._store(game, black, white, updated_black, updated_white)
+
+    def process_wave(self, games: List[GameRecord]) -> List[GorAnalytics]:
+        """
+        Rates a wave of games that share no player (see `game_waves`) with a
+        single call to `gor_update_batch`.
+        """
+        skipped: List[bool] = []
+        rated: List[Tuple[GameRecord, GorEntry, GorEntry]] = []
+        for game in games:
+            skipped.append(self._prepare_game(game))
+            if not skipped[-1]:
+                rated.append((game, self._storage.get(game.black_id), self._storage.get(game.white_id)))
+
+        # lane 2 * i rates black against white, lane 2 * i + 1 white against black
+        n = 2 * len(rated)
+        rating = np.empty(n)
+        handicap = np.zeros(n)
+        opponent_rating = np.empty(n)
+        opponent_handicap = np.zeros(n)
+        outcome = np.empty(n)
+        for i, (game, black, white) in enumerate(rated):
+            black_handicap = get_handicap_adjustment(black.rating, game.handicap)
+            rating[2 * i], handicap[2 * i], opponent_rating[2 * i] = black.rating, black_handicap, white.rating
+            rating[2 * i + 1], opponent_rating[2 * i + 1] = white.rating, black.rating
+            opponent_handicap[2 * i + 1] = black_handicap
+            outcome[2 * i] = game.winner_id == game.black_id
+            outcome[2 * i + 1] = game.winner_id == game.white_id
+
+        updated = gor_update_batch(rating, handicap, opponent_rating, opponent_handicap, outcome).tolist()
+
+        ret: List[GorAnalytics] = []
+        lanes = iter(enumerate(rated))
+        for game, skip in zip(games, skipped):
+            if skip:
+                ret.append(GorAnalytics(skipped=True, game=game))
+                continue
+            i, (_game, black, white) = next(lanes)
+            ret.append(self._store(game, black, white, GorEntry(updated[2 * i]), GorEntry(updated[2 * i + 1])))
+
+        return ret
+
+    def process_tournaments(self, tournaments: List[List[GameRecord]]) -> List[GorAnalytics]:
+        """
+        Rates the games of one or more tournaments that share no player (see
+        `tournament_waves`) against the pre-tournament ratings with a single
+        call to `gor_tournament_update`.
+        """
+        games = [game for tournament in tournaments for game in tournament]
+        skipped = [self._prepare_game(game) for game in games]
+
+        index: Dict[int, int] = {}
+        entries: List[GorEntry] = []
+        for game, skip in zip(games, skipped):
+            if skip:
+                continue
+            for player_id in (game.black_id, game.white_id):
+                if player_id not in index:
+                    index[player_id] = len(entries)
+                    entries.append(self._storage.get(player_id))
+
+        rated = [game for game, skip in zip(games, skipped) if not skip]
+        rating = np.array([entry.rating for entry in entries], dtype=np.float64)
+        black = np.array([index[game.black_id] for game in rated], dtype=np.intp)
+        white = np.array([index[game.white_id] for game in rated], dtype=np.intp)
+        black_handicap = np.array(
+            [get_handicap_adjustment(entries[index[game.black_id]].rating, game.handicap) for game in rated],
+            dtype=np.float64,
+        )
+        black_outcome = np.array([game.winner_id == game.black_id for game in rated], dtype=np.float64)
+        updated = gor_tournament_update(rating, black, white, black_handicap, black_outcome).tolist()
+
+        ret: List[GorAnalytics] = []
+        for game, skip in zip(games, skipped):
+            if skip:
+                ret.append(GorAnalytics(skipped=True, game=game))
+                continue
+            b = index[game.black_id]
+            w = index[game.white_id]
+            ret.append(self._store(game, entries[b], entries[w], GorEntry(updated[b]), GorEntry(updated[w])))
+
+        return ret
+
+    def process_batch(self, games: Iterable[GameRecord]) -> BatchAnalytics:
+        """ Rates the games wave by wave, see `process_wave` """
+        analytics: List[GorAnalytics] = []
+        for wave in game_waves(games):
+            analytics.extend(self.process_wave(wave))
+        return BatchAnalytics.from_analytics(analytics)
+
+    def _prepare_game(self, game: GameRecord) -> bool:
+        """ Applies manual rank updates and timeout flags, returns True if the game should be skipped """
+        if game.black_manual_rank_update is not None:
+            self._storage.clear_set_count(game.black_id)
+            self._storage.set(game.black_id, GorEntry(rank_to_rating(game.black_manual_rank_update)))
+
+        if game.white_manual_rank_update is not None:
+            self._storage.clear_set_count(game.white_id)
+            self._storage.set(game.white_id, GorEntry(rank_to_rating(game.white_manual_rank_update)))
+
+        # Only count the first timeout in correspondence games as a ranked loss
+        if game.timeout and game.speed == 3:  # correspondence timeout
+            player_that_timed_out = game.black_id if game.black_id != game.winner_id else game.white_id
+            skip = self._storage.get_timeout_flag(game.black_id) or self._storage.get_timeout_flag(game.white_id)
+            self._storage.set_timeout_flag(player_that_timed_out, True)
+            if skip:
+                return True
+        if game.speed == 3:  # clear corr. timeout flags
+            self._storage.set_timeout_flag(game.black_id, True)
+            self._storage.set_timeout_flag(game.white_id, True)
+
+        return False
+
+    def _store(
+        self, game: GameRecord, black: GorEntry, white: GorEntry, updated_black: GorEntry, updated_white: GorEntry
+    ) -> GorAnalytics:
+        self._storage.set(game.black_id, updated_black)
+        self._storage.set(game.white_id, updated_white)
+
+        black_games_played = self._storage.get_set_count(game.black_id)
+        white_games_played = self._storage.get_set_count(game.white_id)
+
+        return GorAnalytics(
+            skipped=False,
+            game=game,
+            expected_win_rate=black.with_handicap(
+                get_handicap_adjustment(white.rating, game.handicap)
+            ).expected_win_probability(white),
+            black_rating=black.rating,
+            white_rating=white.rating,
+            black_rank=rating_to_rank(black.rating),
+            white_rank=rating_to_rank(white.rating),
+            black_games_played=black_games_played,
+            white_games_played=white_games_played,
+        )
@@ -0,0 +1,59 @@
+from typing import Iterable, Optional, Set
+
+from .InspectedPlayers import inspected_player_ids
+
+__all__ = ["HistoryPolicy"]
+
+
+class HistoryPolicy:
+    """
+    Decides whose rating history an `InMemoryStorage` records: everyone (the
+    default), the players in `player_ids`, and/or a deterministic sample of
+    about `sample_rate` of all players. The sample hashes the player id, so
+    the same players are picked in every run and process.
+
+    `InMemoryStorage.add_rating_history` counts the entries it skipped in
+    `skipped_entries`, see `InMemoryStorage.history_memory` for the memory
+    this saves.
+    """
+
+    player_ids: Optional[Set[int]]
+    sample_rate: float
+    skipped_entries: int
+    _threshold: int
+
+    def __init__(self, player_ids: Optional[Iterable[int]] = None, sample_rate: Optional[float] = None) -> None:
+        self.player_ids = None if player_ids is None else set(player_ids)
+        self.sample_rate = 0.0 if sample_rate is None else sample_rate
+        self.skipped_entries = 0
+        self._threshold = int(self.sample_rate * 2 ** 32)
+        if player_ids is None and sample_rate is None:
+            self._threshold = 2 ** 32
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "HistoryPolicy":
+        """
+        Builds a policy from a command line value: "all", "none", "inspected"
+        for the players in players_to_inspect.ini, a sample rate such as
+        "0.01", or several of these joined with "+", e.g. "inspected+0.01".
+        """
+        player_ids: Optional[Set[int]] = None
+        sample_rate: Optional[float] = None
+        for part in spec.split("+"):
+            if part == "all":
+                return cls()
+            elif part == "none":
+                player_ids = player_ids or set()
+            elif part == "inspected":
+                player_ids = (player_ids or set()) | inspected_player_ids()
+            else:
+                sample_rate = float(part)
+        if player_ids is None and sample_rate is None:
+            raise ValueError("Invalid history policy %r" % spec)
+        return cls(player_ids, sample_rate)
+
+    def records(self, player_id: int) -> bool:
+        if self.player_ids is not None and player_id in self.player_ids:
+            return True
+        # Fibonacci hashing spreads consecutive ids evenly
+        return (player_id * 2654435769) & 0xFFFFFFFF < self._threshold
@@ -0,0 +1,45 @@
+from typing import Optional
+
+__all__ = ["HistoryRetention"]
+
+
+class HistoryRetention:
+    """
+    Retention policy for the rating and match histories of an
+    `InMemoryStorage`, applied to a player's history whenever something is
+    appended to it.
+
+    With `window` (in seconds) the newest `windows` windows are kept, using
+    the same `(timestamp // window) * window` boundaries as the windowed
+    engines. With `max_age` (in seconds) everything newer than `max_age`
+    before the appended entry is kept. In both cases the rating history also
+    keeps the last entry before the cutoff, which is the base rating of the
+    oldest kept window.
+
+    The policy counts the entries it dropped, see
+    `InMemoryStorage.history_memory`.
+    """
+
+    window: Optional[int]
+    windows: int
+    max_age: Optional[int]
+    dropped_rating_entries: int
+    dropped_match_entries: int
+
+    def __init__(self, window: Optional[int] = None, windows: int = 1, max_age: Optional[int] = None) -> None:
+        if (window is None) == (max_age is None):
+            raise ValueError("Give either window or max_age")
+        if windows < 1:
+            raise ValueError("At least one window has to be kept")
+        self.window = window
+        self.windows = windows
+        self.max_age = max_age
+        self.dropped_rating_entries = 0
+        self.dropped_match_entries = 0
+
+    def cutoff(self, timestamp: int) -> int:
+        """ History entries older than this are no longer needed once an entry at `timestamp` is added """
+        if self.window is not None:
+            return (int(timestamp) // self.window - self.windows + 1) * self.window
+        assert self.max_age is not None
+        return int(timestamp) - self.max_age
@@ -0,0 +1,58 @@
+from typing import Any, Iterator, List, Sequence, Tuple, Union, overload
+
+__all__ = ["HistoryView"]
+
+
+class HistoryView(Sequence[Any]):
+    """
+    Read only view of the entries in `items[start:stop]` of a history list
+    of `(timestamp, entry)` pairs or a `CompactHistory`, without copying
+    them. The range is fixed when the view is made, so entries appended later
+    are not included. Use it before adding to the same history again,
+    appending can prune the list under a `HistoryRetention` policy.
+    """
+
+    __slots__ = ("_items", "_start", "_stop")
+
+    _items: Sequence[Tuple[int, Any]]
+    _start: int
+    _stop: int
+
+    def __init__(self, items: Sequence[Tuple[int, Any]], start: int, stop: int) -> None:
+        self._items = items
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._items[i][1] for i in range(self._start, self._stop)[index]]
+        n = self._stop - self._start
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("history index out of range")
+        return self._items[self._start + index][1]
+
+    def __iter__(self) -> Iterator[Any]:
+        items = self._items
+        for i in range(self._start, self._stop):
+            yield items[i][1]
+
+    def __reversed__(self) -> Iterator[Any]:
+        items = self._items
+        for i in range(self._stop - 1, self._start - 1, -1):
+            yield items[i][1]
+
+    def __repr__(self) -> str:
+        return "HistoryView(%r)" % list(self)
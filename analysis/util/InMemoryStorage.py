@@ -1,7 +1,15 @@
+import sys
+from bisect import bisect_left
 from collections import defaultdict
-from typing import Any, DefaultDict, Dict, List, Tuple
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Tuple, Union
 
 from goratings.interfaces import Storage
+from goratings.interfaces.Storage import _ids
+
+from .CompactHistory import CompactHistory
+from .HistoryPolicy import HistoryPolicy
+from .HistoryRetention import HistoryRetention
+from .HistoryView import HistoryView
 
 __all__ = ["InMemoryStorage"]
 
@@ -10,26 +18,113 @@ class InMemoryStorage(Storage):
     _data: Dict[int, Any]
     _timeout_flags: DefaultDict[int, bool]
     _match_history: DefaultDict[int, List[Tuple[int, Any]]]
-    _rating_history: DefaultDict[int, List[Tuple[int, Any]]]
+    _rating_history: DefaultDict[int, Union[List[Tuple[int, Any]], CompactHistory]]
+    _match_timestamps: DefaultDict[int, List[int]]  # parallel to _match_history, for bisecting
+    _rating_timestamps: DefaultDict[int, List[int]]  # parallel to _rating_history, unless compact
     _set_count: DefaultDict[int, int]
+    _last_active_period: Dict[int, int]
+    _current_period: int
     entry_type: Any
+    inflation_period: int
+    retention: Optional[HistoryRetention]
+    history_policy: Optional[HistoryPolicy]
+    compact_history: bool
+
+    def __init__(
+        self,
+        entry_type: type,
+        inflation_period: int = 0,
+        retention: Optional[HistoryRetention] = None,
+        history_policy: Optional[HistoryPolicy] = None,
+        compact_history: bool = False,
+    ) -> None:
+        """
+        If `inflation_period` (in seconds) is given, the storage runs in lazy
+        inflation mode: it remembers the period in which each player's entry
+        was last set, and when an entry is read in a later period the
+        deviation is expanded for every whole period the player sat out (see
+        `set_time`). No sweep over idle players is needed at period ends.
+        Base ratings read with `get_first_rating_older_than` are expanded the
+        same way.
 
-    def __init__(self, entry_type: type) -> None:
+        With a `retention` policy, history entries that the policy no longer
+        needs are dropped as new ones are added. A `history_policy` limits
+        the rating history to some players. With `compact_history` each
+        player's rating history is kept in a `CompactHistory` instead of a
+        list. Changing it only affects the histories started afterwards.
+        """
         self._data = {}
         self._timeout_flags = defaultdict(lambda: False)
         self._match_history = defaultdict(lambda: [])
-        self._rating_history = defaultdict(lambda: [])
+        self._rating_history = defaultdict(lambda: CompactHistory(self.entry_type) if self.compact_history else [])
+        self._match_timestamps = defaultdict(lambda: [])
+        self._rating_timestamps = defaultdict(lambda: [])
         self._set_count = defaultdict(lambda: 0)
+        self._last_active_period = {}
+        self._current_period = 0
         self.entry_type = entry_type
+        self.inflation_period = inflation_period
+        self.retention = retention
+        self.history_policy = history_policy
+        self.compact_history = compact_history
 
     def get(self, player_id: int) -> Any:
         if player_id not in self._data:
             self._data[player_id] = self.entry_type()
+        elif self.inflation_period:
+            self._inflate(player_id)
         return self._data[player_id]
 
     def set(self, player_id: int, entry: Any) -> None:
         self._data[player_id] = entry
         self._set_count[player_id] += 1
+        if self.inflation_period:
+            self._last_active_period[player_id] = self._current_period
+
+    def get_many(self, player_ids: Iterable[int]) -> List[Any]:
+        if self.inflation_period:
+            return super().get_many(player_ids)
+        data = self._data
+        ret = []
+        for player_id in _ids(player_ids):
+            entry = data.get(player_id)
+            if entry is None:
+                entry = data[player_id] = self.entry_type()
+            ret.append(entry)
+        return ret
+
+    def set_many(self, player_ids: Iterable[int], entries: Iterable[Any]) -> None:
+        if self.inflation_period:
+            return super().set_many(player_ids, entries)
+        data = self._data
+        set_count = self._set_count
+        for player_id, entry in zip(_ids(player_ids), entries):
+            data[player_id] = entry
+            set_count[player_id] += 1
+
+    def peek(self, player_id: int) -> Optional[Any]:
+        if player_id not in self._data:
+            return None
+        if self.inflation_period:
+            self._inflate(player_id)
+        return self._data[player_id]
+
+    def set_time(self, timestamp: int) -> None:
+        """ Advances the clock used by lazy inflation mode, does nothing in the default mode """
+        if self.inflation_period:
+            self._current_period = int(timestamp) // self.inflation_period
+
+    def _inflate(self, player_id: int) -> None:
+        # A player last active in period L and read in period C has sat out
+        # the C - L - 1 periods in between. Afterwards the entry counts as
+        # inflated up to period C - 1, so reading it again in C is a no-op.
+        last_active = self._last_active_period.get(player_id)
+        if last_active is not None and self._current_period - last_active > 1:
+            # Inflate a copy, the old entry may still be referenced from the histories
+            entry = self._data[player_id].copy()
+            entry.expand_deviation_because_no_games_played(self._current_period - last_active - 1)
+            self._data[player_id] = entry
+            self._last_active_period[player_id] = self._current_period - 1
 
     def clear_set_count(self, player_id: int) -> None:
         self._set_count[player_id] = 0
@@ -38,6 +133,9 @@ class InMemoryStorage(Storage):
         return self._set_count[player_id]
 
     def all_players(self) -> Dict[int, Any]:
+        if self.inflation_period:
+            for player_id in self._last_active_period:
+                self._inflate(player_id)
         return self._data
 
     def get_timeout_flag(self, player_id: int) -> bool:
@@ -46,12 +144,92 @@ class InMemoryStorage(Storage):
     def set_timeout_flag(self, player_id: int, tf: bool) -> None:
         self._timeout_flags[player_id] = tf
 
-    # We assume we add these entries in ascending order (by timestamp).
+    # We assume we add these entries in ascending order (by timestamp), the
+    # queries below bisect the parallel timestamp lists.
+    def records_history(self, player_id: int) -> bool:
+        """
+        Whether the rating history of a player is recorded, callers can check
+        this before copying an entry for `add_rating_history`.
+        """
+        return self.history_policy is None or self.history_policy.records(player_id)
+
     def add_rating_history(self, player_id: int, timestamp: int, entry: Any) -> None:
-        self._rating_history[player_id].append((timestamp, entry))
+        """ Entries of players the history policy doesn't record are counted as skipped and dropped """
+        if not self.records_history(player_id):
+            assert self.history_policy is not None
+            self.history_policy.skipped_entries += 1
+            return
+        history = self._rating_history[player_id]
+        history.append((timestamp, entry))
+        compact = isinstance(history, CompactHistory)
+        if not compact:
+            self._rating_timestamps[player_id].append(timestamp)
+        if self.retention is not None:
+            # keep the last entry before the cutoff, it's the base rating of the oldest kept window
+            n = self._count_ratings_older_than(player_id, self.retention.cutoff(timestamp)) - 1
+            if n > 0:
+                del history[:n]
+                if not compact:
+                    del self._rating_timestamps[player_id][:n]
+                self.retention.dropped_rating_entries += n
+
+    def _count_ratings_older_than(self, player_id: int, timestamp: int) -> int:
+        history = self._rating_history.get(player_id)
+        if isinstance(history, CompactHistory):
+            return history.bisect(timestamp)
+        timestamps = self._rating_timestamps.get(player_id)
+        return bisect_left(timestamps, timestamp) if timestamps else 0
 
     def add_match_history(self, player_id: int, timestamp: int, entry: Any) -> None:
-        self._match_history[player_id].append((timestamp, entry))
+        history = self._match_history[player_id]
+        timestamps = self._match_timestamps[player_id]
+        history.append((timestamp, entry))
+        timestamps.append(timestamp)
+        if self.retention is not None:
+            n = bisect_left(timestamps, self.retention.cutoff(timestamp))
+            if n > 0:
+                del history[:n]
+                del timestamps[:n]
+                self.retention.dropped_match_entries += n
+
+    def history_memory(self) -> Dict[str, int]:
+        """
+        Number of rating and match history entries kept and, with a retention
+        policy, dropped so far, and the rating history entries a history
+        policy skipped, with an estimate of the bytes they take. The size is
+        measured on one entry of each kind and includes the objects it refers
+        to, so objects shared between entries are counted more than once.
+        Compact rating histories report the bytes of their arrays.
+        """
+        ret = {}
+        histories: Dict[int, Any]
+        for kind, histories in (("rating", self._rating_history), ("match", self._match_history)):
+            kept = sum(len(history) for history in histories.values())
+            dropped = 0
+            if self.retention is not None:
+                dropped = getattr(self.retention, "dropped_%s_entries" % kind)
+            sample = next((history[-1] for history in histories.values() if history), None)
+            if sample is None and kind == "rating":
+                sample = (0, self.entry_type())
+            # the tuple and its entry, plus one slot in the history and one in the timestamp list
+            item_size = 0 if sample is None else _deep_size(sample) + 16
+            kept_bytes = kept * item_size
+            if kind == "rating" and self.compact_history:
+                kept_bytes = sum(
+                    history.nbytes if isinstance(history, CompactHistory) else len(history) * item_size
+                    for history in histories.values()
+                )
+                item_size = kept_bytes // kept if kept else 0
+            ret["%s_entries" % kind] = kept
+            ret["%s_bytes" % kind] = kept_bytes
+            ret["dropped_%s_entries" % kind] = dropped
+            ret["dropped_%s_bytes" % kind] = dropped * item_size
+            ret["%s_players" % kind] = sum(1 for history in histories.values() if history)
+            if kind == "rating":
+                skipped = 0 if self.history_policy is None else self.history_policy.skipped_entries
+                ret["skipped_rating_entries"] = skipped
+                ret["skipped_rating_bytes"] = skipped * item_size
+        return ret
 
     def get_last_game_timestamp(self, player_id: int) -> int:
         if player_id in self._rating_history:
@@ -59,31 +237,82 @@ class InMemoryStorage(Storage):
         return 0
 
     def get_first_rating_older_than(self, player_id: int, timestamp: int) -> Any:
-        for e in reversed(self._rating_history[player_id]):
-            if e[0] < timestamp:
-                return e[1]
-        return self.entry_type()
+        """
+        In lazy inflation mode the entry is a copy, expanded for the whole
+        periods between its own period and the period of `timestamp`.
+        """
+        i = self._count_ratings_older_than(player_id, timestamp)
+        if not i:
+            return self.entry_type()
+        entry_timestamp, entry = self._rating_history[player_id][i - 1]
+        if self.inflation_period:
+            idle_periods = int(timestamp) // self.inflation_period - int(entry_timestamp) // self.inflation_period - 1
+            if idle_periods > 0:
+                entry = entry.copy()
+                entry.expand_deviation_because_no_games_played(idle_periods)
+        return entry
 
     def get_ratings_newer_or_equal_to(self, player_id: int, timestamp: int) -> Any:
-        ct = 0
-        for e in reversed(self._rating_history[player_id]):
-            if e[0] >= timestamp:
-                ct += 1
-            else:
-                break
-        return [e[1] for e in self._rating_history[player_id][-ct:]]
+        history = self._rating_history.get(player_id)
+        if not history:
+            return HistoryView([], 0, 0)
+        return HistoryView(history, self._count_ratings_older_than(player_id, timestamp), len(history))
 
     def get_first_timestamp_older_than(self, player_id: int, timestamp: int) -> Any:
-        for e in reversed(self._rating_history[player_id]):
-            if e[0] < timestamp:
-                return e[0]
+        i = self._count_ratings_older_than(player_id, timestamp)
+        if i:
+            return self._rating_history[player_id][i - 1][0]
         return None
 
+    def ratings_as_of(self, timestamp: int) -> Dict[int, Any]:
+        """
+        Every player's latest rating history entry at or before `timestamp`,
+        the leaderboard as it was then. Players without such an entry are left
+        out, as are players a history policy skips and entries a retention
+        policy has dropped.
+        """
+        return self.ratings_as_of_many([timestamp])[timestamp]
+
+    def ratings_as_of_many(self, timestamps: Iterable[int]) -> Dict[int, Dict[int, Any]]:
+        """ `ratings_as_of` for many dates at once, in one pass over the players """
+        dates = sorted(set(timestamps))
+        ret: Dict[int, Dict[int, Any]] = {date: {} for date in dates}
+        for player_id, history in self._rating_history.items():
+            if not history:
+                continue
+            last = -1
+            entry = None
+            for k, date in enumerate(dates):
+                i = self._count_ratings_older_than(player_id, date + 1)
+                if i == 0:
+                    continue
+                if i != last:
+                    # dates between the same two entries share the decoded entry
+                    entry = history.entry(i - 1) if isinstance(history, CompactHistory) else history[i - 1][1]
+                    last = i
+                ret[date][player_id] = entry
+                if i == len(history):
+                    later_dates = k + 1
+                    for later in dates[later_dates:]:
+                        ret[later][player_id] = entry
+                    break
+        return ret
+
     def get_matches_newer_or_equal_to(self, player_id: int, timestamp: int) -> Any:
-        ct = 0
-        for e in reversed(self._match_history[player_id]):
-            if e[0] >= timestamp:
-                ct += 1
-            else:
-                break
-        return [e[1] for e in self._match_history[player_id][-ct:]]
+        timestamps = self._match_timestamps.get(player_id)
+        if not timestamps:
+            return HistoryView([], 0, 0)
+        return HistoryView(self._match_history[player_id], bisect_left(timestamps, timestamp), len(timestamps))
+
+
+def _deep_size(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        return size + sum(_deep_size(item) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__) + sum(_deep_size(v) for v in obj.__dict__.values())
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if hasattr(obj, slot):
+                size += _deep_size(getattr(obj, slot))
+    return size
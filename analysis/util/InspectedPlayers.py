@@ -0,0 +1,26 @@
+import configparser
+import os
+from typing import Optional, Set
+
+__all__ = ["inspected_players_file", "inspected_player_ids"]
+
+
+def inspected_players_file() -> Optional[str]:
+    """ Finds players_to_inspect.ini from the repository root, analysis/ or a subdirectory """
+    fname = "players_to_inspect.ini"
+    if os.path.exists("analysis/" + fname):
+        fname = "analysis/" + fname
+    if os.path.exists("../" + fname):
+        fname = "../" + fname
+    return fname if os.path.exists(fname) else None
+
+
+def inspected_player_ids() -> Set[int]:
+    """ Ids of the players in all sections of players_to_inspect.ini """
+    fname = inspected_players_file()
+    if fname is None:
+        return set()
+    ini = configparser.ConfigParser()
+    ini.optionxform = lambda s: s  # type: ignore
+    ini.read(fname)
+    return {int(ini[section][name]) for section in ini.sections() for name in ini[section]}
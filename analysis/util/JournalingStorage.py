@@ -0,0 +1,251 @@
+import os
+import struct
+from math import isnan
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from goratings.interfaces import GameRecord, Storage
+
+from .Checkpoint import restore_checkpoint, save_checkpoint
+from .EntryCodec import EntryCodec
+from .GameData import batched, games_after
+from .InMemoryStorage import InMemoryStorage
+
+__all__ = ["JournalingStorage"]
+
+# game_id, size, handicap, komi, black_id, white_id, time_per_move, timeout, winner_id, ended,
+# black_manual_rank_update, white_manual_rank_update (NaN for None)
+_GAME_FORMAT = "qhhdqqq?qqdd"
+
+
+class JournalingStorage(InMemoryStorage):
+    """
+    `InMemoryStorage` that can survive a crash and continue a previous run.
+
+    `checkpoint()` writes the whole state to `filename` (see
+    `save_checkpoint`). Every change after that is appended to
+    `filename + ".journal"` as a small binary record, and `game_done(game)`
+    marks the end of a game. Opening the storage again loads the checkpoint
+    and replays the journal up to the last finished game; changes of a game
+    that was interrupted are dropped. `last_game_id` and `last_ended` then
+    tell the driver where to pick up.
+
+    Match history items must be `(GameRecord, entry)` pairs. The journal is
+    buffered and written at least every `flush_every` games.
+    """
+
+    _journal: BinaryIO
+    _journal_filename: str
+    _codec: EntryCodec
+    _records: Dict[bytes, struct.Struct]
+    _games_since_flush: int
+    filename: str
+    flush_every: int
+    last_game_id: int
+    last_ended: int
+
+    def __init__(
+        self,
+        filename: str,
+        entry_type: type,
+        inflation_period: int = 0,
+        flush_every: int = 1000,
+        compact_history: bool = False,
+    ) -> None:
+        super().__init__(entry_type, inflation_period, compact_history=compact_history)
+        self._codec = EntryCodec(entry_type)
+        self._journal_filename = filename + ".journal"
+        self._games_since_flush = 0
+        self.filename = filename
+        self.flush_every = flush_every
+        self.last_game_id = 0
+        self.last_ended = 0
+
+        values = "d" * len(self._codec.fields)
+        self._records = {
+            b"S": struct.Struct("<q" + values),  # set: player_id, entry
+            b"N": struct.Struct("<q"),  # default entry created: player_id
+            b"I": struct.Struct("<qq" + values),  # lazily inflated: player_id, last active period, entry
+            b"F": struct.Struct("<q?"),  # timeout flag: player_id, flag
+            b"C": struct.Struct("<q"),  # set count cleared: player_id
+            b"P": struct.Struct("<q"),  # inflation period: current period
+            b"R": struct.Struct("<qq" + values),  # rating history: player_id, timestamp, entry
+            b"M": struct.Struct("<qq" + _GAME_FORMAT + values),  # match history: player_id, timestamp, game, entry
+            b"G": struct.Struct("<qq"),  # game done: game_id, ended
+            b"H": struct.Struct("<qq"),  # header: game_id, ended of the checkpoint the journal continues
+        }
+
+        if os.path.exists(filename):
+            self.last_game_id, self.last_ended = restore_checkpoint(self, filename)
+        if os.path.exists(self._journal_filename) and self._replay():
+            self._journal = open(self._journal_filename, "ab")
+        else:
+            self._start_journal()
+
+    def _write(self, kind: bytes, *values: Any) -> None:
+        self._journal.write(kind + self._records[kind].pack(*values))
+
+    def _start_journal(self) -> None:
+        self._journal = open(self._journal_filename, "wb")
+        self._write(b"H", self.last_game_id, self.last_ended)
+        self._journal.flush()
+
+    def _replay(self) -> bool:
+        # Applies the journal up to the last game_done record and cuts off the
+        # rest. Returns False if the journal does not continue the checkpoint,
+        # i.e. the process died after writing a checkpoint but before starting
+        # the new journal.
+        with open(self._journal_filename, "rb") as f:
+            data = f.read()
+        header = self._records[b"H"]
+        if data[:1] != b"H" or len(data) < 1 + header.size:
+            return False
+        if header.unpack_from(data, 1) != (self.last_game_id, self.last_ended):
+            return False
+        apply: Dict[bytes, Callable[..., None]] = {
+            b"S": lambda player_id, *values: InMemoryStorage.set(self, player_id, self._codec.decode(values)),
+            b"N": lambda player_id: self._data.__setitem__(player_id, self.entry_type()),
+            b"I": self._replay_inflate,
+            b"F": lambda player_id, flag: InMemoryStorage.set_timeout_flag(self, player_id, flag),
+            b"C": lambda player_id: InMemoryStorage.clear_set_count(self, player_id),
+            b"P": lambda period: setattr(self, "_current_period", period),
+            b"R": lambda player_id, timestamp, *values: InMemoryStorage.add_rating_history(
+                self, player_id, timestamp, self._codec.decode(values)
+            ),
+            b"M": self._replay_match,
+        }
+        pending: List[Tuple[bytes, Tuple[Any, ...]]] = []
+        offset = end = 1 + header.size
+        while offset < len(data):
+            kind_end = offset + 1
+            kind = data[offset:kind_end]
+            record = self._records.get(kind)
+            if record is None or offset + 1 + record.size > len(data):
+                break  # torn write at the end of the journal
+            values = record.unpack_from(data, offset + 1)
+            offset += 1 + record.size
+            if kind == b"G":
+                for pending_kind, pending_values in pending:
+                    apply[pending_kind](*pending_values)
+                pending = []
+                self.last_game_id, self.last_ended = values
+                end = offset
+            else:
+                pending.append((kind, values))
+        if end < len(data):
+            with open(self._journal_filename, "r+b") as f:
+                f.truncate(end)
+        return True
+
+    def _replay_inflate(self, player_id: int, last_active: int, *values: float) -> None:
+        self._data[player_id] = self._codec.decode(values)
+        self._last_active_period[player_id] = last_active
+
+    def _replay_match(self, player_id: int, timestamp: int, *values: Any) -> None:
+        n = len(_GAME_FORMAT)
+        game_values = values[:n]
+        manual_ranks = [None if isnan(rank) else rank for rank in game_values[-2:]]
+        game = GameRecord(*game_values[:-2], *manual_ranks)
+        InMemoryStorage.add_match_history(self, player_id, timestamp, (game, self._codec.decode(values[n:])))
+
+    def unprocessed(self, games: Iterable[GameRecord]) -> Iterator[GameRecord]:
+        """ Skips the games up to and including the last finished one, `games` must be ordered by end time """
+        return games_after(games, self.last_game_id, self.last_ended)
+
+    def unprocessed_batches(self, games: Iterable[GameRecord], batch_size: int = 4096) -> Iterator[List[GameRecord]]:
+        """ `unprocessed` in lists of up to `batch_size` games, like `GameData.batches` """
+        return batched(self.unprocessed(games), batch_size)
+
+    def game_done(self, game: GameRecord) -> None:
+        """
+        Marks the end of the changes made for `game`. When rating batches,
+        call it once with the last game of each batch.
+        """
+        self._write(b"G", game.game_id, game.ended)
+        self.last_game_id = game.game_id
+        self.last_ended = game.ended
+        self._games_since_flush += 1
+        if self._games_since_flush >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self._journal.flush()
+        self._games_since_flush = 0
+
+    def checkpoint(self) -> None:
+        """ Writes a checkpoint and starts a new, empty journal """
+        self.flush()
+        save_checkpoint(self, self.filename, self.last_game_id, self.last_ended)
+        self._journal.close()
+        self._start_journal()
+
+    def close(self) -> None:
+        self.flush()
+        self._journal.close()
+
+    def get(self, player_id: int) -> Any:
+        if player_id not in self._data:
+            self._write(b"N", player_id)
+        return super().get(player_id)
+
+    def set(self, player_id: int, entry: Any) -> None:
+        super().set(player_id, entry)
+        self._write(b"S", player_id, *self._codec.encode(entry))
+
+    def get_many(self, player_ids: Iterable[int]) -> List[Any]:
+        # per player, so every created entry is journaled
+        return Storage.get_many(self, player_ids)
+
+    def set_many(self, player_ids: Iterable[int], entries: Iterable[Any]) -> None:
+        Storage.set_many(self, player_ids, entries)
+
+    def set_time(self, timestamp: int) -> None:
+        super().set_time(timestamp)
+        if self.inflation_period:
+            self._write(b"P", self._current_period)
+
+    def _inflate(self, player_id: int) -> None:
+        entry = self._data[player_id]
+        super()._inflate(player_id)
+        if self._data[player_id] is not entry:
+            self._write(
+                b"I", player_id, self._last_active_period[player_id], *self._codec.encode(self._data[player_id])
+            )
+
+    def clear_set_count(self, player_id: int) -> None:
+        super().clear_set_count(player_id)
+        self._write(b"C", player_id)
+
+    def set_timeout_flag(self, player_id: int, tf: bool) -> None:
+        super().set_timeout_flag(player_id, tf)
+        self._write(b"F", player_id, tf)
+
+    def add_rating_history(self, player_id: int, timestamp: int, entry: Any) -> None:
+        super().add_rating_history(player_id, timestamp, entry)
+        if self.records_history(player_id):
+            self._write(b"R", player_id, timestamp, *self._codec.encode(entry))
+
+    def add_match_history(self, player_id: int, timestamp: int, entry: Any) -> None:
+        super().add_match_history(player_id, timestamp, entry)
+        game, opponent = entry
+        self._write(
+            b"M",
+            player_id,
+            timestamp,
+            game.game_id,
+            game.size,
+            game.handicap,
+            game.komi,
+            game.black_id,
+            game.white_id,
+            game.time_per_move,
+            game.timeout,
+            game.winner_id,
+            game.ended,
+            _manual_rank(game.black_manual_rank_update),
+            _manual_rank(game.white_manual_rank_update),
+            *self._codec.encode(opponent)
+        )
+
+
+def _manual_rank(rank: Optional[float]) -> float:
+    return float("nan") if rank is None else rank
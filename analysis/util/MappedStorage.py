@@ -0,0 +1,161 @@
+import os
+import struct
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from goratings.interfaces import Storage
+
+from .EntryCodec import EntryCodec
+from .InMemoryStorage import InMemoryStorage
+
+__all__ = ["MappedStorage", "build_mapped_storage"]
+
+_MAGIC = b"GRMAP001"
+# magic, number of players, field names (comma separated)
+_HEADER = struct.Struct("<8sq112s")
+
+
+class MappedStorage(Storage):
+    """
+    Read only storage backed by a memory-mapped file written with
+    `build_mapped_storage`, so any number of worker processes can share one
+    set of reference ratings without each building its own dict. The file
+    holds the sorted player ids, which serve as a dense index through binary
+    search, followed by one fixed-width row of entry fields per player, the
+    set counts and the timeout flags. Nothing is read until it is used and
+    the pages are shared through the OS page cache.
+
+    `get` of an unknown player returns a fresh default entry, which is not
+    stored; `peek` returns None. Entries are decoded on every call, so
+    changing them has no effect. The columns are exposed as read-only NumPy
+    arrays for vectorized lookups with `index`.
+    """
+
+    _buffer: np.memmap
+    _codec: EntryCodec
+    _id_view: memoryview
+    _value_view: memoryview
+    ids: np.ndarray
+    values: np.ndarray
+    set_counts: np.ndarray
+    timeout_flags: np.ndarray
+    entry_type: Any
+    fields: List[str]
+
+    def __init__(self, filename: str, entry_type: type) -> None:
+        self._codec = EntryCodec(entry_type)
+        self.entry_type = entry_type
+        self._buffer = np.memmap(filename, dtype=np.uint8, mode="r")
+        magic, n, fields = _HEADER.unpack_from(self._buffer[: _HEADER.size].tobytes())
+        if magic != _MAGIC:
+            raise ValueError("%s is not a mapped storage file" % filename)
+        self.fields = fields.rstrip(b"\0").decode().split(",")
+        if tuple(self.fields) != self._codec.fields:
+            raise ValueError("%s holds %s entries, not %s" % (filename, self.fields, entry_type.__name__))
+
+        k = len(self.fields)
+        ids_start = _HEADER.size
+        values_start = ids_start + 8 * n
+        set_counts_start = values_start + 8 * n * k
+        timeout_flags_start = set_counts_start + 8 * n
+        end = timeout_flags_start + n
+        self.ids = self._buffer[ids_start:values_start].view(np.int64)
+        self.values = self._buffer[values_start:set_counts_start].view(np.float64).reshape(n, k)
+        self.set_counts = self._buffer[set_counts_start:timeout_flags_start].view(np.int64)
+        self.timeout_flags = self._buffer[timeout_flags_start:end].view(np.bool_)
+
+        # single lookups bisect plain memoryviews, NumPy has a high per-call overhead
+        self._id_view = self.ids.data
+        self._value_view = self.values.reshape(-1).data
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def index(self, player_ids: Any) -> np.ndarray:
+        """ Dense row indices of the given players, -1 for unknown players """
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(player_ids.shape, -1, dtype=np.int64)
+        idx = np.minimum(np.searchsorted(self.ids, player_ids), len(self.ids) - 1)
+        return np.where(self.ids[idx] == player_ids, idx, -1)
+
+    def _row(self, player_id: int) -> int:
+        ids = self._id_view
+        i = bisect_left(ids, player_id)
+        if i < len(ids) and ids[i] == player_id:
+            return i
+        return -1
+
+    def _decode(self, i: int) -> Any:
+        k = len(self.fields)
+        start = i * k
+        stop = start + k
+        return self._codec.decode(self._value_view[start:stop].tolist())
+
+    def get(self, player_id: int) -> Any:
+        i = self._row(player_id)
+        if i < 0:
+            return self.entry_type()
+        return self._decode(i)
+
+    def get_many(self, player_ids: Iterable[int]) -> List[Any]:
+        idx = self.index(np.fromiter(player_ids, dtype=np.int64))
+        if not len(self.ids):
+            return [self.entry_type() for _ in idx]
+        decode = self._codec.decode
+        rows = self.values[idx].tolist()
+        return [decode(row) if i >= 0 else self.entry_type() for i, row in zip(idx.tolist(), rows)]
+
+    def peek(self, player_id: int) -> Optional[Any]:
+        i = self._row(player_id)
+        if i < 0:
+            return None
+        return self._decode(i)
+
+    def get_set_count(self, player_id: int) -> int:
+        i = self._row(player_id)
+        return int(self.set_counts[i]) if i >= 0 else 0
+
+    def get_timeout_flag(self, player_id: int) -> bool:
+        i = self._row(player_id)
+        return bool(self.timeout_flags[i]) if i >= 0 else False
+
+    def all_players(self) -> Dict[int, Any]:
+        decode = self._codec.decode
+        return {player_id: decode(row) for player_id, row in zip(self.ids.tolist(), self.values.tolist())}
+
+    def set(self, player_id: int, entry: Any) -> None:
+        raise TypeError("MappedStorage is read only")
+
+    def clear_set_count(self, player_id: int) -> None:
+        raise TypeError("MappedStorage is read only")
+
+    def set_timeout_flag(self, player_id: int, tf: bool) -> None:
+        raise TypeError("MappedStorage is read only")
+
+
+def build_mapped_storage(storage: InMemoryStorage, filename: str) -> None:
+    """
+    Writes the entries, set counts and timeout flags of `storage`, e.g. at
+    the end of a run, to `filename` for `MappedStorage`.
+    The file is written next to the target and renamed into place, so
+    processes that still have the old file mapped keep reading it unchanged.
+    """
+    players = storage.all_players()
+    codec = EntryCodec(storage.entry_type)
+    ids = np.array(sorted(players), dtype=np.int64)
+    id_list = ids.tolist()
+    values = np.array([codec.encode(players[player_id]) for player_id in id_list], dtype=np.float64).reshape(
+        -1, len(codec.fields)
+    )
+    set_counts = np.array([storage.get_set_count(player_id) for player_id in id_list], dtype=np.int64)
+    timeout_flags = np.array([storage.get_timeout_flag(player_id) for player_id in id_list], dtype=np.bool_)
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(ids), ",".join(codec.fields).encode()))
+        for column in (ids, values, set_counts, timeout_flags):
+            f.write(column.tobytes())
+    os.replace(tmp_filename, filename)
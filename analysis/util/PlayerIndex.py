@@ -0,0 +1,113 @@
+from typing import Any, Optional
+
+import numpy as np
+
+__all__ = ["PlayerIndex"]
+
+# Fibonacci hashing: the top bits of id * 2 ** 64 / golden ratio pick the slot
+_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+class PlayerIndex:
+    """
+    Interns the sparse player ids (EGF ids are offset by 1,000,000,000 and
+    AGA ids by 2,000,000,000) as dense row numbers 0, 1, 2, ... in the order
+    the players are first seen, so per-player state can be kept in arrays
+    indexed by row.
+
+    The ids are kept in an int64 array by row, and looked up through an
+    open addressing hash table of int32 rows (-1 for empty slots) that is
+    kept at most half full, so the index costs 16 to 32 bytes per player
+    depending on how much spare capacity the two arrays have.
+    """
+
+    _ids: np.ndarray
+    _slots: np.ndarray
+    _shift: int
+    _len: int
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._len = 0
+        self._resize_slots(max(capacity, 1))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, player_id: int) -> bool:
+        return self.get(player_id) is not None
+
+    @property
+    def ids(self) -> np.ndarray:
+        """ Player ids by row """
+        return self._ids[: self._len]
+
+    @property
+    def nbytes(self) -> int:
+        """ Bytes held by the id array and the hash table, including spare capacity """
+        return int(self._ids.nbytes + self._slots.nbytes)
+
+    def _slot(self, player_id: int) -> int:
+        """ Slot of `player_id`, or the empty slot it would go in """
+        slots = self._slots
+        ids = self._ids
+        mask = len(slots) - 1
+        slot = ((player_id * _MULTIPLIER) & _MASK64) >> self._shift
+        while True:
+            row = int(slots[slot])
+            if row < 0 or ids[row] == player_id:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _resize_slots(self, min_size: int) -> None:
+        size = 2
+        while size < 2 * min_size:
+            size *= 2
+        self._slots = np.full(size, -1, dtype=np.int32)
+        self._shift = 64 - (size.bit_length() - 1)
+        for row, player_id in enumerate(self._ids[: self._len].tolist()):
+            self._slots[self._slot(player_id)] = row
+
+    def get(self, player_id: int) -> Optional[int]:
+        """ Row of a player, None if the player has not been added """
+        row = int(self._slots[self._slot(int(player_id))])
+        return row if row >= 0 else None
+
+    def add(self, player_id: int) -> int:
+        """ Row of a player, the player is given the next row if needed """
+        player_id = int(player_id)
+        slot = self._slot(player_id)
+        row = int(self._slots[slot])
+        if row < 0:
+            row = self._len
+            if row == len(self._ids):
+                grown = np.zeros(max(1024, 2 * len(self._ids)), dtype=np.int64)
+                grown[:row] = self._ids
+                self._ids = grown
+            self._ids[row] = player_id
+            self._len += 1
+            if 2 * self._len > len(self._slots):
+                self._resize_slots(self._len)
+            else:
+                self._slots[slot] = row
+        return row
+
+    def rows(self, player_ids: Any) -> np.ndarray:
+        """ Rows of many players as an array, -1 for players that have not been added """
+        keys = np.asarray(player_ids, dtype=np.int64).ravel()
+        ret = np.full(len(keys), -1, dtype=np.int64)
+        mask = len(self._slots) - 1
+        slot = (keys.astype(np.uint64) * np.uint64(_MULTIPLIER)) >> np.uint64(self._shift)
+        slot = slot.astype(np.int64)
+        pending = np.arange(len(keys))
+        # probe all keys in lock step, each round drops the keys that hit their id or an empty slot
+        while len(pending):
+            row = self._slots[slot]
+            empty = row < 0
+            found = ~empty & (self._ids[np.maximum(row, 0)] == keys[pending])
+            ret[pending[found]] = row[found]
+            more = ~(empty | found)
+            pending = pending[more]
+            slot = (slot[more] + 1) & mask
+        return ret
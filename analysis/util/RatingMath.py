@@ -265,3 +265,8 @@ def configure_rating_to_rank(args: argparse.Namespace) -> None:
 
 def lerp(x:float, y:float, a:float):
     return (x * (1.0 - a)) + (y * (a))
+
+
+# The default ranks until config() applies the command line, so the rating
+# systems also work without it, e.g. in the unit tests
+configure_rating_to_rank(cli.parse_args([]))
@@ -0,0 +1,229 @@
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from goratings.interfaces import GameRecord
+from goratings.interfaces.Storage import _ids
+
+from .EntryCodec import EntryCodec
+from .GameData import batched, games_after
+from .InMemoryStorage import InMemoryStorage
+
+__all__ = ["SQLiteStorage"]
+
+
+class SQLiteStorage(InMemoryStorage):
+    """
+    Storage that keeps entries, timeout flags and set counts in a SQLite
+    database, so the rating state survives the process.
+
+    Reads go through an in-memory cache and writes are collected in a dirty
+    set (write-behind). Once `max_dirty` players are dirty, or on `flush` /
+    `close`, they are written in a single transaction with `executemany`.
+    If `cache_size` is given, the cache is flushed and dropped whenever it
+    grows beyond that many players.
+
+    With `histories=True` the rating histories are stored as well (and read
+    back when the database is opened); match histories are only kept in
+    memory.
+
+    `game_done(game)` records the last rated game along with the players, so
+    a later run can skip the games already in the database with
+    `unprocessed`. Once either of them has been called, flushes wait for the
+    next `game_done`, so the database never holds half of a game.
+    """
+
+    _conn: sqlite3.Connection
+    _codec: EntryCodec
+    _cache: Dict[int, List[Any]]  # player_id -> [entry or None, timeout flag, set count]
+    _dirty: Set[int]
+    _history_buffer: List[Tuple[Any, ...]]
+    _games_tracked: bool
+    max_dirty: int
+    cache_size: Optional[int]
+    histories: bool
+    last_game_id: int
+    last_ended: int
+
+    def __init__(
+        self,
+        filename: str,
+        entry_type: type,
+        max_dirty: int = 100000,
+        cache_size: Optional[int] = None,
+        histories: bool = False,
+    ) -> None:
+        super().__init__(entry_type)
+        self._codec = EntryCodec(entry_type)
+        self._cache = {}
+        self._dirty = set()
+        self._history_buffer = []
+        self._games_tracked = False
+        self.max_dirty = max_dirty
+        self.cache_size = cache_size
+        self.histories = histories
+
+        fields = self._codec.fields
+        self._conn = sqlite3.connect(filename)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS players "
+            "(player_id INTEGER PRIMARY KEY, %s, timeout_flag INTEGER, set_count INTEGER)"
+            % ", ".join("%s REAL" % field for field in fields)
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rating_history (player_id INTEGER, timestamp INTEGER, %s)"
+            % ", ".join("%s REAL" % field for field in fields)
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress (id INTEGER PRIMARY KEY, last_game_id INTEGER, last_ended INTEGER)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT last_game_id, last_ended FROM progress WHERE id = 0").fetchone()
+        self.last_game_id, self.last_ended = (0, 0) if row is None else row
+
+        self._select = "SELECT player_id, %s, timeout_flag, set_count FROM players" % ", ".join(fields)
+        self._insert = "INSERT OR REPLACE INTO players VALUES (?, %s, ?, ?)" % ", ".join("?" for _ in fields)
+        self._insert_history = "INSERT INTO rating_history VALUES (?, ?, %s)" % ", ".join("?" for _ in fields)
+
+        if histories:
+            for row in self._conn.execute("SELECT * FROM rating_history ORDER BY rowid"):
+                InMemoryStorage.add_rating_history(self, row[0], row[1], self._codec.decode(row[2:]))
+
+    def _decode_row(self, row: Tuple[Any, ...]) -> List[Any]:
+        values = row[1:-2]
+        entry = None if values[0] is None else self._codec.decode(values)
+        return [entry, bool(row[-2]), row[-1]]
+
+    def _record(self, player_id: int) -> List[Any]:
+        record = self._cache.get(player_id)
+        if record is None:
+            row = self._conn.execute(self._select + " WHERE player_id = ?", (player_id,)).fetchone()
+            record = [None, False, 0] if row is None else self._decode_row(row)
+            self._cache[player_id] = record
+        return record
+
+    def _load(self, player_ids: Iterable[int]) -> None:
+        # Loads all uncached players with a few queries
+        missing = list({player_id for player_id in player_ids if player_id not in self._cache})
+        for start in range(0, len(missing), 500):
+            stop = start + 500
+            chunk = missing[start:stop]
+            for player_id in chunk:
+                self._cache[player_id] = [None, False, 0]
+            query = self._select + " WHERE player_id IN (%s)" % ", ".join("?" for _ in chunk)
+            for row in self._conn.execute(query, chunk):
+                self._cache[row[0]] = self._decode_row(row)
+
+    def _touch(self, player_id: int) -> None:
+        self._dirty.add(player_id)
+        if not self._games_tracked:
+            self._flush_if_due()
+
+    def _flush_if_due(self) -> None:
+        if len(self._dirty) >= self.max_dirty or len(self._history_buffer) >= self.max_dirty:
+            self.flush()
+        if self.cache_size is not None and len(self._cache) > self.cache_size:
+            self.flush()
+            self._cache = {}
+
+    def flush(self) -> None:
+        """ Writes all dirty players and buffered history in one transaction """
+        encode = self._codec.encode
+        nulls = (None,) * len(self._codec.fields)
+        rows = []
+        for player_id in self._dirty:
+            entry, timeout_flag, set_count = self._cache[player_id]
+            rows.append((player_id,) + (nulls if entry is None else encode(entry)) + (timeout_flag, set_count))
+        with self._conn:
+            self._conn.executemany(self._insert, rows)
+            if self._history_buffer:
+                self._conn.executemany(self._insert_history, self._history_buffer)
+            if self._games_tracked:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO progress VALUES (0, ?, ?)", (self.last_game_id, self.last_ended)
+                )
+        self._dirty = set()
+        self._history_buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def unprocessed(self, games: Iterable[GameRecord]) -> Iterator[GameRecord]:
+        """ Skips the games up to and including the last finished one, `games` must be ordered by end time """
+        self._games_tracked = True
+        return games_after(games, self.last_game_id, self.last_ended)
+
+    def unprocessed_batches(self, games: Iterable[GameRecord], batch_size: int = 4096) -> Iterator[List[GameRecord]]:
+        """ `unprocessed` in lists of up to `batch_size` games, like `GameData.batches` """
+        return batched(self.unprocessed(games), batch_size)
+
+    def game_done(self, game: GameRecord) -> None:
+        """
+        Marks the end of the changes made for `game`. When rating batches,
+        call it once with the last game of each batch.
+        """
+        self.last_game_id = game.game_id
+        self.last_ended = game.ended
+        self._games_tracked = True
+        self._flush_if_due()
+
+    def get(self, player_id: int) -> Any:
+        record = self._record(player_id)
+        if record[0] is None:
+            record[0] = self.entry_type()
+            self._touch(player_id)
+        return record[0]
+
+    def set(self, player_id: int, entry: Any) -> None:
+        record = self._record(player_id)
+        record[0] = entry
+        record[2] += 1
+        self._touch(player_id)
+
+    def get_many(self, player_ids: Iterable[int]) -> List[Any]:
+        player_ids = list(_ids(player_ids))
+        self._load(player_ids)
+        return [self.get(player_id) for player_id in player_ids]
+
+    def set_many(self, player_ids: Iterable[int], entries: Iterable[Any]) -> None:
+        player_ids = list(_ids(player_ids))
+        self._load(player_ids)
+        for player_id, entry in zip(player_ids, entries):
+            self.set(player_id, entry)
+
+    def peek(self, player_id: int) -> Optional[Any]:
+        return self._record(player_id)[0]
+
+    def clear_set_count(self, player_id: int) -> None:
+        self._record(player_id)[2] = 0
+        self._touch(player_id)
+
+    def get_set_count(self, player_id: int) -> int:
+        ret: int = self._record(player_id)[2]
+        return ret
+
+    def all_players(self) -> Dict[int, Any]:
+        self.flush()
+        ret = {}
+        for row in self._conn.execute(self._select + " WHERE %s IS NOT NULL" % self._codec.fields[0]):
+            record = self._cache.get(row[0])
+            # keep the cached objects, engines may hold references to them
+            ret[row[0]] = record[0] if record is not None else self._codec.decode(row[1:-2])
+        return ret
+
+    def get_timeout_flag(self, player_id: int) -> bool:
+        ret: bool = self._record(player_id)[1]
+        return ret
+
+    def set_timeout_flag(self, player_id: int, tf: bool) -> None:
+        self._record(player_id)[1] = tf
+        self._touch(player_id)
+
+    def add_rating_history(self, player_id: int, timestamp: int, entry: Any) -> None:
+        super().add_rating_history(player_id, timestamp, entry)
+        if self.histories and self.records_history(player_id):
+            self._history_buffer.append((player_id, timestamp) + self._codec.encode(entry))
+            if not self._games_tracked:
+                self._flush_if_due()
@@ -17,6 +17,7 @@ from .GameData import datasets_used
 from .Glicko2Analytics import Glicko2Analytics
 from .GorAnalytics import GorAnalytics
 from .InMemoryStorage import InMemoryStorage
+from .InspectedPlayers import inspected_players_file
 from .RatingMath import rating_config, rating_to_rank
 from .EGFGameData import EGFGameData
 from .AGAGameData import AGAGameData
@@ -73,23 +74,24 @@ class TallyGameAnalytics:
             self.games_ignored += 1
             return
 
-        if abs(result.black_rank + result.game.handicap - result.white_rank) > 1:
+        game = result.game
+        if abs(result.black_rank + game.handicap - result.white_rank) > 1:
             self.games_ignored += 1
             return
 
-        black_won = result.game.winner_id == result.game.black_id
-        white_won = result.game.winner_id == result.game.white_id
+        black_won = game.winner_id == game.black_id
+        white_won = game.winner_id == game.white_id
 
-        for size in [ALL, result.game.size]:
-            for speed in [ALL, result.game.speed]:
+        for size in [ALL, game.size]:
+            for speed in [ALL, game.speed]:
                 for rank in [
                     ALL,
                     str((int(result.black_rank) // 5) * 5) + "+5",
                     int(result.black_rank),
                 ]:
-                    for handicap in [ALL, result.game.handicap]:
+                    for handicap in [ALL, game.handicap]:
                         if isinstance(rank, int) or isinstance(rank, str):  # this is just to make mypy happy
-                            if abs(result.black_rank + result.game.handicap - result.white_rank) <= 1:
+                            if abs(result.black_rank + game.handicap - result.white_rank) <= 1:
                                 self.count_black_wins[size][speed][rank][handicap] += 1
                                 if black_won:
                                     self.black_wins[size][speed][rank][handicap] += 1
@@ -110,20 +112,21 @@ class TallyGameAnalytics:
             self.games_ignored += 1
             return
 
-        if abs(result.black_rank + result.game.handicap - result.white_rank) > 1:
+        game = result.game
+        if abs(result.black_rank + game.handicap - result.white_rank) > 1:
             self.games_ignored += 1
             return
 
-        black_won = result.game.winner_id == result.game.black_id
+        black_won = game.winner_id == game.black_id
 
-        for size in [ALL, result.game.size]:
-            for speed in [ALL, result.game.speed]:
+        for size in [ALL, game.size]:
+            for speed in [ALL, game.speed]:
                 for rank in [
                     ALL,
                     str((int(result.black_rank) // 5) * 5) + "+5",
                     int(result.black_rank),
                 ]:
-                    for handicap in [ALL, result.game.handicap]:
+                    for handicap in [ALL, game.handicap]:
                         if isinstance(rank, int) or isinstance(rank, str):  # this is just to make mypy happy
                             if black_won:
                                 self.black_wins[size][speed][rank][handicap] += 1
@@ -183,14 +186,8 @@ class TallyGameAnalytics:
     def print_inspected_players(self) -> None:
         ini = configparser.ConfigParser()
         ini.optionxform = lambda s: s  # type: ignore
-        fname = "players_to_inspect.ini"
-        if os.path.exists(fname):
-            pass
-        if os.path.exists("analysis/" + fname):
-            fname = "analysis/" + fname
-        if os.path.exists("../" + fname):
-            fname = "../" + fname
-        if os.path.exists(fname):
+        fname = inspected_players_file()
+        if fname is not None:
             ini.read(fname)
 
             sections = []
@@ -208,7 +205,9 @@ class TallyGameAnalytics:
                 print("Inspected %s users from %s" % (section, fname))
                 for name in ini[section]:
                     id = int(ini[section][name])
-                    entry = self.storage.get(id)
+                    entry = self.storage.peek(id)
+                    if entry is None:
+                        entry = self.storage.entry_type()  # never rated, don't add it to the storage
                     last_game = self.storage.get_first_timestamp_older_than(id, 999999999999)
                     if last_game is None:
                         rh = []
@@ -372,7 +371,9 @@ class TallyGameAnalytics:
             id = e[0]
             username = e[1]
             entry = e[2]
-            player = self.storage.get(id)
+            player = self.storage.peek(id)
+            if player is None:
+                player = self.storage.entry_type()  # never rated, don't add it to the storage
             rank = rating_to_rank(player.rating)
 
             aga = get_org_rank(entry, 'us')
@@ -472,7 +473,9 @@ class TallyGameAnalytics:
             id = e[0]
             username = e[1]
             entry = e[2]
-            player = self.storage.get(id)
+            player = self.storage.peek(id)
+            if player is None:
+                player = self.storage.entry_type()  # never rated, don't add it to the storage
             rank = rating_to_rank(player.rating)
             if player.rating == 1500:
                 continue
@@ -0,0 +1,59 @@
+from typing import Iterable, Iterator, List, Set
+
+from goratings.interfaces import GameRecord
+
+__all__ = ["game_waves", "tournament_waves"]
+
+
+def game_waves(games: Iterable[GameRecord], max_wave_size: int = 4096) -> Iterator[List[GameRecord]]:
+    """
+    Groups a time ordered stream of games into "waves" of consecutive games
+    that share no player. Games within a wave are independent of each other,
+    so a wave can be rated in one vectorized update, which gives the result
+    of rating its games one at a time up to the rounding of the vectorized
+    math. A new wave is started as soon as a game involves a player already
+    in the current wave, so every player's games stay in their original
+    order.
+    """
+    wave: List[GameRecord] = []
+    players: Set[int] = set()
+
+    for game in games:
+        if game.black_id in players or game.white_id in players or len(wave) >= max_wave_size:
+            yield wave
+            wave = []
+            players = set()
+        wave.append(game)
+        players.add(game.black_id)
+        players.add(game.white_id)
+
+    if wave:
+        yield wave
+
+
+def tournament_waves(
+    tournaments: Iterable[List[GameRecord]], max_wave_size: int = 4096
+) -> Iterator[List[List[GameRecord]]]:
+    """
+    Groups consecutive tournaments (lists of games, see
+    `EGFGameData.tournaments`) that share no player, so they can be rated
+    together in one `gor_tournament_update` call. `max_wave_size` limits the
+    number of games per wave.
+    """
+    wave: List[List[GameRecord]] = []
+    players: Set[int] = set()
+    num_games = 0
+
+    for tournament in tournaments:
+        tournament_players = {game.black_id for game in tournament} | {game.white_id for game in tournament}
+        if wave and (not players.isdisjoint(tournament_players) or num_games + len(tournament) > max_wave_size):
+            yield wave
+            wave = []
+            players = set()
+            num_games = 0
+        wave.append(tournament)
+        players |= tournament_players
+        num_games += len(tournament)
+
+    if wave:
+        yield wave
@@ -1,24 +1,71 @@
+from .AsyncInMemoryStorage import AsyncInMemoryStorage
+from .AsyncStorageAdapter import AsyncStorageAdapter
 from .CLI import cli, defaults
+from .Checkpoint import load_checkpoint, restore_checkpoint, save_checkpoint
+from .CompactHistory import CompactHistory
 from .Config import config
+from .DenseStorage import DenseStorage
 from .EGFGameData import EGFGameData
-from .GameData import GameData
+from .EntryCodec import EntryCodec
+from .GameData import GameData, batched, games_after
 from .Glicko2Analytics import Glicko2Analytics
+from .Glicko2DailyWindows import Glicko2DailyWindows
+from .Glicko2GlickmanWeeklyWindow import Glicko2GlickmanWeeklyWindow
+from .Glicko2OneGameAtATime import Glicko2OneGameAtATime
+from .Glicko2Table import Glicko2Table
+from .Glicko2TableStorage import Glicko2TableStorage
+from .Glicko2WeeklyWindowNoUnexpectedChanges import Glicko2WeeklyWindowNoUnexpectedChanges
+from .Glicko2WeeklyWindowReduceRatingMovement import Glicko2WeeklyWindowReduceRatingMovement
+from .Glicko2WindowSums import Glicko2WindowSums
 from .GorAnalytics import GorAnalytics
+from .GorOneGameAtATime import GorOneGameAtATime
+from .HistoryPolicy import HistoryPolicy
+from .HistoryRetention import HistoryRetention
+from .HistoryView import HistoryView
 from .InMemoryStorage import InMemoryStorage
+from .InspectedPlayers import inspected_player_ids, inspected_players_file
+from .JournalingStorage import JournalingStorage
+from .MappedStorage import MappedStorage, build_mapped_storage
 from .OGSGameData import OGSGameData
+from .PlayerIndex import PlayerIndex
 from .RatingMath import get_handicap_adjustment, rank_to_rating, rating_to_rank, set_optimizer_rating_points, set_exhaustive_log_parameters
+from .SQLiteStorage import SQLiteStorage
 from .TallyGameAnalytics import TallyGameAnalytics, num2rank
+from .WaveScheduler import game_waves, tournament_waves
 
 __all__ = [
+    "AsyncInMemoryStorage",
+    "AsyncStorageAdapter",
     "cli",
     "config",
+    "CompactHistory",
+    "DenseStorage",
     "defaults",
     "Glicko2Analytics",
+    "Glicko2DailyWindows",
+    "Glicko2GlickmanWeeklyWindow",
+    "Glicko2OneGameAtATime",
+    "Glicko2Table",
+    "Glicko2TableStorage",
+    "Glicko2WeeklyWindowNoUnexpectedChanges",
+    "Glicko2WeeklyWindowReduceRatingMovement",
+    "Glicko2WindowSums",
     "GorAnalytics",
+    "GorOneGameAtATime",
+    "HistoryPolicy",
+    "HistoryRetention",
+    "HistoryView",
     "InMemoryStorage",
+    "JournalingStorage",
+    "MappedStorage",
+    "SQLiteStorage",
     "OGSGameData",
+    "PlayerIndex",
     "EGFGameData",
+    "EntryCodec",
     "GameData",
+    "batched",
+    "games_after",
     "TallyGameAnalytics",
     "rating_to_rank",
     "rank_to_rating",
@@ -27,4 +74,12 @@ __all__ = [
     "num2rank",
     "set_optimizer_rating_points",
     "set_exhaustive_log_parameters",
+    "game_waves",
+    "tournament_waves",
+    "save_checkpoint",
+    "load_checkpoint",
+    "restore_checkpoint",
+    "build_mapped_storage",
+    "inspected_player_ids",
+    "inspected_players_file",
 ]
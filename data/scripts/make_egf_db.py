@@ -61,7 +61,9 @@ c.execute(
         winner_id INTEGER,
         ended INTEGER,
         black_manual_rank_update INTEGER,
-        white_manual_rank_update INTEGER
+        white_manual_rank_update INTEGER,
+        tournament_code TEXT,
+        round INTEGER
     );
 """
 )
@@ -178,7 +180,9 @@ for row in rows:
                 winner_id,
                 ended,
                 black_manual_rank_update,
-                white_manual_rank_update
+                white_manual_rank_update,
+                tournament_code,
+                round
             )
         VALUES
             (
@@ -189,6 +193,8 @@ for row in rows:
                 ?,
                 ?,
                 ?,
+                ?,
+                ?,
                 ?
             )
     """,
@@ -200,7 +206,9 @@ for row in rows:
             winner_id,
             ended,
             black_manual_rank,
-            white_manual_rank
+            white_manual_rank,
+            row[0],
+            int(row[2]),
         ),
     )
 
@@ -216,6 +224,12 @@ c.execute(
     """
 )
 
+c.execute(
+    """
+    CREATE INDEX tournament_round ON game_records (tournament_code, round);
+    """
+)
+
 conn.commit()
 c.close()
 conn.execute("VACUUM")
@@ -0,0 +1,35 @@
+import abc
+from typing import Any, List, Optional, Sequence
+
+__all__ = ["AsyncStorage"]
+
+
+class AsyncStorage(abc.ABC):
+    """
+    Awaitable counterpart of `Storage` for rating state that lives in a
+    database. Every operation works on many players at once, so a batch of
+    games costs a few round trips instead of one per player and field.
+    """
+
+    @abc.abstractmethod
+    async def get_many(self, player_ids: Sequence[int]) -> List[Optional[Any]]:
+        """ Returns the entries of the players, None for players without an entry """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def set_many(self, player_ids: Sequence[int], entries: Sequence[Any]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_timeout_flags(self, player_ids: Sequence[int]) -> List[bool]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def set_timeout_flags(self, player_ids: Sequence[int], flags: Sequence[bool]) -> None:
+        raise NotImplementedError
+
+    async def get(self, player_id: int) -> Optional[Any]:
+        return (await self.get_many([player_id]))[0]
+
+    async def set(self, player_id: int, entry: Any) -> None:
+        await self.set_many([player_id], [entry])
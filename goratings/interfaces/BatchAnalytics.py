@@ -0,0 +1,71 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .GameAnalytics import GameAnalytics
+from .GameRecord import GameRecord
+
+__all__ = ["BatchAnalytics"]
+
+
+class BatchAnalytics:
+    """
+    Columnar analytics for a batch of games, as returned by
+    `RatingSystem.process_batch`. Every column has one entry per game. Values
+    a rating system does not provide (e.g. deviations for GoR) and the values
+    of skipped games are NaN.
+
+    `analytics` optionally keeps the per-game `GameAnalytics` objects for
+    consumers that still work one game at a time.
+    """
+
+    columns = (
+        "expected_win_rate",
+        "black_rating",
+        "white_rating",
+        "black_deviation",
+        "white_deviation",
+        "black_rank",
+        "white_rank",
+        "black_updated_rating",
+        "white_updated_rating",
+    )
+
+    games: Sequence[GameRecord]
+    skipped: np.ndarray
+    expected_win_rate: np.ndarray  # probability that black will win
+    black_rating: np.ndarray
+    white_rating: np.ndarray
+    black_deviation: np.ndarray
+    white_deviation: np.ndarray
+    black_rank: np.ndarray
+    white_rank: np.ndarray
+    black_updated_rating: np.ndarray
+    white_updated_rating: np.ndarray
+    analytics: Optional[List[GameAnalytics]]
+
+    def __init__(self, games: Sequence[GameRecord], skipped: np.ndarray, **columns: np.ndarray) -> None:
+        self.games = games
+        self.skipped = np.asarray(skipped, dtype=bool)
+        for name in self.columns:
+            column = columns.pop(name, None)
+            setattr(self, name, np.full(len(games), np.nan) if column is None else np.asarray(column, dtype=np.float64))
+        if columns:
+            raise TypeError("Unknown analytics columns: %s" % ", ".join(sorted(columns)))
+        self.analytics = None
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    @classmethod
+    def from_analytics(cls, analytics: Sequence[GameAnalytics]) -> "BatchAnalytics":
+        """ Collects per-game analytics into columns, keeping the objects in `analytics` """
+        skipped = np.array([a.skipped for a in analytics], dtype=bool)
+        columns = {}
+        for name in cls.columns:
+            column = np.array([getattr(a, name, np.nan) for a in analytics], dtype=np.float64)
+            column[skipped] = np.nan
+            columns[name] = column
+        ret = cls([a.game for a in analytics], skipped, **columns)
+        ret.analytics = list(analytics)
+        return ret
@@ -0,0 +1,199 @@
+from math import isnan
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from .GameRecord import GameRecord
+
+__all__ = ["GameBatch", "GameRecordView"]
+
+
+class GameBatch:
+    """
+    Struct of arrays holding many games, one NumPy column per `GameRecord`
+    field. The speed code (1 blitz, 2 live, 3 correspondence) is computed once
+    for the whole batch. Manual rank updates are stored as floats with NaN
+    standing for `None`. This is the compact form for keeping many games
+    around, e.g. the match history written by `analysis.util.Checkpoint`.
+
+    Indexing or iterating gives `GameRecordView`s, which read straight from
+    the columns, for code that still works one `GameRecord` at a time.
+    """
+
+    game_id: np.ndarray
+    size: np.ndarray
+    handicap: np.ndarray
+    komi: np.ndarray
+    black_id: np.ndarray
+    white_id: np.ndarray
+    time_per_move: np.ndarray
+    timeout: np.ndarray
+    winner_id: np.ndarray
+    ended: np.ndarray
+    black_manual_rank_update: np.ndarray
+    white_manual_rank_update: np.ndarray
+    speed: np.ndarray
+
+    def __init__(
+        self,
+        game_id: np.ndarray,
+        size: np.ndarray,
+        handicap: np.ndarray,
+        komi: np.ndarray,
+        black_id: np.ndarray,
+        white_id: np.ndarray,
+        time_per_move: np.ndarray,
+        timeout: np.ndarray,
+        winner_id: np.ndarray,
+        ended: np.ndarray,
+        black_manual_rank_update: Optional[np.ndarray] = None,
+        white_manual_rank_update: Optional[np.ndarray] = None,
+    ) -> None:
+        self.game_id = np.asarray(game_id, dtype=np.int64)
+        self.size = np.asarray(size, dtype=np.int16)
+        self.handicap = np.asarray(handicap, dtype=np.int16)
+        self.komi = np.asarray(komi, dtype=np.float64)
+        self.black_id = np.asarray(black_id, dtype=np.int64)
+        self.white_id = np.asarray(white_id, dtype=np.int64)
+        self.time_per_move = np.asarray(time_per_move, dtype=np.int64)
+        self.timeout = np.asarray(timeout, dtype=bool)
+        self.winner_id = np.asarray(winner_id, dtype=np.int64)
+        self.ended = np.asarray(ended, dtype=np.int64)
+        n = len(self.game_id)
+        if black_manual_rank_update is None:
+            black_manual_rank_update = np.full(n, np.nan)
+        if white_manual_rank_update is None:
+            white_manual_rank_update = np.full(n, np.nan)
+        self.black_manual_rank_update = np.asarray(black_manual_rank_update, dtype=np.float64)
+        self.white_manual_rank_update = np.asarray(white_manual_rank_update, dtype=np.float64)
+
+        # same thresholds as GameRecord.speed
+        tpm = self.time_per_move
+        self.speed = np.where((tpm == 0) | (tpm > 3600), 3, np.where(tpm > 15, 2, 1)).astype(np.int8)
+
+    @classmethod
+    def from_records(cls, records: Iterable[GameRecord]) -> "GameBatch":
+        records = list(records)
+
+        def manual_rank(rank: Optional[float]) -> float:
+            return np.nan if rank is None else float(rank)
+
+        return cls(
+            np.array([r.game_id for r in records], dtype=np.int64),
+            np.array([r.size for r in records], dtype=np.int16),
+            np.array([r.handicap for r in records], dtype=np.int16),
+            np.array([r.komi for r in records], dtype=np.float64),
+            np.array([r.black_id for r in records], dtype=np.int64),
+            np.array([r.white_id for r in records], dtype=np.int64),
+            np.array([r.time_per_move for r in records], dtype=np.int64),
+            np.array([r.timeout for r in records], dtype=bool),
+            np.array([r.winner_id for r in records], dtype=np.int64),
+            np.array([r.ended for r in records], dtype=np.int64),
+            np.array([manual_rank(r.black_manual_rank_update) for r in records], dtype=np.float64),
+            np.array([manual_rank(r.white_manual_rank_update) for r in records], dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.game_id)
+
+    def __getitem__(self, index: int) -> "GameRecordView":
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return GameRecordView(self, index)
+
+    def __iter__(self) -> Iterator["GameRecordView"]:
+        for index in range(len(self)):
+            yield GameRecordView(self, index)
+
+    def record(self, index: int) -> GameRecord:
+        """ Returns a standalone `GameRecord` copy of a row """
+        view = self[index]
+        return GameRecord(
+            view.game_id,
+            view.size,
+            view.handicap,
+            view.komi,
+            view.black_id,
+            view.white_id,
+            view.time_per_move,
+            view.timeout,
+            view.winner_id,
+            view.ended,
+            view.black_manual_rank_update,
+            view.white_manual_rank_update,
+        )
+
+
+class GameRecordView:
+    """
+    Read only, zero-copy view of one row of a `GameBatch` with the same
+    attributes as `GameRecord`.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    _batch: GameBatch
+    _index: int
+
+    def __init__(self, batch: GameBatch, index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    def __str__(self) -> str:
+        return "%d\t%d %d vs. %d" % (self.ended, self.game_id, self.black_id, self.white_id,)
+
+    @property
+    def game_id(self) -> int:
+        return int(self._batch.game_id[self._index])
+
+    @property
+    def size(self) -> int:
+        return int(self._batch.size[self._index])
+
+    @property
+    def handicap(self) -> int:
+        return int(self._batch.handicap[self._index])
+
+    @property
+    def komi(self) -> float:
+        return float(self._batch.komi[self._index])
+
+    @property
+    def black_id(self) -> int:
+        return int(self._batch.black_id[self._index])
+
+    @property
+    def white_id(self) -> int:
+        return int(self._batch.white_id[self._index])
+
+    @property
+    def time_per_move(self) -> int:
+        return int(self._batch.time_per_move[self._index])
+
+    @property
+    def timeout(self) -> bool:
+        return bool(self._batch.timeout[self._index])
+
+    @property
+    def winner_id(self) -> int:
+        return int(self._batch.winner_id[self._index])
+
+    @property
+    def ended(self) -> int:
+        return int(self._batch.ended[self._index])
+
+    @property
+    def black_manual_rank_update(self) -> Optional[float]:
+        rank = float(self._batch.black_manual_rank_update[self._index])
+        return None if isnan(rank) else rank
+
+    @property
+    def white_manual_rank_update(self) -> Optional[float]:
+        rank = float(self._batch.white_manual_rank_update[self._index])
+        return None if isnan(rank) else rank
+
+    @property
+    def speed(self) -> int:
+        return int(self._batch.speed[self._index])
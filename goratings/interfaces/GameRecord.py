@@ -4,18 +4,35 @@ __all__ = ["GameRecord"]
 
 
 class GameRecord:
+    __slots__ = (
+        "game_id",
+        "size",
+        "handicap",
+        "komi",
+        "black_id",
+        "white_id",
+        "_time_per_move",
+        "_speed",
+        "timeout",
+        "winner_id",
+        "ended",
+        "black_manual_rank_update",
+        "white_manual_rank_update",
+    )
+
     game_id: int
     size: int
     handicap: int
     komi: float
     black_id: int
     white_id: int
-    time_per_move: int
+    _time_per_move: int
+    _speed: int
     timeout: bool
     winner_id: int
     ended: int  # timestamp, seconds since epoch
-    black_manual_rank_update: Optional[int]  #
-    white_manual_rank_update: Optional[int]  #
+    black_manual_rank_update: Optional[float]  #
+    white_manual_rank_update: Optional[float]  #
 
     def __init__(
         self,
@@ -29,8 +46,8 @@ class GameRecord:
         timeout: bool,
         winner_id: int,
         ended: int,
-        black_manual_rank_update: Optional[int] = None,
-        white_manual_rank_update: Optional[int] = None,
+        black_manual_rank_update: Optional[float] = None,
+        white_manual_rank_update: Optional[float] = None,
     ):
         self.game_id = game_id
         self.size = size
@@ -48,10 +65,23 @@ class GameRecord:
     def __str__(self) -> str:
         return "%d\t%d %d vs. %d" % (self.ended, self.game_id, self.black_id, self.white_id,)
 
+    @property
+    def time_per_move(self) -> int:
+        return self._time_per_move
+
+    @time_per_move.setter
+    def time_per_move(self, time_per_move: int) -> None:
+        self._time_per_move = time_per_move
+        self._speed = _speed_code(time_per_move)
+
     @property
     def speed(self) -> int:
-        if self.time_per_move == 0 or self.time_per_move > 3600:
-            return 3  # correspondence
-        if self.time_per_move > 15:
-            return 2  # live
-        return 1  # blitz
+        return self._speed
+
+
+def _speed_code(time_per_move: int) -> int:
+    if time_per_move == 0 or time_per_move > 3600:
+        return 3  # correspondence
+    if time_per_move > 15:
+        return 2  # live
+    return 1  # blitz
@@ -1,5 +1,7 @@
 import abc
+from typing import Iterable
 
+from .BatchAnalytics import BatchAnalytics
 from .GameAnalytics import GameAnalytics
 from .GameRecord import GameRecord
 
@@ -10,3 +12,11 @@ class RatingSystem(abc.ABC):
     @abc.abstractmethod
     def process_game(self, game: GameRecord) -> GameAnalytics:
         raise NotImplementedError
+
+    def process_batch(self, games: Iterable[GameRecord]) -> BatchAnalytics:
+        """
+        Processes games in order and returns their analytics in columnar form.
+        This default simply calls `process_game` for every game, rating
+        systems that can amortize work over many games override it.
+        """
+        return BatchAnalytics.from_analytics([self.process_game(game) for game in games])
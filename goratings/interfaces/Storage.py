@@ -1,5 +1,5 @@
 import abc
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional
 
 __all__ = ["Storage"]
 
@@ -13,6 +13,24 @@ class Storage(abc.ABC):
     def set(self, player_id: int, entry: Any) -> None:
         raise NotImplementedError
 
+    def get_many(self, player_ids: Iterable[int]) -> List[Any]:
+        """ `get` for many players at once, ids may also be given as a NumPy array """
+        get_entry = self.get
+        return [get_entry(player_id) for player_id in _ids(player_ids)]
+
+    def set_many(self, player_ids: Iterable[int], entries: Iterable[Any]) -> None:
+        """ `set` for many players at once, ids may also be given as a NumPy array """
+        set_entry = self.set
+        for player_id, entry in zip(_ids(player_ids), entries):
+            set_entry(player_id, entry)
+
+    def peek(self, player_id: int) -> Optional[Any]:
+        """
+        Returns the entry of a player, or None for players that have no entry
+        yet. Unlike `get` this never creates an entry.
+        """
+        return self.all_players().get(player_id)
+
     @abc.abstractmethod
     def get_set_count(self, player_id: int) -> int:
         raise NotImplementedError
@@ -32,3 +50,12 @@ class Storage(abc.ABC):
     @abc.abstractmethod
     def set_timeout_flag(self, player_id: int, tf: bool) -> None:
         raise NotImplementedError
+
+
+def _ids(player_ids: Iterable[int]) -> Iterable[int]:
+    # NumPy arrays are turned into plain ints, so they don't end up as keys
+    tolist = getattr(player_ids, "tolist", None)
+    if tolist is not None:
+        ret: List[int] = tolist()
+        return ret
+    return player_ids
@@ -1,11 +1,18 @@
+from .AsyncStorage import AsyncStorage
+from .BatchAnalytics import BatchAnalytics
 from .GameAnalytics import GameAnalytics
+from .GameBatch import GameBatch, GameRecordView
 from .GameRecord import GameRecord
 from .RatingSystem import RatingSystem
 from .Storage import Storage
 
 __all__ = [
+    "AsyncStorage",
+    "BatchAnalytics",
     "GameAnalytics",
+    "GameBatch",
     "GameRecord",
+    "GameRecordView",
     "RatingSystem",
     "Storage",
 ]
@@ -1,11 +1,45 @@
-from .glicko2 import Glicko2Entry, glicko2_configure, glicko2_update
-from .gor import GorEntry, gor_configure, gor_update
+from .glicko2 import (
+    Glicko2Config,
+    Glicko2Entry,
+    VolatilitySolution,
+    VolatilityTelemetry,
+    glicko2_configure,
+    glicko2_expand_deviation_batch,
+    glicko2_match_terms,
+    glicko2_update,
+    glicko2_update_batch,
+    glicko2_update_from_sums,
+    glicko2_update_pair,
+    glicko2_volatility_batch,
+    glicko2_win_probability_matrix,
+)
+from .gor import (
+    GorEntry,
+    gor_configure,
+    gor_tournament_update,
+    gor_update,
+    gor_update_batch,
+    gor_win_probability_matrix,
+)
 
 __all__ = [
     "GorEntry",
     "gor_configure",
+    "gor_tournament_update",
     "gor_update",
+    "gor_update_batch",
+    "gor_win_probability_matrix",
+    "Glicko2Config",
     "Glicko2Entry",
     "glicko2_configure",
+    "glicko2_expand_deviation_batch",
+    "glicko2_match_terms",
     "glicko2_update",
+    "glicko2_update_batch",
+    "glicko2_update_from_sums",
+    "glicko2_update_pair",
+    "glicko2_volatility_batch",
+    "glicko2_win_probability_matrix",
+    "VolatilitySolution",
+    "VolatilityTelemetry",
 ]
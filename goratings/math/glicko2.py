@@ -1,7 +1,23 @@
 from math import exp, log, pi, sqrt
-from typing import List, Tuple
-
-__all__ = ["Glicko2Entry", "glicko2_update", "glicko2_configure"]
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+__all__ = [
+    "Glicko2Config",
+    "Glicko2Entry",
+    "VolatilitySolution",
+    "VolatilityTelemetry",
+    "glicko2_match_terms",
+    "glicko2_update",
+    "glicko2_update_batch",
+    "glicko2_update_from_sums",
+    "glicko2_update_pair",
+    "glicko2_volatility_batch",
+    "glicko2_win_probability_matrix",
+    "glicko2_expand_deviation_batch",
+    "glicko2_configure",
+]
 
 
 EPSILON = 0.000001
@@ -20,6 +36,47 @@ PROVISIONAL_RATING_CUTOFF = 160.0
 GLICKO2_SCALE = 173.7178
 
 
+class Glicko2Config:
+    """
+    System constants and clamps used by the Glicko-2 update. Every update
+    function takes an optional config, when none is given the module wide
+    configuration set up by `glicko2_configure` is used. Passing configs
+    explicitly allows evaluating several configurations in one process.
+    """
+
+    tao: float
+    min_rd: float
+    max_rd: float
+    min_volatility: float
+    max_volatility: float
+    min_rating: float
+    max_rating: float
+    epsilon: float
+
+    def __init__(
+        self,
+        tao: float = TAO,
+        min_rd: float = MIN_RD,
+        max_rd: float = MAX_RD,
+        min_volatility: float = MIN_VOLATILITY,
+        max_volatility: float = MAX_VOLATILITY,
+        min_rating: float = MIN_RATING,
+        max_rating: float = MAX_RATING,
+        epsilon: float = EPSILON,
+    ) -> None:
+        self.tao = tao
+        self.min_rd = min_rd
+        self.max_rd = max_rd
+        self.min_volatility = min_volatility
+        self.max_volatility = max_volatility
+        self.min_rating = min_rating
+        self.max_rating = max_rating
+        self.epsilon = epsilon
+
+
+_config = Glicko2Config()
+
+
 class Glicko2Entry:
     rating: float
     deviation: float
@@ -46,16 +103,32 @@ class Glicko2Entry:
         ret = Glicko2Entry(self.rating + rating_adjustment, self.deviation + rd_adjustment, self.volatility,)
         return ret
 
-    def expand_deviation_because_no_games_played(self, n_periods: int = 1) -> "Glicko2Entry":
+    def expand_deviation_because_no_games_played(
+        self, n_periods: int = 1, config: Optional[Glicko2Config] = None, closed_form: bool = False
+    ) -> "Glicko2Entry":
         # Implementation as defined by:
         #   http://www.glicko.net/glicko/glicko2.pdf (note after step 8)
-
-        global MAX_RD
-        global MIN_RD
+        #
+        # Each period only adds volatility ** 2 to phi ** 2, so with
+        # `closed_form` all periods after the first are applied in one step.
+        # The deviation never shrinks after the first period, so from then on
+        # only max_rd can clamp it, and once clamped it stays at max_rd. The
+        # result agrees with the loop to 1e-12 relative (the unit tests' bound,
+        # typically 1e-14), but not bit for bit, so the loop is the default.
+        if config is None:
+            config = _config
+
+        if closed_form and n_periods > 1:
+            self.expand_deviation_because_no_games_played(1, config)
+            if self.deviation < config.max_rd:
+                phi_prime = sqrt(self.phi ** 2 + (n_periods - 1) * self.volatility ** 2)
+                self.deviation = min(config.max_rd, max(config.min_rd, GLICKO2_SCALE * phi_prime))
+                self.phi = self.deviation / GLICKO2_SCALE
+            return self
 
         for _i in range(n_periods):
             phi_prime = sqrt(self.phi ** 2 + self.volatility ** 2)
-            self.deviation = min(MAX_RD, max(MIN_RD, GLICKO2_SCALE * phi_prime))
+            self.deviation = min(config.max_rd, max(config.min_rd, GLICKO2_SCALE * phi_prime))
             self.phi = self.deviation / GLICKO2_SCALE
 
         return self
@@ -85,8 +158,62 @@ class Glicko2Entry:
         return E
 
 
-def glicko2_update(player: Glicko2Entry, matches: List[Tuple[Glicko2Entry, int]]) -> Glicko2Entry:
+def glicko2_win_probability_matrix(
+    rating: np.ndarray,
+    deviation: np.ndarray,
+    opponent_rating: np.ndarray,
+    handicap_adjustment: Callable[[float, int], float],
+    handicaps: Optional[Iterable[int]] = None,
+    ignore_g: bool = False,
+) -> np.ndarray:
+    """
+    Vectorized `Glicko2Entry.expected_win_probability` for every pairing of
+    `N` players with `M` opponents at every handicap. Entry `[h, i, j]` is
+    the probability that player `i` (taking black) beats opponent `j` at
+    `handicaps[h]`, the result has shape `(H, N, M)`. The handicaps default
+    to 0 through 9.
+
+    `handicap_adjustment(rating, handicap)` gives the rating adjustment of a
+    player, as in `get_handicap_adjustment`. It is called once per player and
+    handicap, not per pairing. As in the scalar method, g only depends on the
+    player's deviation.
+    """
+    rating = np.asarray(rating, dtype=np.float64)
+    deviation = np.asarray(deviation, dtype=np.float64)
+    opponent_rating = np.asarray(opponent_rating, dtype=np.float64)
+    if handicaps is None:
+        handicaps = range(10)
+    q = 0.0057565
+
+    adjustment = np.array(
+        [[handicap_adjustment(r, handicap) for r in rating.tolist()] for handicap in handicaps], dtype=np.float64
+    ).reshape(-1, len(rating))
+    if ignore_g:
+        g = 1 / np.sqrt(1 + 3 * q ** 2 * (deviation ** 2) / pi ** 2)
+    else:
+        g = np.ones(len(rating))
+
+    E: np.ndarray = 1 / (
+        1
+        + (
+            10
+            ** (
+                -g[np.newaxis, :, np.newaxis]
+                * (rating[np.newaxis, :, np.newaxis] + adjustment[:, :, np.newaxis] - opponent_rating)
+                / 400
+            )
+        )
+    )
+    return E
+
+
+def glicko2_update(
+    player: Glicko2Entry, matches: List[Tuple[Glicko2Entry, int]], config: Optional[Glicko2Config] = None
+) -> Glicko2Entry:
     # Implementation as defined by: http://www.glicko.net/glicko/glicko2.pdf
+    if config is None:
+        config = _config
+
     if len(matches) == 0:
         return player.copy()
 
@@ -103,36 +230,69 @@ def glicko2_update(player: Glicko2Entry, matches: List[Tuple[Glicko2Entry, int]]
         v_sum += g_phi_j ** 2 * E * (1 - E)
         delta_sum += g_phi_j * (outcome - E)
 
-    v = 1.0 / v_sum if v_sum else 9999
-    delta = v * delta_sum
+    # steps 5 - 8
+    ret = player.copy()
+    _glicko2_apply(ret, player.mu, player.phi, player.volatility, v_sum, delta_sum, config)
+    return ret
 
-    # step 5
-    a = log(player.volatility ** 2)
 
-    def f(x: float) -> float:
-        ex = exp(x)
-        return (ex * (delta ** 2 - player.phi ** 2 - v - ex) / (2 * ((player.phi ** 2 + v + ex) ** 2))) - (
-            (x - a) / (TAO ** 2)
-        )
+def glicko2_match_terms(player: Glicko2Entry, opponent: Glicko2Entry, outcome: float) -> Tuple[float, float]:
+    """
+    Returns the contribution of a single match to the step 3 / 4 sums of
+    `glicko2_update` as `(v_term, delta_term)`. Adding these up in match order
+    and passing the totals to `glicko2_update_from_sums` gives exactly the
+    result of `glicko2_update(player, matches)`, which lets callers keep
+    running sums for a rating period instead of revisiting every match.
+    """
+    g_phi_j = 1 / sqrt(1 + (3 * opponent.phi ** 2) / (pi ** 2))
+    E = 1 / (1 + exp(-g_phi_j * (player.mu - opponent.mu)))
+    return g_phi_j ** 2 * E * (1 - E), g_phi_j * (outcome - E)
+
+
+def glicko2_update_from_sums(
+    player: Glicko2Entry, v_sum: float, delta_sum: float, config: Optional[Glicko2Config] = None
+) -> Glicko2Entry:
+    """
+    Steps 5 - 8 of `glicko2_update` for precomputed sums (see
+    `glicko2_match_terms`). The sums must cover at least one match.
+    """
+    if config is None:
+        config = _config
+
+    ret = player.copy()
+    _glicko2_apply(ret, player.mu, player.phi, player.volatility, v_sum, delta_sum, config)
+    return ret
+
+
+def _volatility_f(x: float, a: float, delta2: float, phi2: float, v: float, tao: float) -> float:
+    ex = exp(x)
+    return (ex * (delta2 - phi2 - v - ex) / (2 * ((phi2 + v + ex) ** 2))) - ((x - a) / (tao ** 2))
+
+
+def _glicko2_volatility(phi: float, volatility: float, v: float, delta: float, config: Glicko2Config) -> float:
+    tao = config.tao
+    a = log(volatility ** 2)
+    delta2 = delta ** 2
+    phi2 = phi ** 2
 
     A = a
-    if delta ** 2 > player.phi ** 2 + v:
-        B = log(delta ** 2 - player.phi ** 2 - v)
+    if delta2 > phi2 + v:
+        B = log(delta2 - phi2 - v)
     else:
         k = 1
         safety = 100
-        while f(a - k * TAO) < 0 and safety > 0:  # pragma: no cover
+        while _volatility_f(a - k * tao, a, delta2, phi2, v, tao) < 0 and safety > 0:  # pragma: no cover
             safety -= 1
             k += 1
-        B = a - k * TAO
+        B = a - k * tao
 
-    fA = f(A)
-    fB = f(B)
+    fA = _volatility_f(A, a, delta2, phi2, v, tao)
+    fB = _volatility_f(B, a, delta2, phi2, v, tao)
     safety = 100
 
-    while abs(B - A) > EPSILON and safety > 0:
+    while abs(B - A) > config.epsilon and safety > 0:
         C = A + (A - B) * fA / (fB - fA)
-        fC = f(C)
+        fC = _volatility_f(C, a, delta2, phi2, v, tao)
         if fC * fB <= 0:
             A = B
             fA = fB
@@ -143,21 +303,347 @@ def glicko2_update(player: Glicko2Entry, matches: List[Tuple[Glicko2Entry, int]]
 
         safety -= 1
 
-    new_volatility = exp(A / 2)
+    return exp(A / 2)
+
+
+def glicko2_update_pair(
+    black: Glicko2Entry,
+    white: Glicko2Entry,
+    black_handicap_adjustment: float,
+    white_handicap_adjustment: float,
+    black_outcome: float,
+    white_outcome: float,
+    config: Optional[Glicko2Config] = None,
+) -> None:
+    """
+    Rates a single game between `black` and `white`, updating both entries in
+    place. This gives the same result as
+
+        glicko2_update(black, [(white.copy(-white_handicap_adjustment), black_outcome)])
+        glicko2_update(white, [(black.copy(black_handicap_adjustment), white_outcome)])
+
+    but without building match lists, opponent copies or new entries.
+    """
+    if config is None:
+        config = _config
+
+    # Both updates are computed from the state before the game
+    black_mu = black.mu
+    black_phi = black.phi
+    white_mu = white.mu
+    white_phi = white.phi
+
+    # step 3 / 4, each side has exactly one opponent
+    g_black = 1 / sqrt(1 + (3 * black_phi ** 2) / (pi ** 2))
+    g_white = 1 / sqrt(1 + (3 * white_phi ** 2) / (pi ** 2))
+    white_as_opponent_mu = (white.rating - white_handicap_adjustment - 1500) / GLICKO2_SCALE
+    black_as_opponent_mu = (black.rating + black_handicap_adjustment - 1500) / GLICKO2_SCALE
+    E_black = 1 / (1 + exp(-g_white * (black_mu - white_as_opponent_mu)))
+    E_white = 1 / (1 + exp(-g_black * (white_mu - black_as_opponent_mu)))
+
+    black_v_sum = g_white ** 2 * E_black * (1 - E_black)
+    black_delta_sum = g_white * (black_outcome - E_black)
+    white_v_sum = g_black ** 2 * E_white * (1 - E_white)
+    white_delta_sum = g_black * (white_outcome - E_white)
+
+    black_volatility = black.volatility
+    white_volatility = white.volatility
+    _glicko2_apply(black, black_mu, black_phi, black_volatility, black_v_sum, black_delta_sum, config)
+    _glicko2_apply(white, white_mu, white_phi, white_volatility, white_v_sum, white_delta_sum, config)
+
+
+def _glicko2_apply(
+    entry: Glicko2Entry,
+    mu: float,
+    phi: float,
+    volatility: float,
+    v_sum: float,
+    delta_sum: float,
+    config: Glicko2Config,
+) -> None:
+    # Steps 5 - 8 of the update given the sums from steps 3 / 4, the result
+    # is written into `entry`.
+    v = 1.0 / v_sum if v_sum else 9999
+    delta = v * delta_sum
+
+    # step 5
+    new_volatility = _glicko2_volatility(phi, volatility, v, delta, config)
 
     # step 6
-    phi_star = sqrt(player.phi ** 2 + new_volatility ** 2)
+    phi_star = sqrt(phi ** 2 + new_volatility ** 2)
 
     # step 7
     phi_prime = 1 / sqrt(1 / phi_star ** 2 + 1 / v)
-    mu_prime = player.mu + (phi_prime ** 2) * delta_sum
+    mu_prime = mu + (phi_prime ** 2) * delta_sum
 
     # step 8
-    ret = Glicko2Entry(
-        rating=min(MAX_RATING, max(MIN_RATING, GLICKO2_SCALE * mu_prime + 1500)),
-        deviation=min(MAX_RD, max(MIN_RD, GLICKO2_SCALE * phi_prime)),
-        volatility=min(0.15, max(0.01, new_volatility)),
+    entry.rating = min(config.max_rating, max(config.min_rating, GLICKO2_SCALE * mu_prime + 1500))
+    entry.deviation = min(config.max_rd, max(config.min_rd, GLICKO2_SCALE * phi_prime))
+    entry.volatility = min(config.max_volatility, max(config.min_volatility, new_volatility))
+    entry.mu = (entry.rating - 1500) / GLICKO2_SCALE
+    entry.phi = entry.deviation / GLICKO2_SCALE
+
+
+class VolatilitySolution:
+    """
+    Result of `glicko2_volatility_batch`. Besides the new volatilities this
+    records, per lane, how many Illinois iterations were run, how often the
+    bracketing loop had to step `k`, and whether the iteration stopped at the
+    safety limit without converging.
+    """
+
+    volatility: np.ndarray
+    iterations: np.ndarray
+    bracket_steps: np.ndarray
+    exhausted: np.ndarray
+
+    def __init__(
+        self, volatility: np.ndarray, iterations: np.ndarray, bracket_steps: np.ndarray, exhausted: np.ndarray,
+    ) -> None:
+        self.volatility = volatility
+        self.iterations = iterations
+        self.bracket_steps = bracket_steps
+        self.exhausted = exhausted
+
+
+class VolatilityTelemetry:
+    """
+    Running totals over many `VolatilitySolution`s, intended to be passed to
+    `glicko2_update_batch` for a whole replay.
+    """
+
+    lanes: int
+    iterations: int
+    max_iterations: int
+    exhausted: int
+    bracket_loop_lanes: int
+    bracket_steps: int
+
+    def __init__(self) -> None:
+        self.lanes = 0
+        self.iterations = 0
+        self.max_iterations = 0
+        self.exhausted = 0
+        self.bracket_loop_lanes = 0
+        self.bracket_steps = 0
+
+    def add(self, solution: VolatilitySolution) -> None:
+        self.lanes += len(solution.volatility)
+        self.iterations += int(solution.iterations.sum())
+        self.max_iterations = max(self.max_iterations, int(solution.iterations.max(initial=0)))
+        self.exhausted += int(solution.exhausted.sum())
+        self.bracket_loop_lanes += int(np.count_nonzero(solution.bracket_steps))
+        self.bracket_steps += int(solution.bracket_steps.sum())
+
+    def __str__(self) -> str:
+        return "%d lanes, %.2f iterations avg (max %d), %d hit the safety limit, %d needed %d bracketing steps" % (
+            self.lanes,
+            self.iterations / self.lanes if self.lanes else 0.0,
+            self.max_iterations,
+            self.exhausted,
+            self.bracket_loop_lanes,
+            self.bracket_steps,
+        )
+
+
+def glicko2_volatility_batch(
+    phi: np.ndarray,
+    volatility: np.ndarray,
+    v: np.ndarray,
+    delta: np.ndarray,
+    max_iterations: int = 100,
+    config: Optional[Glicko2Config] = None,
+) -> VolatilitySolution:
+    """
+    Step 5 of `glicko2_update` (the volatility root finding) for many lanes
+    at once. Lanes are masked out as soon as they meet the scalar stopping
+    rule, so each lane follows the scalar iteration up to the rounding
+    differences described in `glicko2_update_batch`.
+    """
+    if config is None:
+        config = _config
+    tao = config.tao
+    phi = np.asarray(phi, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    delta = np.asarray(delta, dtype=np.float64)
+    a = np.log(volatility ** 2)
+
+    def f(x: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        ex = np.exp(x)
+        phi2 = phi[idx] ** 2
+        ret: np.ndarray = (ex * (delta[idx] ** 2 - phi2 - v[idx] - ex) / (2 * ((phi2 + v[idx] + ex) ** 2))) - (
+            (x - a[idx]) / (tao ** 2)
+        )
+        return ret
+
+    A = a.copy()
+    B = np.empty_like(a)
+    bracketed = delta ** 2 > phi ** 2 + v
+    B[bracketed] = np.log(delta[bracketed] ** 2 - phi[bracketed] ** 2 - v[bracketed])
+
+    idx = np.flatnonzero(~bracketed)
+    k = np.ones(len(a))
+    safety = max_iterations
+    while len(idx) and safety > 0:
+        idx = idx[f(a[idx] - k[idx] * tao, idx) < 0]
+        k[idx] += 1
+        safety -= 1
+    unbracketed = ~bracketed
+    B[unbracketed] = a[unbracketed] - k[unbracketed] * tao
+
+    all_lanes = np.arange(len(a))
+    fA = f(A, all_lanes)
+    fB = f(B, all_lanes)
+    iterations = np.zeros(len(a), dtype=np.int64)
+
+    idx = all_lanes
+    safety = max_iterations
+    with np.errstate(divide="ignore", invalid="ignore"):
+        while True:
+            idx = idx[np.abs(B[idx] - A[idx]) > config.epsilon]
+            if not len(idx) or safety <= 0:
+                break
+            C = A[idx] + (A[idx] - B[idx]) * fA[idx] / (fB[idx] - fA[idx])
+            fC = f(C, idx)
+            swap = fC * fB[idx] <= 0
+            A[idx[swap]] = B[idx[swap]]
+            fA[idx[swap]] = fB[idx[swap]]
+            fA[idx[~swap]] = fA[idx[~swap]] / 2
+            B[idx] = C
+            fB[idx] = fC
+
+            iterations[idx] += 1
+            safety -= 1
+
+    exhausted = np.zeros(len(a), dtype=bool)
+    exhausted[idx] = True
+
+    return VolatilitySolution(
+        volatility=np.exp(A / 2), iterations=iterations, bracket_steps=(k - 1).astype(np.int64), exhausted=exhausted,
     )
+
+
+def glicko2_update_batch(
+    mu: np.ndarray,
+    phi: np.ndarray,
+    volatility: np.ndarray,
+    offsets: np.ndarray,
+    opponent_mu: np.ndarray,
+    opponent_phi: np.ndarray,
+    outcomes: np.ndarray,
+    telemetry: Optional[VolatilityTelemetry] = None,
+    config: Optional[Glicko2Config] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized version of `glicko2_update` for many players at once.
+
+    `mu`, `phi` and `volatility` hold the state of `n` players on the
+    Glicko-2 scale. The matches are given in CSR form: the opponents of player
+    `i` are `opponent_mu[offsets[i]:offsets[i + 1]]` and
+    `opponent_phi[offsets[i]:offsets[i + 1]]`, with the matching `outcomes`,
+    so `offsets` has `n + 1` entries.
+
+    Returns the updated `(mu, phi, volatility)` arrays, clamped the same way
+    `glicko2_update` clamps its result. Players without matches are returned
+    unchanged. If `telemetry` is given, the volatility solver statistics of
+    this call are added to it.
+
+    The result is approximate: NumPy's exp, log and squaring can differ from
+    the math module's in the last bit, so lanes agree with `glicko2_update`
+    only to within rounding, not bit for bit. Use the scalar functions where
+    results must match a sequential replay exactly.
+    """
+    if config is None:
+        config = _config
+
+    mu = np.asarray(mu, dtype=np.float64)
+    phi = np.asarray(phi, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    opponent_mu = np.asarray(opponent_mu, dtype=np.float64)
+    opponent_phi = np.asarray(opponent_phi, dtype=np.float64)
+    outcomes = np.asarray(outcomes, dtype=np.float64)
+
+    n = len(mu)
+    counts = np.diff(offsets)
+    owner = np.repeat(np.arange(n), counts)
+
+    # step 3 / 4, compute 'v' and delta. bincount accumulates in match order,
+    # so the sums come out the same as the running sums in glicko2_update.
+    g_phi_j = 1 / np.sqrt(1 + (3 * opponent_phi ** 2) / (pi ** 2))
+    E = 1 / (1 + np.exp(-g_phi_j * (mu[owner] - opponent_mu)))
+    v_sum = np.bincount(owner, weights=g_phi_j ** 2 * E * (1 - E), minlength=n)
+    delta_sum = np.bincount(owner, weights=g_phi_j * (outcomes - E), minlength=n)
+
+    has_matches = counts > 0
+    ret_mu = mu.copy()
+    ret_phi = phi.copy()
+    ret_volatility = volatility.copy()
+    if not has_matches.any():
+        return ret_mu, ret_phi, ret_volatility
+
+    mu = mu[has_matches]
+    phi = phi[has_matches]
+    v_sum = v_sum[has_matches]
+    delta_sum = delta_sum[has_matches]
+
+    v = np.full(len(v_sum), 9999.0)
+    np.divide(1.0, v_sum, out=v, where=v_sum != 0)
+    delta = v * delta_sum
+
+    # step 5
+    solution = glicko2_volatility_batch(phi, volatility[has_matches], v, delta, config=config)
+    if telemetry is not None:
+        telemetry.add(solution)
+    new_volatility = solution.volatility
+
+    # step 6
+    phi_star = np.sqrt(phi ** 2 + new_volatility ** 2)
+
+    # step 7
+    phi_prime = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+    mu_prime = mu + (phi_prime ** 2) * delta_sum
+
+    # step 8
+    rating = np.minimum(config.max_rating, np.maximum(config.min_rating, GLICKO2_SCALE * mu_prime + 1500))
+    deviation = np.minimum(config.max_rd, np.maximum(config.min_rd, GLICKO2_SCALE * phi_prime))
+    ret_mu[has_matches] = (rating - 1500) / GLICKO2_SCALE
+    ret_phi[has_matches] = deviation / GLICKO2_SCALE
+    ret_volatility[has_matches] = np.minimum(config.max_volatility, np.maximum(config.min_volatility, new_volatility))
+    return ret_mu, ret_phi, ret_volatility
+
+
+def glicko2_expand_deviation_batch(
+    deviation: np.ndarray,
+    volatility: np.ndarray,
+    n_periods: int = 1,
+    config: Optional[Glicko2Config] = None,
+    closed_form: bool = False,
+) -> np.ndarray:
+    """
+    Vectorized `Glicko2Entry.expand_deviation_because_no_games_played`,
+    returns the expanded deviations with the same clamping. Like the scalar
+    version, it makes one pass per period unless `closed_form` is given.
+    """
+    if config is None:
+        config = _config
+
+    ret = np.asarray(deviation, dtype=np.float64).copy()
+    volatility = np.asarray(volatility, dtype=np.float64)
+    if n_periods <= 0:
+        return ret
+
+    for _i in range(1 if closed_form else n_periods):
+        phi = ret / GLICKO2_SCALE
+        phi_prime = np.sqrt(phi ** 2 + volatility ** 2)
+        ret = np.minimum(config.max_rd, np.maximum(config.min_rd, GLICKO2_SCALE * phi_prime))
+
+    if closed_form and n_periods > 1:
+        phi = ret / GLICKO2_SCALE
+        phi_prime = np.sqrt(phi ** 2 + (n_periods - 1) * volatility ** 2)
+        ret = np.minimum(config.max_rd, np.maximum(config.min_rd, GLICKO2_SCALE * phi_prime))
+
     return ret
 
 
@@ -165,7 +651,9 @@ def glicko2_configure(tao: float, min_rd: float, max_rd: float) -> None:
     global TAO
     global MIN_RD
     global MAX_RD
+    global _config
 
     TAO = tao
     MIN_RD = min_rd
     MAX_RD = max_rd
+    _config = Glicko2Config(tao=tao, min_rd=min_rd, max_rd=max_rd)
@@ -1,7 +1,17 @@
+from bisect import bisect_left
 from math import exp
-from typing import Callable
+from typing import Callable, Iterable, Optional, Union
 
-__all__ = ["GorEntry", "gor_update", "gor_configure"]
+import numpy as np
+
+__all__ = [
+    "GorEntry",
+    "gor_update",
+    "gor_update_batch",
+    "gor_tournament_update",
+    "gor_configure",
+    "gor_win_probability_matrix",
+]
 
 EPSILON: float = 0.016
 RATING_TO_RANK: Callable[[float], float] = lambda rating: rating / 100 + 9
@@ -35,45 +45,97 @@ def compute_a(gor: float) -> float:
     return ret
 
 
+CON_TABLE = [
+    (10, 116),
+    (11, 110),
+    (12, 105),
+    (13, 100),
+    (14, 95),
+    (15, 90),
+    (16, 85),
+    (17, 80),
+    (18, 75),
+    (19, 70),
+    (20, 65),
+    (21, 60),
+    (22, 55),
+    (23, 51),
+    (24, 47),
+    (25, 43),
+    (26, 39),
+    (27, 35),
+    (28, 31),
+    (29, 27),
+    (30, 24),
+    (31, 21),
+    (32, 18),
+    (33, 15),
+    (34, 13),
+    (35, 11),
+    (36, 10),
+]
+_CON_RANKS = [r for r, _con in CON_TABLE]
+_CON_RANKS_ARRAY = np.array(_CON_RANKS, dtype=np.float64)
+_CON_VALUES_ARRAY = np.array([con for _r, con in CON_TABLE], dtype=np.float64)
+
+
 def compute_con(rank: float) -> float:
-    conlist = [
-        (10, 116),
-        (11, 110),
-        (12, 105),
-        (13, 100),
-        (14, 95),
-        (15, 90),
-        (16, 85),
-        (17, 80),
-        (18, 75),
-        (19, 70),
-        (20, 65),
-        (21, 60),
-        (22, 55),
-        (23, 51),
-        (24, 47),
-        (25, 43),
-        (26, 39),
-        (27, 35),
-        (28, 31),
-        (29, 27),
-        (30, 24),
-        (31, 21),
-        (32, 18),
-        (33, 15),
-        (34, 13),
-        (35, 11),
-        (36, 10),
-    ]
-
-    last_con = 116
-
-    for (r, con) in conlist:
-        if rank <= r:
-            return (r - rank) * last_con + (1 - (r - rank)) * con
-        last_con = con
-
-    return 10
+    # con is interpolated linearly between the CON_TABLE entries, below the
+    # first entry it is 116 and above the last one 10
+    idx = bisect_left(_CON_RANKS, rank)
+    if idx == len(CON_TABLE):
+        return 10
+    r, con = CON_TABLE[idx]
+    last_con = CON_TABLE[idx - 1][1] if idx > 0 else 116
+    return (r - rank) * last_con + (1 - (r - rank)) * con
+
+
+def _compute_con_array(rank: np.ndarray) -> np.ndarray:
+    ret: np.ndarray = np.interp(rank, _CON_RANKS_ARRAY, _CON_VALUES_ARRAY, left=116, right=10)
+    return ret
+
+
+def _rating_to_rank_array(rating: np.ndarray) -> np.ndarray:
+    # RATING_TO_RANK is normally a plain arithmetic expression that works on
+    # arrays directly. Anything else is applied element by element.
+    try:
+        rank = np.asarray(RATING_TO_RANK(rating), dtype=np.float64)  # type: ignore
+    except (TypeError, ValueError):
+        rank = np.vectorize(RATING_TO_RANK, otypes=[np.float64])(rating)
+    return np.broadcast_to(rank, rating.shape)
+
+
+def _compute_a_array(gor: np.ndarray) -> np.ndarray:
+    ret: np.ndarray = np.maximum(70, 205 - (_rating_to_rank_array(gor) - 9) * 5)
+    return ret
+
+
+def gor_win_probability_matrix(
+    rating: np.ndarray,
+    opponent_rating: np.ndarray,
+    handicap_adjustment: Callable[[float, int], float],
+    handicaps: Optional[Iterable[int]] = None,
+) -> np.ndarray:
+    """
+    Vectorized `GorEntry.expected_win_probability` for every pairing of `N`
+    players with `M` opponents at every handicap. Entry `[h, i, j]` is the
+    probability that player `i`, given the handicap adjustment
+    `handicap_adjustment(rating[i], handicaps[h])`, beats opponent `j`. The
+    result has shape `(H, N, M)`. The handicaps default to 0 through 9.
+    """
+    rating = np.asarray(rating, dtype=np.float64)
+    opponent_rating = np.asarray(opponent_rating, dtype=np.float64)
+    if handicaps is None:
+        handicaps = range(10)
+
+    adjustment = np.array(
+        [[handicap_adjustment(r, handicap) for r in rating.tolist()] for handicap in handicaps], dtype=np.float64
+    ).reshape(-1, len(rating))
+    effective = rating[np.newaxis, :, np.newaxis] + adjustment[:, :, np.newaxis]
+    D = opponent_rating - effective
+    a = _compute_a_array(np.minimum(effective, opponent_rating))
+    ret: np.ndarray = 1 / (np.exp(D / a) + 1) - (EPSILON / 2)
+    return ret
 
 
 def gor_update(player: GorEntry, opponent: GorEntry, outcome: float) -> GorEntry:
@@ -83,6 +145,73 @@ def gor_update(player: GorEntry, opponent: GorEntry, outcome: float) -> GorEntry
     return GorEntry(player.rating + K * (outcome - expected))
 
 
+def gor_update_batch(
+    rating: np.ndarray,
+    handicap: Union[np.ndarray, float],
+    opponent_rating: np.ndarray,
+    opponent_handicap: Union[np.ndarray, float],
+    outcome: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized `gor_update`: element `i` gives the new rating of
+    `gor_update(GorEntry(rating[i], handicap[i]), GorEntry(opponent_rating[i],
+    opponent_handicap[i]), outcome[i])`. The handicaps may also be scalars.
+    The con lookup interpolates the same table with `np.interp`, so results
+    agree with the scalar code up to rounding.
+    """
+    rating = np.asarray(rating, dtype=np.float64)
+    effective = rating + handicap
+    opponent_effective = np.asarray(opponent_rating, dtype=np.float64) + opponent_handicap
+
+    K = _compute_con_array(_rating_to_rank_array(rating))
+    D = opponent_effective - effective
+    a = _compute_a_array(np.minimum(effective, opponent_effective))
+    expected = 1 / (np.exp(D / a) + 1) - (EPSILON / 2)
+    ret: np.ndarray = rating + K * (outcome - expected)
+    return ret
+
+
+def gor_tournament_update(
+    rating: np.ndarray,
+    black: np.ndarray,
+    white: np.ndarray,
+    black_handicap: Union[np.ndarray, float],
+    black_outcome: np.ndarray,
+) -> np.ndarray:
+    """
+    Rates all games of a tournament (or round) the way the EGF does: every
+    game is rated against the pre-tournament ratings and the changes are
+    applied together at the end.
+
+    `rating` holds the pre-tournament rating of each player, game `i` is
+    played between players `black[i]` and `white[i]` (indices into `rating`)
+    with black receiving the handicap adjustment `black_handicap[i]`.
+    `black_outcome[i]` is 1 if black won and 0 if white won. Each game is
+    rated like
+
+        gor_update(GorEntry(rating[b], black_handicap), GorEntry(rating[w]), black_outcome)
+        gor_update(GorEntry(rating[w]), GorEntry(rating[b], black_handicap), 1 - black_outcome)
+
+    and the returned array holds every player's rating plus the sum of their
+    changes. Since nothing depends on the order of the games, tournaments with
+    disjoint player sets can simply be concatenated into one call.
+    """
+    rating = np.asarray(rating, dtype=np.float64)
+    black = np.asarray(black, dtype=np.intp)
+    white = np.asarray(white, dtype=np.intp)
+    black_rating = rating[black]
+    white_rating = rating[white]
+    black_outcome = np.asarray(black_outcome, dtype=np.float64)
+
+    black_change = gor_update_batch(black_rating, black_handicap, white_rating, 0, black_outcome) - black_rating
+    white_change = gor_update_batch(white_rating, 0, black_rating, black_handicap, 1 - black_outcome) - white_rating
+
+    players = np.concatenate((black, white))
+    change = np.bincount(players, weights=np.concatenate((black_change, white_change)), minlength=len(rating))
+    ret: np.ndarray = rating + change
+    return ret
+
+
 def gor_configure(
     epsilon: float = 0.016, rating_to_rank: Callable[[float], float] = lambda rating: rating / 100 + 9,
 ) -> None:
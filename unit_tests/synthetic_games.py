@@ -0,0 +1,36 @@
+import random
+from typing import List
+
+from goratings.interfaces import GameRecord
+
+__all__ = ["random_games"]
+
+
+def random_games(n: int, num_players: int = 50, seed: int = 1) -> List[GameRecord]:
+    """
+    A time ordered stream of `n` games between `num_players` players, with
+    handicaps, correspondence timeouts and the occasional self play or
+    manual rank update mixed in.
+    """
+    rng = random.Random(seed)
+    games = []
+    for game_id in range(1, n + 1):
+        black_id = rng.randint(1, num_players)
+        white_id = black_id if rng.random() < 0.01 else rng.randint(1, num_players)
+        time_per_move = rng.choice([10, 30, 86400])
+        games.append(
+            GameRecord(
+                game_id,
+                19,
+                rng.choice([0, 0, 0, 2, 5]),
+                6.5,
+                black_id,
+                white_id,
+                time_per_move,
+                time_per_move == 86400 and rng.random() < 0.3,
+                rng.choice([black_id, white_id]),
+                1600000000 + game_id * 600,
+                rng.choice([10.0, 20.0]) if rng.random() < 0.005 else None,
+            )
+        )
+    return games
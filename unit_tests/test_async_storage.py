@@ -0,0 +1,122 @@
+import asyncio
+
+import numpy as np
+
+import pytest
+
+from synthetic_games import random_games
+
+from analysis.util import AsyncInMemoryStorage, AsyncStorageAdapter, Glicko2OneGameAtATime, InMemoryStorage
+
+from goratings.math.glicko2 import Glicko2Entry
+
+
+def _state(players):
+    return {player_id: (e.rating, e.deviation, e.volatility) for player_id, e in players.items()}
+
+
+def test_async_in_memory_storage():
+    backend = AsyncInMemoryStorage()
+
+    async def run():
+        assert await backend.get_many([1, 2]) == [None, None]
+        assert await backend.get_timeout_flags([1, 2]) == [False, False]
+        first, second = Glicko2Entry(1600), Glicko2Entry(1400)
+        await backend.set_many([1, 2], [first, second])
+        await backend.set_timeout_flags([2], [True])
+        await backend.set(3, first)
+        assert await backend.get_many([2, 1, 3, 4]) == [second, first, first, None]
+        assert await backend.get(2) is second
+        assert await backend.get_timeout_flags([1, 2]) == [False, True]
+
+    asyncio.run(run())
+    assert backend.round_trips == 8
+
+
+def test_adapter_prefetch_and_flush():
+    backend = AsyncInMemoryStorage()
+    adapter = AsyncStorageAdapter(backend, Glicko2Entry)
+    stored = Glicko2Entry(1700, 80)
+
+    async def run():
+        await backend.set_many([1], [stored])
+        await backend.set_timeout_flags([1], [True])
+        await adapter.prefetch([1, 2, 1])
+        assert backend.round_trips == 4
+
+        # cached players are not fetched again
+        await adapter.prefetch([2, 1])
+        assert backend.round_trips == 4
+
+        assert adapter.get(1) is stored and adapter.get_timeout_flag(1)
+        assert adapter.peek(2).rating == Glicko2Entry().rating and not adapter.get_timeout_flag(2)
+        assert adapter.peek(3) is None
+        with pytest.raises(KeyError):
+            adapter.get(3)
+
+        updated = Glicko2Entry(1500, 60)
+        adapter.set(2, updated)
+        adapter.set_timeout_flag(1, False)
+        assert adapter.get_set_count(2) == 1
+        assert await backend.get(2) is None  # nothing is written before the flush
+        await adapter.flush()
+        assert await backend.get_many([1, 2]) == [stored, updated]
+        assert await backend.get_timeout_flags([1]) == [False]
+
+        # a flush without changes does not touch the backend
+        trips = backend.round_trips
+        await adapter.flush()
+        assert backend.round_trips == trips
+
+        adapter.clear()
+        assert adapter.all_players() == {}
+
+    asyncio.run(run())
+
+
+def test_process_batches_matches_in_memory():
+    stream = random_games(2000, num_players=200, seed=7)
+    batches = []
+    for start in range(0, len(stream), 100):
+        stop = start + 100
+        batches.append(stream[start:stop])
+
+    expected_storage = InMemoryStorage(Glicko2Entry)
+    expected_engine = Glicko2OneGameAtATime(expected_storage)
+    expected = [expected_engine.process_batch(batch) for batch in batches]
+
+    backend = AsyncInMemoryStorage()
+    adapter = AsyncStorageAdapter(backend, Glicko2Entry)
+    engine = Glicko2OneGameAtATime(adapter)
+
+    async def run():
+        ret = []
+        async for analytics in adapter.process_batches(engine, batches):
+            # only the players of the next batch stay cached
+            upcoming = batches[len(ret) + 1] if len(ret) + 1 < len(batches) else []
+            assert set(adapter.all_players()) == {p for game in upcoming for p in (game.black_id, game.white_id)}
+            ret.append(analytics)
+        return ret
+
+    analytics = asyncio.run(run())
+    assert len(analytics) == len(batches)
+    for got, want in zip(analytics, expected):
+        assert got.skipped.tolist() == want.skipped.tolist()
+        np.testing.assert_array_equal(got.black_updated_rating, want.black_updated_rating)
+        np.testing.assert_array_equal(got.white_updated_rating, want.white_updated_rating)
+
+    assert _state(backend._data) == _state(expected_storage.all_players())
+    assert {p for p, tf in backend._timeout_flags.items() if tf} == {
+        p for p in expected_storage.all_players() if expected_storage.get_timeout_flag(p)
+    }
+    # one read and one write of entries and flags per batch
+    assert backend.round_trips <= 4 * len(batches)
+
+
+def test_process_batches_empty():
+    adapter = AsyncStorageAdapter(AsyncInMemoryStorage(), Glicko2Entry)
+
+    async def run():
+        return [analytics async for analytics in adapter.process_batches(None, [])]
+
+    assert asyncio.run(run()) == []
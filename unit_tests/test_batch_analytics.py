@@ -0,0 +1,78 @@
+import numpy as np
+
+import pytest
+
+from synthetic_games import random_games
+
+from analysis.util import Glicko2DailyWindows, Glicko2OneGameAtATime, GorOneGameAtATime, InMemoryStorage
+
+from goratings.interfaces import BatchAnalytics
+from goratings.math.glicko2 import Glicko2Entry
+from goratings.math.gor import GorEntry
+
+
+def _expected_columns(analytics):
+    # what BatchAnalytics should hold for per-game analytics: NaN for skipped games and missing values
+    return {
+        name: np.array([np.nan if a.skipped else getattr(a, name, np.nan) for a in analytics], dtype=np.float64,)
+        for name in BatchAnalytics.columns
+    }
+
+
+def _assert_batch_matches(batch, expected, rtol=0.0):
+    assert len(batch) == len(expected)
+    assert [game.game_id for game in batch.games] == [a.game.game_id for a in expected]
+    assert batch.skipped.tolist() == [a.skipped for a in expected]
+    assert batch.skipped.any() and not batch.skipped.all()
+    for name, column in _expected_columns(expected).items():
+        if rtol:
+            np.testing.assert_allclose(getattr(batch, name), column, rtol=rtol, err_msg=name)
+        else:
+            np.testing.assert_array_equal(getattr(batch, name), column, err_msg=name)
+
+
+def test_default_process_batch_matches_process_game():
+    # DailyWindows does not override process_batch, so this covers the RatingSystem default
+    stream = random_games(1500, num_players=30, seed=4)
+
+    expected_storage = InMemoryStorage(Glicko2Entry)
+    engine = Glicko2DailyWindows(expected_storage)
+    expected = [engine.process_game(game) for game in stream]
+
+    storage = InMemoryStorage(Glicko2Entry)
+    batch = Glicko2DailyWindows(storage).process_batch(stream)
+
+    _assert_batch_matches(batch, expected)
+    assert [a.game for a in batch.analytics] == stream
+    players = {player_id: (e.rating, e.deviation) for player_id, e in expected_storage.all_players().items()}
+    assert {player_id: (e.rating, e.deviation) for player_id, e in storage.all_players().items()} == players
+
+
+def test_glicko2_process_batch_matches_process_game():
+    stream = random_games(1500, num_players=30, seed=5)
+
+    engine = Glicko2OneGameAtATime(InMemoryStorage(Glicko2Entry))
+    expected = [engine.process_game(game) for game in stream]
+    batch = Glicko2OneGameAtATime(InMemoryStorage(Glicko2Entry)).process_batch(stream)
+
+    # the tolerance documented in Glicko2OneGameAtATime.process_wave
+    _assert_batch_matches(batch, expected, rtol=1e-7)
+    assert np.isfinite(batch.black_deviation[~batch.skipped]).all()
+
+
+def test_gor_process_batch_matches_process_game():
+    stream = random_games(1500, num_players=30, seed=6)
+
+    engine = GorOneGameAtATime(InMemoryStorage(GorEntry))
+    expected = [engine.process_game(game) for game in stream]
+    batch = GorOneGameAtATime(InMemoryStorage(GorEntry)).process_batch(stream)
+
+    # the GoR waves use the NumPy kernel, which may differ in the last bits
+    _assert_batch_matches(batch, expected, rtol=1e-9)
+    # GoR has no deviations
+    assert np.isnan(batch.black_deviation).all() and np.isnan(batch.white_deviation).all()
+
+
+def test_unknown_column():
+    with pytest.raises(TypeError):
+        BatchAnalytics([], np.zeros(0, dtype=bool), black_volatility=np.zeros(0))
@@ -0,0 +1,140 @@
+import random
+from bisect import bisect_left
+
+import pytest
+
+from analysis.util import CompactHistory, HistoryRetention, InMemoryStorage
+
+from goratings.math.glicko2 import Glicko2Entry
+
+
+def _values(items):
+    return [(t, _entry(e)) for t, e in items]
+
+
+def _entry(entry):
+    return (entry.rating, entry.deviation, entry.volatility)
+
+
+def _random_items(rng, n, start=1600000000):
+    items = []
+    timestamp = start
+    for _ in range(n):
+        # repeated timestamps are common, several games end in the same second
+        timestamp += rng.choice([0, 0, 1, 60, 3600, 86400 * 30])
+        items.append((timestamp, Glicko2Entry(rng.uniform(500, 2500), rng.uniform(30, 350), rng.uniform(0.04, 0.08))))
+    return items
+
+
+def _assert_same(history, items):
+    assert len(history) == len(items)
+    assert _values(history) == _values(items)
+    assert _values(history[:]) == _values(items[:])
+    assert _values(history[3:-2]) == _values(items[3:-2])
+    for i in list(range(min(len(items), 5))) + [len(items) - 1, -1, -len(items)] if items else []:
+        assert _values([history[i]]) == _values([items[i]])
+        assert history.timestamp(i) == items[i][0]
+    timestamps = [t for t, _e in items]
+    for timestamp in set(timestamps[::7] + [t + 1 for t in timestamps[::11]] + [0, 2 ** 40]):
+        assert history.bisect(timestamp) == bisect_left(timestamps, timestamp)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matches_list(seed):
+    rng = random.Random(seed)
+    items = _random_items(rng, 1000)
+    history = CompactHistory(Glicko2Entry)
+    for item in items:
+        history.append(item)
+    _assert_same(history, items)
+    assert list(history.entry(i).rating for i in range(10)) == [e.rating for _t, e in items[:10]]
+
+    # prune like a retention policy does, crossing anchor blocks
+    expected = list(items)
+    for n in [0, 1, 5, 63, 64, 1, 130, 7]:
+        del history[:n]
+        del expected[:n]
+        _assert_same(history, expected)
+
+        # appending keeps working after pruning
+        item = (expected[-1][0] + rng.choice([0, 5]), Glicko2Entry(1500, 60, 0.06))
+        history.append(item)
+        expected.append(item)
+        _assert_same(history, expected)
+
+    del history[: len(history)]
+    assert len(history) == 0 and list(history) == [] and history.bisect(2 ** 40) == 0
+    assert history.nbytes == 0
+    history.append((5, Glicko2Entry()))
+    assert history[0][0] == 5
+
+
+def test_pruning_frees_whole_blocks():
+    history = CompactHistory(Glicko2Entry)
+    for timestamp in range(1000):
+        history.append((timestamp, Glicko2Entry()))
+    full = history.nbytes
+    del history[:10]
+    assert history.nbytes == full  # within the first block, only the start moves
+    del history[:100]
+    assert history.nbytes < full
+    assert history[0][0] == 110 and history.bisect(500) == 390
+
+
+def test_float_typecode():
+    history = CompactHistory(Glicko2Entry, typecode="f")
+    history.append((1, Glicko2Entry(1500.123456789, 60, 0.06)))
+    assert history[0][1].rating == pytest.approx(1500.123456789, rel=1e-6)
+    assert history[0][1].rating != 1500.123456789
+    doubles = CompactHistory(Glicko2Entry)
+    doubles.append((1, Glicko2Entry()))
+    assert history.nbytes < doubles.nbytes
+
+
+def test_errors():
+    history = CompactHistory(Glicko2Entry)
+    history.append((10, Glicko2Entry()))
+    with pytest.raises(ValueError):
+        history.append((9, Glicko2Entry()))
+    with pytest.raises(IndexError):
+        history[1]
+    with pytest.raises(IndexError):
+        history.timestamp(-2)
+    with pytest.raises(TypeError):
+        del history[1:]
+    with pytest.raises(TypeError):
+        del history[0]
+
+
+@pytest.mark.parametrize("retention", [None, HistoryRetention(max_age=86400 * 120)])
+def test_storage_queries(retention):
+    rng = random.Random(4)
+    lists = InMemoryStorage(Glicko2Entry, retention=retention)
+    compact = InMemoryStorage(
+        Glicko2Entry, retention=retention and HistoryRetention(max_age=86400 * 120), compact_history=True
+    )
+    timestamps = []
+    for timestamp, entry in _random_items(rng, 3000):
+        player_id = rng.randint(1, 20)
+        lists.add_rating_history(player_id, timestamp, entry)
+        compact.add_rating_history(player_id, timestamp, entry.copy())
+        timestamps.append(timestamp)
+
+    assert all(isinstance(history, CompactHistory) for history in compact._rating_history.values())
+    for player_id in range(0, 22):
+        assert compact.get_last_game_timestamp(player_id) == lists.get_last_game_timestamp(player_id)
+        for timestamp in timestamps[::97] + [0, 2 ** 40]:
+            assert [_entry(e) for e in compact.get_ratings_newer_or_equal_to(player_id, timestamp)] == [
+                _entry(e) for e in lists.get_ratings_newer_or_equal_to(player_id, timestamp)
+            ]
+            assert compact.get_first_timestamp_older_than(player_id, timestamp) == lists.get_first_timestamp_older_than(
+                player_id, timestamp
+            )
+            assert _entry(compact.get_first_rating_older_than(player_id, timestamp)) == _entry(
+                lists.get_first_rating_older_than(player_id, timestamp)
+            )
+    memory = compact.history_memory()
+    assert memory["rating_entries"] == lists.history_memory()["rating_entries"]
+    assert memory["dropped_rating_entries"] == lists.history_memory()["dropped_rating_entries"]
+    assert (memory["dropped_rating_entries"] > 0) == (retention is not None)
+    assert memory["rating_bytes"] < lists.history_memory()["rating_bytes"]
@@ -0,0 +1,131 @@
+import numpy as np
+
+from synthetic_games import random_games
+
+from analysis.util import DenseStorage, Glicko2OneGameAtATime, InMemoryStorage, PlayerIndex
+
+from goratings.math.glicko2 import Glicko2Entry
+
+
+def _state(storage):
+    return {player_id: (e.rating, e.deviation, e.volatility) for player_id, e in storage.all_players().items()}
+
+
+def test_player_index():
+    index = PlayerIndex(capacity=2)
+    player_ids = [1000000000 + 7 * n for n in range(3000)]
+    assert [index.add(player_id) for player_id in player_ids] == list(range(3000))
+    assert index.add(player_ids[5]) == 5
+    assert len(index) == 3000 and player_ids[-1] in index and 1 not in index
+    assert index.ids.tolist() == player_ids
+    assert index.get(player_ids[2999]) == 2999 and index.get(1) is None
+    for ids in ([player_ids[10], 1, player_ids[0]], np.array([player_ids[10], 1, player_ids[0]])):
+        assert index.rows(ids).tolist() == [10, -1, 0]
+    # the id array and a hash table that is at most half full
+    assert 8 * 3000 + 2 * 4 * 3000 <= index.nbytes <= 2 * (8 * 3000 + 4 * 4 * 3000)
+
+
+def test_player_index_collisions():
+    # ids that are equal modulo the table size still get their own rows
+    index = PlayerIndex(capacity=8)
+    player_ids = [n << 40 for n in range(1, 101)] + [-1, 0, 2 ** 62]
+    for player_id in player_ids:
+        index.add(player_id)
+    assert [index.get(player_id) for player_id in player_ids] == list(range(103))
+    assert index.rows(np.array(player_ids + [1 << 39])).tolist() == list(range(103)) + [-1]
+    assert index.rows([]).tolist() == []
+
+
+def test_nbytes_per_player():
+    # the index is counted, and a player costs a few dozen bytes, not the ~150 of a dict slot and int objects
+    storage = DenseStorage(Glicko2Entry, capacity=1)
+    for player_id in range(1000000000, 1000000000 + 8000 * 7, 7):
+        storage.set(player_id, Glicko2Entry())
+    assert storage.nbytes == storage.players.nbytes + storage._values.nbytes + storage._set_counts.nbytes + len(
+        storage._timeout_bits
+    )
+    assert storage.nbytes / 8000 < 64
+
+
+def test_grows_past_capacity():
+    stream = random_games(3000, num_players=1500, seed=13)
+
+    expected = InMemoryStorage(Glicko2Entry)
+    engine = Glicko2OneGameAtATime(expected)
+    for game in stream:
+        engine.process_game(game)
+
+    storage = DenseStorage(Glicko2Entry, capacity=2)
+    engine = Glicko2OneGameAtATime(storage)
+    for game in stream:
+        engine.process_game(game)
+
+    assert len(storage.players) > 1024
+    assert _state(storage) == _state(expected)
+    for player_id in expected.all_players():
+        assert storage.get_set_count(player_id) == expected.get_set_count(player_id)
+        assert storage.get_timeout_flag(player_id) == expected.get_timeout_flag(player_id)
+    assert len(storage.values) == len(storage.set_counts) == len(storage.players)
+    assert storage.nbytes >= storage.values.nbytes + storage.players.nbytes
+
+
+def test_no_entry():
+    storage = DenseStorage(Glicko2Entry)
+    storage.set_timeout_flag(5, True)
+    # the player has a row for the flag, but no entry
+    assert 5 in storage.players and np.isnan(storage.values[0]).all()
+    assert storage.peek(5) is None
+    assert storage.all_players() == {}
+    assert storage.get_set_count(5) == 0
+
+    entry = storage.get(5)
+    assert (entry.rating, entry.deviation) == (Glicko2Entry().rating, Glicko2Entry().deviation)
+    assert list(storage.all_players()) == [5]
+    assert storage.get_set_count(5) == 0
+
+    # get returns a copy, changes only count once they are set
+    entry.rating = 1234
+    assert storage.peek(5).rating != 1234
+    storage.set(5, entry)
+    assert storage.peek(5).rating == 1234 and storage.get_set_count(5) == 1
+
+    storage.set_many(np.array([6, 5]), [Glicko2Entry(1600), Glicko2Entry(1700)])
+    assert [e.rating for e in storage.get_many([5, 6])] == [1700, 1600]
+    assert storage.get_set_count(5) == 2
+    storage.clear_set_count(5)
+    storage.clear_set_count(99)
+    assert storage.get_set_count(5) == 0 and 99 not in storage.players
+
+
+def test_timeout_bitset():
+    storage = DenseStorage(Glicko2Entry, capacity=4)
+    flagged = {player_id for player_id in range(40) if player_id % 3 == 0}
+    for player_id in range(40):
+        storage.set(player_id, Glicko2Entry())
+        storage.set_timeout_flag(player_id, player_id in flagged)
+    assert {player_id for player_id in range(40) if storage.get_timeout_flag(player_id)} == flagged
+
+    # neighbours in the same byte are left alone
+    storage.set_timeout_flag(9, False)
+    storage.set_timeout_flag(10, True)
+    flagged = (flagged - {9}) | {10}
+    assert {player_id for player_id in range(40) if storage.get_timeout_flag(player_id)} == flagged
+
+    # clearing the flag of an unknown player doesn't add it
+    storage.set_timeout_flag(100, False)
+    assert 100 not in storage.players and not storage.get_timeout_flag(100)
+
+
+def test_float32():
+    storage = DenseStorage(Glicko2Entry, np.float32)
+    exact = Glicko2Entry(1500.123456789, 61.987654321, 0.0612345678)
+    storage.set(1, exact)
+    assert storage.values.dtype == np.float32
+    got = storage.get(1)
+    assert (got.rating, got.deviation, got.volatility) == (
+        float(np.float32(exact.rating)),
+        float(np.float32(exact.deviation)),
+        float(np.float32(exact.volatility)),
+    )
+    assert got.rating != exact.rating
+    assert DenseStorage(Glicko2Entry, np.float32).nbytes < DenseStorage(Glicko2Entry).nbytes
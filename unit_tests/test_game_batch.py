@@ -0,0 +1,99 @@
+import numpy as np
+
+import pytest
+
+from synthetic_games import random_games
+
+from goratings.interfaces import GameBatch, GameRecord, GameRecordView
+
+FIELDS = (
+    "game_id",
+    "size",
+    "handicap",
+    "komi",
+    "black_id",
+    "white_id",
+    "time_per_move",
+    "timeout",
+    "winner_id",
+    "ended",
+    "black_manual_rank_update",
+    "white_manual_rank_update",
+    "speed",
+)
+
+
+def _fields(game):
+    return tuple(getattr(game, field) for field in FIELDS)
+
+
+def test_columns():
+    records = random_games(300)
+    records[7].white_manual_rank_update = 12.5
+    batch = GameBatch.from_records(records)
+
+    assert len(batch) == 300
+    assert batch.game_id.dtype == np.int64 and batch.speed.dtype == np.int8
+    assert batch.black_id.tolist() == [r.black_id for r in records]
+    assert batch.timeout.tolist() == [r.timeout for r in records]
+    assert batch.komi.tolist() == [r.komi for r in records]
+    assert any(r.black_manual_rank_update is not None for r in records)
+    for column, field in (
+        (batch.black_manual_rank_update, "black_manual_rank_update"),
+        (batch.white_manual_rank_update, "white_manual_rank_update"),
+    ):
+        ranks = [getattr(r, field) for r in records]
+        assert np.isnan(column).tolist() == [rank is None for rank in ranks]
+        assert column[~np.isnan(column)].tolist() == [rank for rank in ranks if rank is not None]
+
+
+def test_default_manual_rank_updates():
+    batch = GameBatch([1], [19], [0], [6.5], [2], [3], [30], [False], [2], [100])
+    assert np.isnan(batch.black_manual_rank_update).all() and np.isnan(batch.white_manual_rank_update).all()
+    assert batch[0].black_manual_rank_update is None
+
+
+def test_speed_codes_match_game_record():
+    time_per_move = [0, 1, 15, 16, 30, 3600, 3601, 86400]
+    records = [GameRecord(i, 19, 0, 6.5, 1, 2, tpm, False, 1, i) for i, tpm in enumerate(time_per_move)]
+    batch = GameBatch.from_records(records)
+    assert batch.speed.tolist() == [r.speed for r in records] == [3, 1, 1, 2, 2, 2, 3, 3]
+
+
+def test_row_views():
+    records = random_games(100)
+    records[3].white_manual_rank_update = 4.0
+    batch = GameBatch.from_records(records)
+
+    rows = list(batch)
+    assert all(isinstance(row, GameRecordView) for row in rows)
+    assert [_fields(row) for row in rows] == [_fields(r) for r in records]
+    assert _fields(batch[-1]) == _fields(records[-1])
+    assert str(batch[5]) == str(records[5])
+    assert type(batch[5].game_id) is int and type(batch[5].timeout) is bool
+
+    copy = batch.record(3)
+    assert isinstance(copy, GameRecord)
+    assert _fields(copy) == _fields(records[3])
+
+    # views read through to the columns
+    batch.winner_id[10] = -1
+    assert rows[10].winner_id == -1
+
+    with pytest.raises(IndexError):
+        batch[100]
+    with pytest.raises(IndexError):
+        batch[-101]
+
+
+def test_game_record_speed_cache():
+    game = GameRecord(1, 19, 0, 6.5, 1, 2, 30, False, 1, 100)
+    assert game.speed == 2
+    game.time_per_move = 5
+    assert (game.time_per_move, game.speed) == (5, 1)
+    game.time_per_move = 0
+    assert game.speed == 3
+    with pytest.raises(AttributeError):
+        game.speed = 1
+    with pytest.raises(AttributeError):
+        game.unknown = 1
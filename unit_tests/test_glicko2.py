@@ -1,4 +1,24 @@
-from goratings.math.glicko2 import Glicko2Entry, glicko2_configure, glicko2_update
+from math import exp, sqrt
+
+import numpy as np
+
+import pytest
+
+from goratings.math.glicko2 import (
+    GLICKO2_SCALE,
+    Glicko2Config,
+    Glicko2Entry,
+    VolatilityTelemetry,
+    glicko2_configure,
+    glicko2_expand_deviation_batch,
+    glicko2_match_terms,
+    glicko2_update,
+    glicko2_update_batch,
+    glicko2_update_from_sums,
+    glicko2_update_pair,
+    glicko2_volatility_batch,
+    glicko2_win_probability_matrix,
+)
 
 
 def test_glicko2():
@@ -27,6 +47,75 @@ def test_expansion():
     assert round(player.deviation, 1) == 200.3
 
 
+def test_expansion_closed_form():
+    config = Glicko2Config(min_rd=30, max_rd=350)
+
+    def expand_loop(entry, n_periods):
+        for _i in range(n_periods):
+            phi_prime = (entry.phi ** 2 + entry.volatility ** 2) ** 0.5
+            entry.deviation = min(config.max_rd, max(config.min_rd, 173.7178 * phi_prime))
+            entry.phi = entry.deviation / 173.7178
+        return entry
+
+    for rating, deviation, volatility in ((1500, 200, 0.06), (1500, 10, 0.01), (1500, 349, 0.15), (1500, 400, 0.06)):
+        for n_periods in (0, 1, 2, 3, 10, 100, 1000):
+            expected = expand_loop(Glicko2Entry(rating, deviation, volatility), n_periods)
+            # the loop is the default and gives exactly the same result
+            player = Glicko2Entry(rating, deviation, volatility)
+            player.expand_deviation_because_no_games_played(n_periods, config)
+            assert (player.deviation, player.phi) == (expected.deviation, expected.phi)
+
+            player = Glicko2Entry(rating, deviation, volatility)
+            player.expand_deviation_because_no_games_played(n_periods, config, closed_form=True)
+            assert player.deviation == pytest.approx(expected.deviation, rel=1e-12)
+            assert player.phi == pytest.approx(expected.phi, rel=1e-12)
+            if n_periods <= 1 or expected.deviation in (config.min_rd, config.max_rd):
+                assert player.deviation == expected.deviation
+
+
+def test_expansion_closed_form_max_rd():
+    config = Glicko2Config(min_rd=30, max_rd=350)
+
+    def expand_loop(entry, n_periods):
+        for _i in range(n_periods):
+            phi_prime = sqrt(entry.phi ** 2 + entry.volatility ** 2)
+            entry.deviation = min(config.max_rd, max(config.min_rd, GLICKO2_SCALE * phi_prime))
+            entry.phi = entry.deviation / GLICKO2_SCALE
+        return entry
+
+    # deviations that reach max_rd after a few, many or no periods, or start above it
+    for deviation, volatility in ((300, 0.15), (340, 0.06), (29, 0.15), (200, 0.01), (349.9, 0.15), (500, 0.06)):
+        clamped = 0
+        for n_periods in range(400):
+            expected = expand_loop(Glicko2Entry(1500, deviation, volatility), n_periods)
+            player = Glicko2Entry(1500, deviation, volatility)
+            player.expand_deviation_because_no_games_played(n_periods, config, closed_form=True)
+            assert (player.deviation == config.max_rd) == (expected.deviation == config.max_rd)
+            assert player.deviation == pytest.approx(expected.deviation, rel=1e-12)
+            clamped += player.deviation == config.max_rd
+        assert clamped > 0 or deviation == 200
+
+
+def test_expansion_batch():
+    config = Glicko2Config(min_rd=30, max_rd=350)
+    deviation = np.array([200, 10, 349, 400, 200], dtype=float)
+    volatility = np.array([0.06, 0.01, 0.15, 0.06, 0.0])
+
+    for n_periods in (0, 1, 2, 50):
+        expanded = glicko2_expand_deviation_batch(deviation, volatility, n_periods, config)
+        closed_form = glicko2_expand_deviation_batch(deviation, volatility, n_periods, config, closed_form=True)
+        for i in range(len(deviation)):
+            player = Glicko2Entry(1500, deviation[i], volatility[i])
+            player.expand_deviation_because_no_games_played(n_periods, config)
+            assert expanded[i] == player.deviation
+            assert closed_form[i] == pytest.approx(player.deviation, rel=1e-12)
+
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+    assert round(glicko2_expand_deviation_batch(np.array([200.0]), np.array([0.06]))[0], 1) == 200.3
+
+
 def test_copy():
     player = Glicko2Entry(1500, 200, 0.06)
     copy = player.copy()
@@ -42,6 +131,34 @@ def test_expected_win_probability():
     assert player.expected_win_probability(player, 0) == 0.5
 
 
+def _log_handicap_adjustment(rating, handicap):
+    # get_handicap_adjustment with the default logarithmic ranks
+    return rating * exp(handicap / 23.15) - rating
+
+
+def test_win_probability_matrix():
+    rs = np.random.RandomState(5)
+    players = [Glicko2Entry(rs.uniform(200, 3000), rs.uniform(30, 400)) for _ in range(7)]
+    opponents = [Glicko2Entry(rs.uniform(200, 3000), rs.uniform(30, 400)) for _ in range(5)]
+
+    for ignore_g in (False, True):
+        matrix = glicko2_win_probability_matrix(
+            np.array([p.rating for p in players]),
+            np.array([p.deviation for p in players]),
+            np.array([o.rating for o in opponents]),
+            _log_handicap_adjustment,
+            ignore_g=ignore_g,
+        )
+        assert matrix.shape == (10, 7, 5)
+        for handicap in range(10):
+            for i, player in enumerate(players):
+                for j, opponent in enumerate(opponents):
+                    expected = player.expected_win_probability(
+                        opponent, _log_handicap_adjustment(player.rating, handicap), ignore_g=ignore_g
+                    )
+                    assert matrix[handicap, i, j] == pytest.approx(expected, rel=1e-12)
+
+
 def test_nop():
     player = Glicko2Entry(1500, 200, 0.06)
     p = glicko2_update(player, [])
@@ -59,3 +176,209 @@ def test_exercise():
             (Glicko2Entry(1500, 100), 0),
         ],
     )
+
+
+def _random_period(seed, n_players=200, max_matches=12):
+    rs = np.random.RandomState(seed)
+    players = [
+        Glicko2Entry(rs.uniform(200, 3000), rs.uniform(30, 400), rs.uniform(0.01, 0.15)) for _ in range(n_players)
+    ]
+    matches = [
+        [
+            (Glicko2Entry(rs.uniform(200, 3000), rs.uniform(30, 400), 0.06), int(rs.randint(0, 2)))
+            for _ in range(rs.randint(0, max_matches))
+        ]
+        for _ in range(n_players)
+    ]
+    return players, matches
+
+
+def _batch_arguments(players, matches):
+    offsets = np.cumsum([0] + [len(m) for m in matches])
+    flat = [m for player_matches in matches for m in player_matches]
+    return (
+        np.array([p.mu for p in players]),
+        np.array([p.phi for p in players]),
+        np.array([p.volatility for p in players]),
+        offsets,
+        np.array([m[0].mu for m in flat]),
+        np.array([m[0].phi for m in flat]),
+        np.array([m[1] for m in flat], dtype=float),
+    )
+
+
+def test_update_batch_matches_scalar():
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+    players, matches = _random_period(1)
+    mu, phi, volatility = glicko2_update_batch(*_batch_arguments(players, matches))
+
+    for i, (player, player_matches) in enumerate(zip(players, matches)):
+        expected = glicko2_update(player, player_matches)
+        assert mu[i] == pytest.approx(expected.mu, abs=1e-9)
+        assert phi[i] == pytest.approx(expected.phi, abs=1e-9)
+        assert volatility[i] == pytest.approx(expected.volatility, abs=1e-9)
+
+
+def test_update_batch_exercise():
+    players = [Glicko2Entry(1500, 200, 0.06), Glicko2Entry(1500, 200, 0.06)]
+    matches = [
+        [
+            (Glicko2Entry(100, 100), 0),
+            (Glicko2Entry(30000, 10000), 1),
+            (Glicko2Entry(1500, 100), 1),
+            (Glicko2Entry(1500, 100), 0),
+        ],
+        [],
+    ]
+    mu, phi, volatility = glicko2_update_batch(*_batch_arguments(players, matches))
+    expected = glicko2_update(players[0], matches[0])
+    assert mu[0] == pytest.approx(expected.mu, abs=1e-9)
+    assert phi[0] == pytest.approx(expected.phi, abs=1e-9)
+    assert (mu[1], phi[1], volatility[1]) == (players[1].mu, players[1].phi, players[1].volatility)
+
+
+def test_update_batch_nop():
+    players = [Glicko2Entry(1500, 200, 0.06)]
+    mu, phi, volatility = glicko2_update_batch(*_batch_arguments(players, [[]]))
+    assert mu[0] == players[0].mu
+    assert phi[0] == players[0].phi
+
+
+def test_volatility_batch_telemetry():
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+    phi = np.array([1.15, 1.15, 0.5])
+    volatility = np.array([0.06, 0.06, 0.06])
+    v = np.array([1.78, 1.78, 9999.0])
+    delta = np.array([-0.48, 4.0, 0.0])
+
+    solution = glicko2_volatility_batch(phi, volatility, v, delta)
+    assert solution.volatility[0] == pytest.approx(0.06, abs=1e-3)
+    assert (solution.iterations > 0).all()
+    assert not solution.exhausted.any()
+    assert solution.bracket_steps.tolist() == [0, 0, 0]
+
+    capped = glicko2_volatility_batch(phi, volatility, v, delta, max_iterations=1)
+    assert capped.exhausted.tolist() == [True, True, False]
+    assert capped.iterations.tolist() == [1, 1, 1]
+
+    telemetry = VolatilityTelemetry()
+    telemetry.add(solution)
+    telemetry.add(capped)
+    assert telemetry.lanes == 6
+    assert telemetry.exhausted == 2
+    assert telemetry.max_iterations == solution.iterations.max()
+    assert isinstance(str(telemetry), str)
+    assert str(VolatilityTelemetry())
+
+
+def test_volatility_batch_bracketing():
+    # a large tao makes the `k` bracketing loop step, which never happens
+    # with the default configuration
+    glicko2_configure(
+        tao=5, min_rd=10, max_rd=500,
+    )
+    solution = glicko2_volatility_batch(np.array([0.01]), np.array([2.0]), np.array([0.01]), np.array([0.0]))
+    assert solution.bracket_steps[0] > 0
+    assert not solution.exhausted[0]
+
+    telemetry = VolatilityTelemetry()
+    telemetry.add(solution)
+    assert telemetry.bracket_loop_lanes == 1
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+
+
+def test_update_batch_telemetry():
+    players, matches = _random_period(2)
+    telemetry = VolatilityTelemetry()
+    glicko2_update_batch(*_batch_arguments(players, matches), telemetry=telemetry)
+    assert telemetry.lanes == sum(1 for m in matches if m)
+    assert telemetry.exhausted == 0
+
+
+def test_update_pair_matches_scalar():
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+    rs = np.random.RandomState(4)
+    for _ in range(200):
+        black = Glicko2Entry(rs.uniform(200, 3000), rs.uniform(30, 400), rs.uniform(0.01, 0.15))
+        white = Glicko2Entry(rs.uniform(200, 3000), rs.uniform(30, 400), rs.uniform(0.01, 0.15))
+        black_adjustment = rs.uniform(0, 300)
+        white_adjustment = rs.uniform(0, 300)
+        black_won = int(rs.randint(0, 2))
+
+        expected_black = glicko2_update(black, [(white.copy(-white_adjustment), black_won)])
+        expected_white = glicko2_update(white, [(black.copy(black_adjustment), 1 - black_won)])
+        glicko2_update_pair(black, white, black_adjustment, white_adjustment, black_won, 1 - black_won)
+
+        for updated, expected in ((black, expected_black), (white, expected_white)):
+            assert updated.rating == expected.rating
+            assert updated.deviation == expected.deviation
+            assert updated.volatility == expected.volatility
+            assert updated.mu == expected.mu
+            assert updated.phi == expected.phi
+
+
+def test_update_from_sums_matches_scalar():
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+    players, matches = _random_period(5)
+    for player, player_matches in zip(players, matches):
+        v_sum = 0.0
+        delta_sum = 0.0
+        for n, (opponent, outcome) in enumerate(player_matches):
+            v_term, delta_term = glicko2_match_terms(player, opponent, outcome)
+            v_sum += v_term
+            delta_sum += delta_term
+
+            # the running sums give the full recomputation after every match
+            updated = glicko2_update_from_sums(player, v_sum, delta_sum)
+            expected = glicko2_update(player, player_matches[: n + 1])
+            assert updated.rating == expected.rating
+            assert updated.deviation == expected.deviation
+            assert updated.volatility == expected.volatility
+
+    config = Glicko2Config(tao=0.5, min_rd=10, max_rd=500)
+    assert glicko2_update_from_sums(player, v_sum, delta_sum, config).rating == updated.rating
+
+
+def test_config_side_by_side():
+    glicko2_configure(
+        tao=0.5, min_rd=10, max_rd=500,
+    )
+    player = Glicko2Entry(1500, 200, 0.06)
+    matches = [(Glicko2Entry(1400, 30, 0.06), 1), (Glicko2Entry(1550, 100, 0.06), 0)]
+
+    configured = glicko2_update(player, matches)
+    explicit = glicko2_update(player, matches, Glicko2Config(tao=0.5, min_rd=10, max_rd=500))
+    assert explicit.rating == configured.rating
+    assert explicit.deviation == configured.deviation
+
+    narrow = glicko2_update(player, matches, Glicko2Config(tao=0.5, min_rd=190, max_rd=195))
+    assert narrow.deviation == 190
+
+    fixed_volatility = Glicko2Config(min_volatility=0.05, max_volatility=0.05)
+    assert glicko2_update(player, matches, fixed_volatility).volatility == 0.05
+
+    black = Glicko2Entry(1500, 200, 0.06)
+    white = Glicko2Entry(1500, 200, 0.06)
+    glicko2_update_pair(black, white, 0, 0, 1, 0, fixed_volatility)
+    assert black.volatility == white.volatility == 0.05
+
+    mu, phi, volatility = glicko2_update_batch(
+        *_batch_arguments([player], [matches]), config=Glicko2Config(tao=0.5, min_rd=190, max_rd=195)
+    )
+    assert phi[0] * 173.7178 == pytest.approx(190)
+
+
+def test_expansion_config():
+    player = Glicko2Entry(1500, 200, 0.06)
+    player.expand_deviation_because_no_games_played(1, Glicko2Config(max_rd=100))
+    assert player.deviation == 100
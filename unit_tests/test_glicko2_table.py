@@ -0,0 +1,89 @@
+import numpy as np
+
+import pytest
+
+from analysis.util import Glicko2OneGameAtATime, Glicko2Table, Glicko2TableStorage, InMemoryStorage
+
+from goratings.interfaces import GameRecord
+from goratings.math.glicko2 import Glicko2Config, Glicko2Entry
+
+
+def _skill_games(n, num_players=100, seed=6):
+    # outcomes follow a fixed skill per player, so the ratings settle like in a real run
+    rs = np.random.RandomState(seed)
+    skill = rs.normal(1500, 300, num_players)
+    games = []
+    for game_id in range(1, n + 1):
+        i, j = rs.choice(num_players, 2, replace=False)
+        black_won = rs.rand() < 1 / (1 + 10 ** ((skill[j] - skill[i]) / 400))
+        winner = int(i if black_won else j)
+        games.append(GameRecord(game_id, 19, 0, 6.5, int(i), int(j), 30, False, winner, game_id * 60))
+    return games
+
+
+def test_float32_state_drift():
+    # The float32 table must stay within the bounds documented in Glicko2Table
+    config = Glicko2Config(tao=0.5, min_rd=10, max_rd=500)
+
+    exact = InMemoryStorage(Glicko2Entry)
+    compact = Glicko2TableStorage(np.float32)
+    assert compact.table.dtype == np.float32
+    exact_engine = Glicko2OneGameAtATime(exact, config)
+    compact_engine = Glicko2OneGameAtATime(compact, config)
+    for game in _skill_games(10000):
+        exact_engine.process_game(game)
+        compact_engine.process_game(game)
+
+    expected = exact.all_players()
+    players = compact.all_players()
+    assert players.keys() == expected.keys()
+    assert max(abs(players[p].rating - e.rating) for p, e in expected.items()) < 0.01
+    assert max(abs(players[p].deviation - e.deviation) for p, e in expected.items()) < 0.001
+    assert max(abs(players[p].volatility - e.volatility) for p, e in expected.items()) < 1e-6
+    # the state really was rounded
+    assert any(players[p].rating != e.rating for p, e in expected.items())
+
+
+def test_table_get_set():
+    table = Glicko2Table(capacity=2)
+    entries = {player_id: Glicko2Entry(1000 + player_id, 100 + player_id % 50, 0.06) for player_id in range(5000)}
+    for player_id, entry in entries.items():
+        table.set(player_id, entry)
+
+    assert len(table) == 5000
+    assert 4999 in table and 5000 not in table
+    for player_id, entry in entries.items():
+        got = table.get(player_id)
+        assert (got.rating, got.deviation, got.volatility) == (entry.rating, entry.deviation, entry.volatility)
+    default = table.get(-1)
+    assert (default.rating, default.deviation) == (Glicko2Entry().rating, Glicko2Entry().deviation)
+    assert not table.played[table.row(-1)]
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_close_period(dtype):
+    config = Glicko2Config(min_rd=30, max_rd=350)
+    table = Glicko2Table(dtype=dtype)
+    for player_id in range(10):
+        table.set(player_id, Glicko2Entry(1500, 60 + 30 * player_id, 0.15))
+    table.played[:] = False
+    for player_id in (2, 5):
+        table.set(player_id, Glicko2Entry(1600, 80, 0.07))
+
+    before = table.deviation.copy()
+    assert table.close_period(30, config) == 8
+    assert table.last_close_seconds >= 0
+    assert not table.played.any()
+
+    for player_id in range(10):
+        row = table.row(player_id)
+        if player_id in (2, 5):
+            assert table.deviation[row] == before[row]
+            continue
+        expected = Glicko2Entry(1500, float(before[row]), float(table.volatility[row]))
+        expected.expand_deviation_because_no_games_played(30, config)
+        assert table.deviation[row] == pytest.approx(expected.deviation, rel=1e-6 if dtype == np.float32 else 1e-12)
+    assert table.deviation.max() == config.max_rd
+
+    # nobody played in the next period
+    assert table.close_period(1, config) == 10
@@ -1,4 +1,18 @@
-from goratings.math.gor import GorEntry, gor_configure, gor_update
+from math import exp
+
+import numpy as np
+
+import pytest
+
+from goratings.math.gor import (
+    GorEntry,
+    compute_con,
+    gor_configure,
+    gor_tournament_update,
+    gor_update,
+    gor_update_batch,
+    gor_win_probability_matrix,
+)
 
 
 def test_table_1():
@@ -46,3 +60,99 @@ def test_example_5():
 
     na = gor_update(ra, rb, 1)
     assert round(na.rating, 0) == 1875
+
+
+def _log_handicap_adjustment(rating, handicap):
+    return rating * exp(handicap / 23.15) - rating
+
+
+def _check_win_probability_matrix():
+    rs = np.random.RandomState(6)
+    ratings = rs.uniform(-900, 2800, 6)
+    opponents = rs.uniform(-900, 2800, 4)
+    matrix = gor_win_probability_matrix(ratings, opponents, _log_handicap_adjustment, handicaps=[0, 1, 5])
+    assert matrix.shape == (3, 6, 4)
+    for h, handicap in enumerate([0, 1, 5]):
+        for i, rating in enumerate(ratings):
+            player = GorEntry(rating, _log_handicap_adjustment(rating, handicap))
+            for j, opponent in enumerate(opponents):
+                expected = player.expected_win_probability(GorEntry(opponent))
+                assert matrix[h, i, j] == pytest.approx(expected, rel=1e-12)
+
+
+def test_win_probability_matrix():
+    gor_configure()
+    _check_win_probability_matrix()
+
+
+def test_win_probability_matrix_scalar_rating_to_rank():
+    # a rating to rank conversion that only works on scalars
+    gor_configure(rating_to_rank=lambda rating: max(0.0, rating / 100 + 9))
+    _check_win_probability_matrix()
+    gor_configure()
+
+
+def test_compute_con():
+    assert compute_con(5) == 116
+    assert compute_con(10) == 116
+    assert compute_con(10.5) == 113
+    assert compute_con(36) == 10
+    assert compute_con(40) == 10
+
+
+def _check_update_batch():
+    rs = np.random.RandomState(7)
+    rating = rs.uniform(-900, 3000, 500)
+    handicap = rs.uniform(0, 500, 500)
+    opponent_rating = rs.uniform(-900, 3000, 500)
+    outcome = rs.randint(0, 2, 500)
+    updated = gor_update_batch(rating, handicap, opponent_rating, 0, outcome)
+    for i in range(len(rating)):
+        expected = gor_update(GorEntry(rating[i], handicap[i]), GorEntry(opponent_rating[i]), outcome[i])
+        assert updated[i] == pytest.approx(expected.rating, rel=1e-12)
+
+
+def test_update_batch():
+    gor_configure()
+    _check_update_batch()
+
+
+def test_update_batch_scalar_rating_to_rank():
+    gor_configure(epsilon=0, rating_to_rank=lambda rating: max(0.0, rating / 100 + 9))
+    _check_update_batch()
+    gor_configure()
+
+
+def test_tournament_update():
+    gor_configure()
+    rs = np.random.RandomState(8)
+    rating = rs.uniform(100, 2700, 40)
+    black = rs.randint(0, 20, 100)
+    white = rs.randint(20, 40, 100)
+    black_handicap = rs.uniform(0, 300, 100)
+    black_outcome = rs.randint(0, 2, 100)
+
+    updated = gor_tournament_update(rating, black, white, black_handicap, black_outcome)
+
+    expected = rating.copy()
+    for b, w, h, o in zip(black, white, black_handicap, black_outcome):
+        expected[b] += gor_update(GorEntry(rating[b], h), GorEntry(rating[w]), o).rating - rating[b]
+        expected[w] += gor_update(GorEntry(rating[w]), GorEntry(rating[b], h), 1 - o).rating - rating[w]
+    assert updated == pytest.approx(expected, rel=1e-12)
+
+
+def test_tournament_update_disjoint():
+    # two tournaments without common players give the same result together as separately
+    gor_configure()
+    rs = np.random.RandomState(9)
+    rating = rs.uniform(100, 2700, 20)
+    black = np.array([0, 2, 4, 10, 12, 14])
+    white = np.array([1, 3, 5, 11, 13, 15])
+    outcome = rs.randint(0, 2, 6)
+
+    together = gor_tournament_update(rating, black, white, 0, outcome)
+    first = gor_tournament_update(rating, black[:3], white[:3], 0, outcome[:3])
+    second = gor_tournament_update(rating, black[3:], white[3:], 0, outcome[3:])
+    assert np.array_equal(together[:10], first[:10])
+    assert np.array_equal(together[10:], second[10:])
+    assert np.array_equal(together[16:], rating[16:])
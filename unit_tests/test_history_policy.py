@@ -0,0 +1,75 @@
+import pytest
+
+from synthetic_games import random_games
+
+from analysis.util import Glicko2OneGameAtATime, HistoryPolicy, InMemoryStorage
+
+from goratings.math.glicko2 import Glicko2Entry
+
+
+def test_from_spec(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "players_to_inspect.ini").write_text("[players]\nalice = 12\nbob = 34\n")
+
+    everyone = HistoryPolicy.from_spec("all")
+    assert everyone.player_ids is None and all(everyone.records(player_id) for player_id in range(1000))
+
+    nobody = HistoryPolicy.from_spec("none")
+    assert nobody.player_ids == set() and not any(nobody.records(player_id) for player_id in range(1000))
+
+    inspected = HistoryPolicy.from_spec("inspected")
+    assert inspected.player_ids == {12, 34} and inspected.sample_rate == 0
+    assert [player_id for player_id in range(1000) if inspected.records(player_id)] == [12, 34]
+
+    sampled = HistoryPolicy.from_spec("0.25")
+    assert sampled.player_ids is None and sampled.sample_rate == 0.25
+
+    both = HistoryPolicy.from_spec("inspected+0.25")
+    assert both.player_ids == {12, 34} and both.sample_rate == 0.25
+    assert {player_id for player_id in range(1000) if both.records(player_id)} == {
+        player_id for player_id in range(1000) if sampled.records(player_id)
+    } | {12, 34}
+
+    for spec in ("", "some", "inspected+some"):
+        with pytest.raises(ValueError):
+            HistoryPolicy.from_spec(spec)
+
+
+def test_sampling_is_deterministic():
+    player_ids = range(1000000000, 1000000000 + 20000)
+    picked = [player_id for player_id in player_ids if HistoryPolicy(sample_rate=0.1).records(player_id)]
+    assert picked == [player_id for player_id in player_ids if HistoryPolicy(sample_rate=0.1).records(player_id)]
+    assert 1800 < len(picked) < 2200
+    # a larger sample contains the smaller one
+    assert set(picked) <= {player_id for player_id in player_ids if HistoryPolicy(sample_rate=0.2).records(player_id)}
+
+
+def test_skipped_entries():
+    policy = HistoryPolicy(player_ids=[1])
+    storage = InMemoryStorage(Glicko2Entry, history_policy=policy)
+
+    # asking doesn't count
+    assert storage.records_history(1) and not storage.records_history(2)
+    assert not storage.records_history(2)
+    assert policy.skipped_entries == 0
+
+    for timestamp in range(5):
+        storage.add_rating_history(1, timestamp, Glicko2Entry())
+        storage.add_rating_history(2, timestamp, Glicko2Entry())
+    assert policy.skipped_entries == 5
+    assert len(storage.get_ratings_newer_or_equal_to(1, 0)) == 5
+    assert len(storage.get_ratings_newer_or_equal_to(2, 0)) == 0
+    assert storage.history_memory()["skipped_rating_entries"] == 5
+
+
+def test_skipped_entries_of_engine():
+    # every rated game adds one history entry per player, recorded or skipped
+    stream = random_games(500, num_players=20, seed=17)
+    policy = HistoryPolicy(player_ids=[1, 2, 3])
+    storage = InMemoryStorage(Glicko2Entry, history_policy=policy)
+    engine = Glicko2OneGameAtATime(storage, record_history=True)
+    rated = sum(not engine.process_game(game).skipped for game in stream)
+
+    recorded = sum(len(storage.get_ratings_newer_or_equal_to(player_id, 0)) for player_id in range(1, 21))
+    assert recorded > 0 and policy.skipped_entries > 0
+    assert recorded + policy.skipped_entries == 2 * rated
@@ -0,0 +1,282 @@
+import numpy as np
+
+import pytest
+
+from synthetic_games import random_games
+
+from analysis.util import (
+    Glicko2DailyWindows,
+    Glicko2GlickmanWeeklyWindow,
+    Glicko2OneGameAtATime,
+    Glicko2WeeklyWindowNoUnexpectedChanges,
+    Glicko2WeeklyWindowReduceRatingMovement,
+    HistoryPolicy,
+    HistoryRetention,
+    InMemoryStorage,
+)
+
+from goratings.math.glicko2 import Glicko2Entry
+
+WEEK = 7 * 24 * 60 * 60
+
+
+def _expanded(entry, n_periods):
+    return entry.copy().expand_deviation_because_no_games_played(n_periods)
+
+
+def _state(storage):
+    return {player_id: (e.rating, e.deviation, e.volatility) for player_id, e in storage.all_players().items()}
+
+
+def test_set_time_without_inflation():
+    storage = InMemoryStorage(Glicko2Entry)
+    storage.set(1, Glicko2Entry(1500, 100))
+    storage.set_time(10 * WEEK)
+    assert storage.get(1).deviation == 100
+
+
+def test_lazy_inflation_equals_eager_expansion():
+    storage = InMemoryStorage(Glicko2Entry, inflation_period=WEEK)
+    entry = Glicko2Entry(1500, 100, 0.06)
+    storage.set_time(3 * WEEK + 5)
+    storage.set(1, entry)
+    storage.add_rating_history(1, 3 * WEEK + 5, entry)
+
+    # the same and the next period are not idle
+    storage.set_time(4 * WEEK + 10)
+    assert storage.get(1) is entry
+
+    # weeks 4 to 11 were sat out
+    storage.set_time(12 * WEEK)
+    inflated = storage.peek(1)
+    assert inflated.deviation == _expanded(entry, 8).deviation
+    assert inflated.deviation > entry.deviation
+    assert entry.deviation == 100  # the history entry is left alone
+    assert storage.get(1) is inflated  # no further periods passed
+
+    storage.set_time(15 * WEEK)
+    assert storage.all_players()[1].deviation == _expanded(_expanded(entry, 8), 3).deviation
+
+    # an eager sweep expanding every idle player at the end of each period
+    swept = entry.copy()
+    for _period in range(11):
+        swept.expand_deviation_because_no_games_played(1)
+    assert storage.all_players()[1].deviation == pytest.approx(swept.deviation, rel=1e-12)
+
+
+def test_lazy_inflation_base_ratings():
+    storage = InMemoryStorage(Glicko2Entry, inflation_period=WEEK)
+    first = Glicko2Entry(1600, 80, 0.06)
+    second = Glicko2Entry(1610, 75, 0.06)
+    storage.add_rating_history(1, 2 * WEEK + 100, first)
+    storage.add_rating_history(1, 9 * WEEK + 100, second)
+
+    assert storage.get_first_rating_older_than(1, 3 * WEEK) is first
+    assert storage.get_first_rating_older_than(1, 6 * WEEK).deviation == _expanded(first, 3).deviation
+    assert storage.get_first_rating_older_than(1, 20 * WEEK).deviation == _expanded(second, 10).deviation
+    assert storage.get_first_rating_older_than(1, 2 * WEEK).deviation == 350
+    assert first.deviation == 80 and second.deviation == 75
+
+
+def test_glickman_window_lazy_inflation():
+    storage = InMemoryStorage(Glicko2Entry, inflation_period=WEEK)
+    engine = Glicko2GlickmanWeeklyWindow(storage, lazy_inflation=True)
+
+    first, second = random_games(2, num_players=2, seed=3)
+    first.black_id, first.white_id, first.winner_id, first.ended = 1, 2, 1, 2 * WEEK + 100
+    second.black_id, second.white_id, second.winner_id, second.ended = 1, 2, 2, 12 * WEEK + 100
+    first.handicap = second.handicap = 0
+    first.timeout = second.timeout = False
+
+    engine.process_game(first)
+    black = storage.get_first_rating_older_than(1, 3 * WEEK)
+    assert storage.get_first_rating_older_than(1, 12 * WEEK).deviation == _expanded(black, 9).deviation
+    analytics = engine.process_game(second)
+
+    # the storage expands for weeks 3 to 11, which were sat out, the engine for the tenth week since the first game
+    assert analytics.black_deviation == _expanded(black, 10).deviation
+    assert analytics.black_deviation > black.deviation
+
+    eager = Glicko2GlickmanWeeklyWindow(InMemoryStorage(Glicko2Entry))
+    eager.process_game(first)
+    assert vars(eager.process_game(second)) == vars(analytics)
+
+
+@pytest.mark.parametrize("inflation_period", [0, WEEK])
+def test_peek_does_not_create_entries(inflation_period):
+    storage = InMemoryStorage(Glicko2Entry, inflation_period=inflation_period)
+    assert storage.peek(1) is None
+    assert storage.all_players() == {}
+    entry = storage.get(1)
+    assert storage.peek(1) is entry
+    assert storage.peek(2) is None
+    assert list(storage.all_players()) == [1]
+
+
+@pytest.mark.parametrize("inflation_period", [0, WEEK])
+@pytest.mark.parametrize("as_ids", [list, np.array], ids=["list", "ndarray"])
+def test_get_many_set_many_match_get_set(inflation_period, as_ids):
+    single = InMemoryStorage(Glicko2Entry, inflation_period=inflation_period)
+    many = InMemoryStorage(Glicko2Entry, inflation_period=inflation_period)
+    player_ids = [3, 1, 4, 5, 9]
+    entries = [Glicko2Entry(1500 + 10 * player_id, 100) for player_id in player_ids]
+
+    for player_id, entry in zip(player_ids, entries):
+        single.set(player_id, entry)
+    many.set_many(as_ids(player_ids), entries)
+
+    assert many.all_players() == single.all_players()
+    assert all(type(player_id) is int for player_id in many.all_players())
+    assert [many.get_set_count(player_id) for player_id in player_ids] == [1] * 5
+
+    # a new player gets a default entry, just like with get
+    wanted = as_ids([9, 2, 3])
+    got = many.get_many(wanted)
+    assert got[0] is entries[4] and got[2] is entries[0]
+    assert (got[1].rating, got[1].deviation) == (single.get(2).rating, single.get(2).deviation)
+    assert got[1] is many.get(2)
+    assert sorted(many.all_players()) == sorted(single.all_players()) == [1, 2, 3, 4, 5, 9]
+
+
+def _ratings(ratings):
+    return {player_id: e.rating for player_id, e in ratings.items()}
+
+
+def _naive_ratings_as_of(storage, timestamp):
+    ret = {}
+    for player_id in storage._rating_history:
+        ratings = [e.rating for t, e in storage._rating_history[player_id] if t <= timestamp]
+        if ratings:
+            ret[player_id] = ratings[-1]
+    return ret
+
+
+@pytest.mark.parametrize("compact_history", [False, True])
+def test_ratings_as_of(compact_history):
+    storage = InMemoryStorage(Glicko2Entry, compact_history=compact_history)
+    # player 3 plays twice in the same second, the later entry wins
+    for player_id, timestamp, rating in [(1, 10, 1510), (2, 20, 1620), (1, 30, 1530), (3, 30, 1730), (3, 30, 1731)]:
+        storage.add_rating_history(player_id, timestamp, Glicko2Entry(rating))
+    storage.set(4, Glicko2Entry(1800))  # rated, but no history yet
+
+    assert _ratings(storage.ratings_as_of(9)) == {}
+    assert _ratings(storage.ratings_as_of(10)) == {1: 1510}
+    assert _ratings(storage.ratings_as_of(29)) == {1: 1510, 2: 1620}
+    assert _ratings(storage.ratings_as_of(30)) == {1: 1530, 2: 1620, 3: 1731}
+    assert _ratings(storage.ratings_as_of(10 ** 9)) == {1: 1530, 2: 1620, 3: 1731}
+
+    dates = [30, 0, 25, 10, 30, 10 ** 9]
+    many = storage.ratings_as_of_many(dates)
+    assert sorted(many) == [0, 10, 25, 30, 10 ** 9]
+    for date in dates:
+        assert _ratings(many[date]) == _ratings(storage.ratings_as_of(date))
+    assert storage.ratings_as_of_many([]) == {}
+
+
+@pytest.mark.parametrize("compact_history", [False, True])
+def test_ratings_as_of_many_matches_history(compact_history):
+    stream = random_games(600, num_players=40, seed=14)
+    storage = InMemoryStorage(Glicko2Entry, compact_history=compact_history)
+    engine = Glicko2OneGameAtATime(storage, record_history=True)
+    for game in stream:
+        engine.process_game(game)
+
+    dates = [0, stream[0].ended - 1] + [game.ended for game in stream[::37]] + [stream[-1].ended + 1]
+    many = storage.ratings_as_of_many(dates)
+    for date in dates:
+        assert _ratings(many[date]) == _naive_ratings_as_of(storage, date)
+
+
+def test_ratings_as_of_with_policies():
+    storage = InMemoryStorage(
+        Glicko2Entry, retention=HistoryRetention(max_age=100), history_policy=HistoryPolicy(player_ids=[1])
+    )
+    for timestamp in range(0, 1000, 50):
+        storage.add_rating_history(1, timestamp, Glicko2Entry(1500 + timestamp))
+        storage.add_rating_history(2, timestamp, Glicko2Entry(1500 + timestamp))
+    # player 2 is skipped by the policy, player 1's early entries are dropped
+    assert _ratings(storage.ratings_as_of(0)) == {}
+    assert _ratings(storage.ratings_as_of(975)) == {1: 2450}
+
+
+def test_retention_arguments():
+    with pytest.raises(ValueError):
+        HistoryRetention()
+    with pytest.raises(ValueError):
+        HistoryRetention(window=10, max_age=10)
+    with pytest.raises(ValueError):
+        HistoryRetention(window=10, windows=0)
+
+
+@pytest.mark.parametrize("policy, cutoff", [({"window": 10, "windows": 2}, 80), ({"max_age": 25}, 74)])
+def test_retention_keeps_newest_entries(policy, cutoff):
+    retention = HistoryRetention(**policy)
+    storage = InMemoryStorage(Glicko2Entry, retention=retention)
+    for timestamp in range(100):
+        storage.add_rating_history(1, timestamp, Glicko2Entry(1500 + timestamp))
+        storage.add_match_history(1, timestamp, timestamp)
+
+    # the rating history keeps the base rating before the cutoff
+    assert [e.rating - 1500 for e in storage.get_ratings_newer_or_equal_to(1, 0)] == list(range(cutoff - 1, 100))
+    assert list(storage.get_matches_newer_or_equal_to(1, 0)) == list(range(cutoff, 100))
+    assert storage.get_first_rating_older_than(1, cutoff).rating == 1500 + cutoff - 1
+    assert retention.dropped_rating_entries == cutoff - 1
+    assert retention.dropped_match_entries == cutoff
+
+
+@pytest.mark.parametrize(
+    "engine_type",
+    [
+        Glicko2DailyWindows,
+        Glicko2GlickmanWeeklyWindow,
+        Glicko2WeeklyWindowNoUnexpectedChanges,
+        Glicko2WeeklyWindowReduceRatingMovement,
+    ],
+)
+def test_retention_keeps_window_results(engine_type):
+    # keeping just the current window is enough for the windowed engines, even when they reread the whole window
+    stream = random_games(2000, num_players=40, seed=16)
+    window = engine_type.WINDOW
+
+    expected = InMemoryStorage(Glicko2Entry)
+    engine = engine_type(expected, full_recompute=True)
+    expected_analytics = [vars(engine.process_game(game)) for game in stream]
+
+    retention = HistoryRetention(window=window, windows=1)
+    storage = InMemoryStorage(Glicko2Entry, retention=retention)
+    engine = engine_type(storage, full_recompute=True)
+    assert [vars(engine.process_game(game)) for game in stream] == expected_analytics
+
+    assert _state(storage) == _state(expected)
+    assert retention.dropped_match_entries > 0
+    memory = storage.history_memory()
+    assert memory["match_entries"] < expected.history_memory()["match_entries"]
+    assert memory["match_entries"] + memory["dropped_match_entries"] == expected.history_memory()["match_entries"]
+
+
+def test_history_memory():
+    retention = HistoryRetention(max_age=10)
+    storage = InMemoryStorage(Glicko2Entry, retention=retention, history_policy=HistoryPolicy(player_ids=[1, 2]))
+    assert storage.history_memory()["rating_entries"] == 0
+    for timestamp in range(20):
+        for player_id in (1, 2, 3):
+            storage.add_rating_history(player_id, timestamp, Glicko2Entry())
+        storage.add_match_history(1, timestamp, (timestamp, Glicko2Entry()))
+
+    memory = storage.history_memory()
+    # player 3 is skipped, the others keep the last 10 seconds and the base rating before them
+    assert memory["rating_players"] == 2 and memory["match_players"] == 1
+    assert memory["rating_entries"] == 2 * 12
+    assert memory["dropped_rating_entries"] == 2 * 8 == retention.dropped_rating_entries
+    assert memory["skipped_rating_entries"] == 20
+    assert memory["match_entries"] == 11
+    assert memory["dropped_match_entries"] == 9 == retention.dropped_match_entries
+
+    # every kind of entry is costed at the size of one entry of that kind
+    rating_size = memory["rating_bytes"] // memory["rating_entries"]
+    assert rating_size > 0 and memory["rating_bytes"] == rating_size * memory["rating_entries"]
+    assert memory["dropped_rating_bytes"] == rating_size * memory["dropped_rating_entries"]
+    assert memory["skipped_rating_bytes"] == rating_size * memory["skipped_rating_entries"]
+    match_size = memory["match_bytes"] // memory["match_entries"]
+    assert match_size > rating_size
+    assert memory["dropped_match_bytes"] == match_size * memory["dropped_match_entries"]
@@ -0,0 +1,176 @@
+import os
+
+import pytest
+
+from synthetic_games import random_games
+
+from analysis.util import (
+    CompactHistory,
+    Glicko2OneGameAtATime,
+    InMemoryStorage,
+    JournalingStorage,
+    games_after,
+    load_checkpoint,
+    restore_checkpoint,
+    save_checkpoint,
+)
+
+from goratings.math.glicko2 import Glicko2Entry
+
+WEEK = 7 * 24 * 60 * 60
+
+
+def _state(storage):
+    return {player_id: (e.rating, e.deviation, e.volatility) for player_id, e in storage.all_players().items()}
+
+
+def _history(storage, player_id):
+    return [(e.rating, e.deviation) for e in storage.get_ratings_newer_or_equal_to(player_id, 0)]
+
+
+def _assert_same(storage, expected):
+    assert _state(storage) == _state(expected)
+    for player_id in expected.all_players():
+        assert storage.get_timeout_flag(player_id) == expected.get_timeout_flag(player_id)
+        assert storage.get_set_count(player_id) == expected.get_set_count(player_id)
+        assert _history(storage, player_id) == _history(expected, player_id)
+
+
+def _rate(storage, games, done=True):
+    engine = Glicko2OneGameAtATime(storage, record_history=True)
+    for game in games:
+        engine.process_game(game)
+        if done:
+            storage.game_done(game)
+
+
+def _expected(games):
+    storage = InMemoryStorage(Glicko2Entry)
+    _rate(storage, games, done=False)
+    return storage
+
+
+def test_checkpoint_round_trip(tmp_path):
+    filename = str(tmp_path / "state.npz")
+    storage = InMemoryStorage(Glicko2Entry, inflation_period=WEEK)
+    storage.set_time(3 * WEEK)
+    stream = random_games(20)
+    for game in stream:
+        entry = Glicko2Entry(1500 + game.game_id, 100, 0.06)
+        storage.set(game.black_id, entry)
+        storage.set_timeout_flag(game.white_id, game.timeout)
+        storage.add_rating_history(game.black_id, game.ended, entry.copy())
+        storage.add_match_history(game.black_id, game.ended, (game, Glicko2Entry(1400, 90)))
+    storage.clear_set_count(stream[0].black_id)
+    save_checkpoint(storage, filename, 20, stream[-1].ended)
+
+    restored, last_game_id, last_ended = load_checkpoint(filename, Glicko2Entry)
+    assert (last_game_id, last_ended) == (20, stream[-1].ended)
+    assert restored.inflation_period == WEEK and restored._current_period == storage._current_period
+    assert restored._last_active_period == storage._last_active_period
+    _assert_same(restored, storage)
+    for player_id, items in storage._match_history.items():
+        assert [
+            (t, g.game_id, g.speed, g.black_manual_rank_update, e.rating)
+            for t, (g, e) in restored._match_history[player_id]
+        ] == [(t, g.game_id, g.speed, g.black_manual_rank_update, e.rating) for t, (g, e) in items]
+
+    # restoring into a storage keeps its own settings
+    compact = InMemoryStorage(Glicko2Entry, inflation_period=WEEK, compact_history=True)
+    assert restore_checkpoint(compact, filename) == (20, stream[-1].ended)
+    _assert_same(compact, storage)
+    assert all(isinstance(history, CompactHistory) for history in compact._rating_history.values())
+
+    with pytest.raises(ValueError):
+        restore_checkpoint(InMemoryStorage(Glicko2Entry), filename)
+
+
+def test_resume_from_checkpoint_and_journal(tmp_path):
+    filename = str(tmp_path / "state.npz")
+    stream = random_games(1200, num_players=40, seed=10)
+
+    storage = JournalingStorage(filename, Glicko2Entry, flush_every=50)
+    _rate(storage, stream[:400])
+    storage.checkpoint()
+    _rate(storage, stream[400:700])
+    storage.close()  # the last 300 games are only in the journal
+
+    storage = JournalingStorage(filename, Glicko2Entry)
+    assert (storage.last_game_id, storage.last_ended) == (stream[699].game_id, stream[699].ended)
+    _assert_same(storage, _expected(stream[:700]))
+    remaining = list(storage.unprocessed(stream))
+    assert remaining == stream[700:]
+    _rate(storage, remaining)
+    storage.close()
+
+    storage = JournalingStorage(filename, Glicko2Entry)
+    assert list(storage.unprocessed(stream)) == []
+    _assert_same(storage, _expected(stream))
+    storage.close()
+
+
+def test_torn_journal_tail(tmp_path):
+    filename = str(tmp_path / "state.npz")
+    stream = random_games(300, num_players=30, seed=11)
+
+    storage = JournalingStorage(filename, Glicko2Entry)
+    _rate(storage, stream[:200])
+    storage.flush()
+    size = os.path.getsize(filename + ".journal")
+    # the process dies in the middle of a game, part way through writing a record
+    _rate(storage, stream[200:201], done=False)
+    storage.set(999, Glicko2Entry(2000))
+    storage.close()
+    with open(filename + ".journal", "ab") as f:
+        f.write(b"S\x01\x02")
+
+    storage = JournalingStorage(filename, Glicko2Entry)
+    assert storage.last_game_id == stream[199].game_id
+    assert os.path.getsize(filename + ".journal") == size
+    assert storage.peek(999) is None
+    _assert_same(storage, _expected(stream[:200]))
+
+    _rate(storage, storage.unprocessed(stream))
+    storage.close()
+    storage = JournalingStorage(filename, Glicko2Entry)
+    _assert_same(storage, _expected(stream))
+    storage.close()
+
+
+def test_compact_history_after_resume(tmp_path):
+    filename = str(tmp_path / "state.npz")
+    stream = random_games(400, num_players=60, seed=12)
+
+    storage = JournalingStorage(filename, Glicko2Entry, compact_history=True)
+    _rate(storage, stream[:200])
+    storage.checkpoint()
+    storage.close()
+
+    storage = JournalingStorage(filename, Glicko2Entry, compact_history=True)
+    _rate(storage, storage.unprocessed(stream))
+    assert storage._rating_history
+    assert all(isinstance(history, CompactHistory) for history in storage._rating_history.values())
+    _assert_same(storage, _expected(stream))
+    storage.close()
+
+    # the analysis scripts switch it on after opening the storage
+    storage = JournalingStorage(filename, Glicko2Entry)
+    storage.compact_history = True
+    storage.add_rating_history(1000, stream[-1].ended, Glicko2Entry())
+    assert isinstance(storage._rating_history[1000], CompactHistory)
+    storage.close()
+
+
+def test_unprocessed(tmp_path):
+    stream = random_games(100)
+    assert list(games_after(stream, 0, 0)) == stream
+    assert list(games_after(stream, stream[39].game_id, stream[39].ended)) == stream[40:]
+    # the last rated game is no longer in the data, e.g. because of a different filter
+    assert list(games_after(stream[:30] + stream[31:], stream[30].game_id, stream[30].ended)) == stream[31:]
+
+    storage = JournalingStorage(str(tmp_path / "state.npz"), Glicko2Entry)
+    storage.game_done(stream[9])
+    batches = list(storage.unprocessed_batches(stream, batch_size=40))
+    assert [len(batch) for batch in batches] == [40, 40, 10]
+    assert [game for batch in batches for game in batch] == stream[10:]
+    storage.close()
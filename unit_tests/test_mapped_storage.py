@@ -0,0 +1,86 @@
+import numpy as np
+
+import pytest
+
+from analysis.util import InMemoryStorage, MappedStorage, build_mapped_storage
+
+from goratings.math.glicko2 import Glicko2Entry
+from goratings.math.gor import GorEntry
+
+
+def _values(entry):
+    return (entry.rating, entry.deviation, entry.volatility)
+
+
+def test_build_and_map(tmp_path):
+    filename = str(tmp_path / "ratings.map")
+    storage = InMemoryStorage(Glicko2Entry)
+    player_ids = [7, 3, 1000000000, 42, -5]
+    for n, player_id in enumerate(player_ids):
+        storage.set(player_id, Glicko2Entry(1500 + n, 100 - n, 0.06))
+    storage.set(42, Glicko2Entry(1800, 60, 0.05))
+    storage.set_timeout_flag(3, True)
+    storage.set_timeout_flag(7, False)
+    build_mapped_storage(storage, filename)
+
+    mapped = MappedStorage(filename, Glicko2Entry)
+    assert len(mapped) == 5
+    assert mapped.ids.tolist() == sorted(player_ids)
+    expected = storage.all_players()
+    assert {player_id: _values(e) for player_id, e in mapped.all_players().items()} == {
+        player_id: _values(e) for player_id, e in expected.items()
+    }
+    for player_id in player_ids:
+        assert _values(mapped.get(player_id)) == _values(expected[player_id])
+        assert _values(mapped.peek(player_id)) == _values(expected[player_id])
+        assert mapped.get_set_count(player_id) == storage.get_set_count(player_id)
+        assert mapped.get_timeout_flag(player_id) == storage.get_timeout_flag(player_id)
+    assert mapped.get_set_count(42) == 2 and mapped.get_timeout_flag(3)
+
+    # unknown players get a default entry that is not stored
+    assert mapped.peek(8) is None and mapped.peek(-6) is None and mapped.peek(2000000000) is None
+    assert _values(mapped.get(8)) == _values(Glicko2Entry())
+    assert mapped.get_set_count(8) == 0 and not mapped.get_timeout_flag(8)
+    assert len(mapped) == 5
+
+    wanted = [42, 8, -5, 1000000000]
+    assert mapped.index(wanted).tolist() == [3, -1, 0, 4]
+    for ids in (wanted, np.array(wanted)):
+        assert [_values(e) for e in mapped.get_many(ids)] == [_values(mapped.get(player_id)) for player_id in wanted]
+
+    # decoded entries are copies, the file is read only
+    mapped.get(42).rating = 0
+    assert mapped.get(42).rating == 1800
+    with pytest.raises(TypeError):
+        mapped.set(42, Glicko2Entry())
+    with pytest.raises(ValueError):
+        mapped.values[0, 0] = 0
+
+
+def test_empty_file(tmp_path):
+    filename = str(tmp_path / "ratings.map")
+    build_mapped_storage(InMemoryStorage(Glicko2Entry), filename)
+
+    mapped = MappedStorage(filename, Glicko2Entry)
+    assert len(mapped) == 0
+    assert mapped.all_players() == {}
+    assert mapped.peek(1) is None
+    assert _values(mapped.get(1)) == _values(Glicko2Entry())
+    assert mapped.index([1, 2]).tolist() == [-1, -1]
+    assert [_values(e) for e in mapped.get_many([1, 2])] == [_values(Glicko2Entry())] * 2
+    assert mapped.get_set_count(1) == 0 and not mapped.get_timeout_flag(1)
+
+
+def test_wrong_file(tmp_path):
+    filename = str(tmp_path / "ratings.map")
+    storage = InMemoryStorage(GorEntry)
+    storage.set(1, GorEntry(1500))
+    build_mapped_storage(storage, filename)
+    assert MappedStorage(filename, GorEntry).get(1).rating == 1500
+    with pytest.raises(ValueError):
+        MappedStorage(filename, Glicko2Entry)
+
+    with open(filename, "wb") as f:
+        f.write(b"\0" * 256)
+    with pytest.raises(ValueError):
+        MappedStorage(filename, GorEntry)
@@ -0,0 +1,132 @@
+import numpy as np
+
+import pytest
+
+from synthetic_games import random_games
+
+from analysis.util import Glicko2OneGameAtATime, InMemoryStorage, SQLiteStorage
+
+from goratings.math.glicko2 import Glicko2Entry
+
+
+def _state(storage):
+    return {player_id: (e.rating, e.deviation, e.volatility) for player_id, e in storage.all_players().items()}
+
+
+def _assert_same(storage, expected):
+    assert _state(storage) == _state(expected)
+    for player_id in expected.all_players():
+        assert storage.get_timeout_flag(player_id) == expected.get_timeout_flag(player_id)
+        assert storage.get_set_count(player_id) == expected.get_set_count(player_id)
+        assert [(e.rating, e.deviation) for e in storage.get_ratings_newer_or_equal_to(player_id, 0)] == [
+            (e.rating, e.deviation) for e in expected.get_ratings_newer_or_equal_to(player_id, 0)
+        ]
+
+
+@pytest.mark.parametrize("cache_size, max_dirty", [(None, 100000), (5, 3)])
+def test_matches_in_memory(tmp_path, cache_size, max_dirty):
+    stream = random_games(1500, num_players=40, seed=8)
+    filename = str(tmp_path / "ratings.db")
+
+    expected = InMemoryStorage(Glicko2Entry)
+    engine = Glicko2OneGameAtATime(expected, record_history=True)
+    for game in stream:
+        engine.process_game(game)
+
+    storage = SQLiteStorage(filename, Glicko2Entry, max_dirty=max_dirty, cache_size=cache_size, histories=True)
+    engine = Glicko2OneGameAtATime(storage, record_history=True)
+    for game in stream:
+        engine.process_game(game)
+        if cache_size is not None:
+            assert len(storage._cache) <= cache_size + 2
+    _assert_same(storage, expected)
+    storage.close()
+
+    # everything is read back from the file
+    reopened = SQLiteStorage(filename, Glicko2Entry, histories=True)
+    _assert_same(reopened, expected)
+    assert reopened.last_game_id == 0  # game_done was never called
+    reopened.close()
+
+
+def test_get_many_set_many(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "ratings.db"), Glicko2Entry, cache_size=2)
+    entries = [Glicko2Entry(1500 + player_id) for player_id in range(6)]
+    storage.set_many(np.arange(6), entries)
+    assert [e.rating for e in storage.get_many(np.array([5, 0, 7]))] == [1505, 1500, Glicko2Entry().rating]
+    assert storage.peek(8) is None
+    assert sorted(storage.all_players()) == [0, 1, 2, 3, 4, 5, 7]
+    assert all(type(player_id) is int for player_id in storage.all_players())
+    storage.close()
+
+
+@pytest.mark.parametrize("waves", [False, True])
+def test_resume(tmp_path, waves):
+    stream = random_games(1000, num_players=40, seed=9)
+    filename = str(tmp_path / "ratings.db")
+
+    expected = InMemoryStorage(Glicko2Entry)
+    engine = Glicko2OneGameAtATime(expected)
+    for game in stream:
+        engine.process_game(game)
+
+    def run(storage, games):
+        engine = Glicko2OneGameAtATime(storage)
+        if waves:
+            batch = list(games)
+            engine.process_batch(batch)
+            storage.game_done(batch[-1])
+        else:
+            for game in games:
+                engine.process_game(game)
+                storage.game_done(game)
+
+    storage = SQLiteStorage(filename, Glicko2Entry, max_dirty=7, cache_size=10)
+    run(storage, storage.unprocessed(stream[:600]))
+    storage.close()
+
+    storage = SQLiteStorage(filename, Glicko2Entry, max_dirty=7, cache_size=10)
+    assert (storage.last_game_id, storage.last_ended) == (stream[599].game_id, stream[599].ended)
+    remaining = list(storage.unprocessed(stream))
+    assert remaining == stream[600:]
+    run(storage, remaining)
+    storage.close()
+
+    storage = SQLiteStorage(filename, Glicko2Entry)
+    assert list(storage.unprocessed(stream)) == []
+    if waves:
+        # the waves are rated with the NumPy kernel, see Glicko2OneGameAtATime.process_wave
+        state = _state(expected)
+        assert _state(storage).keys() == state.keys()
+        np.testing.assert_allclose([_state(storage)[k] for k in state], list(state.values()), rtol=1e-7)
+    else:
+        assert _state(storage) == _state(expected)
+    storage.close()
+
+
+def test_flushes_wait_for_game_done(tmp_path):
+    # once games are tracked, the database only changes at game boundaries
+    first, second = random_games(2)
+    filename = str(tmp_path / "ratings.db")
+    storage = SQLiteStorage(filename, Glicko2Entry, max_dirty=1)
+    assert list(storage.unprocessed([first, second])) == [first, second]
+    storage.set(1, Glicko2Entry(1600))
+    storage.set(4, Glicko2Entry(1900))
+    reader = SQLiteStorage(filename, Glicko2Entry)
+    assert reader.all_players() == {}
+    reader.close()
+    storage.game_done(first)
+    storage.set(2, Glicko2Entry(1700))
+    storage.set(3, Glicko2Entry(1800))
+
+    reader = SQLiteStorage(filename, Glicko2Entry)
+    assert sorted(reader.all_players()) == [1, 4]
+    assert reader.last_game_id == first.game_id
+    reader.close()
+
+    storage.game_done(second)
+    reader = SQLiteStorage(filename, Glicko2Entry)
+    assert sorted(reader.all_players()) == [1, 2, 3, 4]
+    assert reader.last_game_id == second.game_id
+    reader.close()
+    storage.close()
@@ -0,0 +1,148 @@
+import random
+import sqlite3
+
+import numpy as np
+
+import pytest
+
+from analysis.util import EGFGameData, GorOneGameAtATime, InMemoryStorage, cli, config, tournament_waves
+from analysis.util.RatingMath import get_handicap_adjustment
+
+from goratings.interfaces import GameRecord
+from goratings.math.gor import GorEntry, gor_update
+
+DAY = 86400
+
+
+def _game(game_id, black_id, white_id, winner_id, ended=0, handicap=0):
+    return GameRecord(game_id, 19, handicap, 0, black_id, white_id, 60, False, winner_id, ended, None, None)
+
+
+def _ids(groups):
+    return [[game.game_id for game in group] for group in groups]
+
+
+@pytest.fixture
+def egf_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "args", cli.parse_args([]), raising=False)
+    filename = str(tmp_path / "egf-data.db")
+    conn = sqlite3.connect(filename)
+    conn.execute(
+        """
+        CREATE TABLE game_records (
+            id INTEGER PRIMARY KEY, black_id INTEGER, white_id INTEGER, handicap INTEGER, winner_id INTEGER,
+            ended INTEGER, black_manual_rank_update INTEGER, white_manual_rank_update INTEGER,
+            tournament_code TEXT, round INTEGER
+        )
+        """
+    )
+    # T1 ends after T2, although its first games were played before T2's
+    games = [
+        (1, 1, 2, 0, 1, 1 * DAY, None, None, "T1", 1),
+        (2, 3, 4, 0, 4, 1 * DAY, None, None, "T1", 1),
+        (3, 1, 3, 0, 3, 9 * DAY, None, None, "T1", 2),
+        (4, 5, 6, 0, 5, 4 * DAY, None, None, "T2", 1),
+        (5, 2, 4, 0, 2, 10 * DAY, None, None, "T1", 2),
+    ]
+    conn.executemany("INSERT INTO game_records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", games)
+    conn.commit()
+    conn.close()
+    return filename
+
+
+def test_egf_tournaments(egf_db):
+    data = EGFGameData(egf_db, quiet=True)
+    assert _ids(data.tournaments()) == [[4], [1, 2, 3, 5]]
+    assert _ids(data.tournaments(by_round=True)) == [[4], [1, 2], [3, 5]]
+
+
+def test_egf_tournaments_without_tournament_columns(egf_db):
+    # databases built before the tournament columns were added are grouped by date
+    conn = sqlite3.connect(egf_db)
+    conn.execute("CREATE TABLE old AS SELECT id, black_id, white_id, handicap, winner_id, ended FROM game_records")
+    conn.execute("ALTER TABLE old ADD COLUMN black_manual_rank_update INTEGER")
+    conn.execute("ALTER TABLE old ADD COLUMN white_manual_rank_update INTEGER")
+    conn.execute("DROP TABLE game_records")
+    conn.execute("ALTER TABLE old RENAME TO game_records")
+    conn.commit()
+    conn.close()
+
+    assert _ids(EGFGameData(egf_db, quiet=True).tournaments()) == [[1, 2], [4], [3], [5]]
+
+
+def test_tournament_waves():
+    a = [_game(1, 1, 2, 1), _game(2, 2, 1, 1)]
+    b = [_game(3, 3, 4, 3)]
+    c = [_game(4, 2, 5, 5)]
+    d = [_game(5, 6, 7, 6), _game(6, 7, 8, 8)]
+    # c shares player 2 with a, so it starts a new wave
+    assert list(tournament_waves([a, b, c, d])) == [[a, b], [c, d]]
+    assert list(tournament_waves([a, b, c, d], max_wave_size=2)) == [[a], [b, c], [d]]
+    # a tournament larger than the limit still gets a wave of its own
+    assert list(tournament_waves([a, d], max_wave_size=1)) == [[a], [d]]
+    assert list(tournament_waves([])) == []
+
+
+def _rounds(num_rounds, num_players=16, seed=19):
+    # every player plays once per round, so rating a round at once is the same as rating its games in order
+    rng = random.Random(seed)
+    rounds = []
+    game_id = 0
+    for r in range(num_rounds):
+        players = list(range(1, num_players + 1))
+        rng.shuffle(players)
+        games = []
+        for black_id, white_id in zip(players[::2], players[1::2]):
+            game_id += 1
+            winner_id = rng.choice([black_id, white_id])
+            games.append(_game(game_id, black_id, white_id, winner_id, r * DAY, rng.choice([0, 0, 2, 4])))
+        rounds.append(games)
+    return rounds
+
+
+def test_process_tournaments_by_round_matches_process_game():
+    rounds = _rounds(6)
+
+    expected = InMemoryStorage(GorEntry)
+    engine = GorOneGameAtATime(expected)
+    expected_analytics = [engine.process_game(game) for games in rounds for game in games]
+
+    storage = InMemoryStorage(GorEntry)
+    engine = GorOneGameAtATime(storage)
+    analytics = [a for wave in tournament_waves(rounds) for a in engine.process_tournaments(wave)]
+
+    assert [a.game for a in analytics] == [a.game for a in expected_analytics]
+    for name in ("black_rating", "white_rating", "expected_win_rate", "black_games_played", "white_games_played"):
+        np.testing.assert_allclose(
+            [getattr(a, name) for a in analytics], [getattr(a, name) for a in expected_analytics], rtol=1e-12
+        )
+    players = expected.all_players()
+    np.testing.assert_allclose(
+        [storage.get(player_id).rating for player_id in players], [e.rating for e in players.values()], rtol=1e-12
+    )
+
+
+def test_process_tournaments_rates_against_pre_tournament_ratings():
+    rounds = _rounds(4, seed=20)
+    tournament = [game for games in rounds for game in games]
+    storage = InMemoryStorage(GorEntry)
+    for player_id in range(1, 17):
+        storage.set(player_id, GorEntry(1800 + 25 * player_id))
+    before = {player_id: entry.rating for player_id, entry in storage.all_players().items()}
+
+    analytics = GorOneGameAtATime(storage).process_tournaments([tournament])
+
+    # every game counts with the ratings from before the tournament, the changes are summed up
+    expected = dict(before)
+    for game in tournament:
+        black = GorEntry(before[game.black_id]).with_handicap(
+            get_handicap_adjustment(before[game.black_id], game.handicap)
+        )
+        white = GorEntry(before[game.white_id])
+        expected[game.black_id] += gor_update(black, white, game.winner_id == game.black_id).rating - black.rating
+        expected[game.white_id] += gor_update(white, black, game.winner_id == game.white_id).rating - white.rating
+    for player_id, rating in expected.items():
+        assert storage.get(player_id).rating == pytest.approx(rating, rel=1e-12)
+    assert [(a.black_rating, a.white_rating) for a in analytics] == [
+        (before[game.black_id], before[game.white_id]) for game in tournament
+    ]
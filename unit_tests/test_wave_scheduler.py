@@ -0,0 +1,75 @@
+import numpy as np
+
+from synthetic_games import random_games
+
+from analysis.util import Glicko2OneGameAtATime, InMemoryStorage, game_waves
+
+from goratings.math.glicko2 import Glicko2Entry
+
+
+def _entry(entry):
+    return entry.rating, entry.deviation, entry.volatility
+
+
+def test_game_waves():
+    stream = random_games(2000)
+    waves = list(game_waves(stream, max_wave_size=8))
+
+    assert [game for wave in waves for game in wave] == stream
+    for wave in waves:
+        assert 0 < len(wave) <= 8
+        players = [game.black_id for game in wave] + [game.white_id for game in wave if game.white_id != game.black_id]
+        assert len(players) == len(set(players))
+    # a wave only ends early when the next game shares a player with it
+    for wave, next_wave in zip(waves, waves[1:]):
+        if len(wave) < 8:
+            players = {game.black_id for game in wave} | {game.white_id for game in wave}
+            assert next_wave[0].black_id in players or next_wave[0].white_id in players
+
+
+def test_game_waves_empty():
+    assert list(game_waves([])) == []
+
+
+def test_process_wave_matches_process_game():
+    stream = random_games(3000, num_players=40)
+
+    sequential = InMemoryStorage(Glicko2Entry)
+    engine = Glicko2OneGameAtATime(sequential, record_history=True)
+    expected = [engine.process_game(game) for game in stream]
+
+    waved = InMemoryStorage(Glicko2Entry)
+    engine = Glicko2OneGameAtATime(waved, record_history=True)
+    analytics = [a for wave in game_waves(stream) for a in engine.process_wave(wave)]
+
+    # the tolerance documented in Glicko2OneGameAtATime.process_wave
+    assert len(analytics) == len(expected)
+    assert any(a.skipped for a in expected)
+    assert [(a.game, a.skipped) for a in analytics] == [(b.game, b.skipped) for b in expected]
+    for name in (
+        "black_rating",
+        "white_rating",
+        "black_deviation",
+        "white_deviation",
+        "expected_win_rate",
+        "black_updated_rating",
+        "white_updated_rating",
+    ):
+        np.testing.assert_allclose(
+            [getattr(a, name) for a in analytics if not a.skipped],
+            [getattr(b, name) for b in expected if not b.skipped],
+            rtol=1e-7,
+            err_msg=name,
+        )
+
+    state = sequential.all_players()
+    assert waved.all_players().keys() == state.keys()
+    for player_id, entry in state.items():
+        np.testing.assert_allclose(
+            _entry(waved.get(player_id)), (entry.rating, entry.deviation, entry.volatility), rtol=1e-7
+        )
+        np.testing.assert_allclose(
+            [(e.rating, e.deviation) for e in waved.get_ratings_newer_or_equal_to(player_id, 0)],
+            [(e.rating, e.deviation) for e in sequential.get_ratings_newer_or_equal_to(player_id, 0)],
+            rtol=1e-7,
+        )